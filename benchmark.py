@@ -0,0 +1,285 @@
+"""
+Benchmark suite for Social Rocket queue, calendar and scheduler operations.
+
+Generates synthetic queues (1k/10k/100k posts by default), times the
+operations that scale with queue size and writes the results as JSON so
+runs from different versions can be compared.
+
+    python benchmark.py                              # full run
+    python benchmark.py --sizes 1000 10000 -o new.json
+    python benchmark.py --compare old.json new.json
+
+Runs headless: QT_QPA_PLATFORM defaults to "offscreen".
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QEvent, QT_VERSION_STR
+from PyQt6.QtWidgets import QApplication
+
+import social_rocket
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+# --------------------------------------------------------------------
+# SYNTHETIC DATA
+# --------------------------------------------------------------------
+
+def generate_queue(size, seed=42, due_fraction=0.01, days=90):
+    """Build a queue of `size` posts spread over the next `days` days.
+
+    `due_fraction` of the posts are scheduled in the past so the
+    scheduler scan has work to dispatch.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    queue = []
+    for i in range(size):
+        if rng.random() < due_fraction:
+            scheduled = now - timedelta(minutes=rng.randint(1, 600))
+        else:
+            scheduled = now + timedelta(minutes=rng.randint(1, days * 24 * 60))
+        post_id = f"{i:08x}"
+        caption = f"Synthetic caption {i} " + "lorem ipsum " * rng.randint(1, 10)
+        hashtags = " ".join(f"#tag{rng.randint(0, 500)}" for _ in range(rng.randint(3, 12)))
+        queue.append({
+            'id': post_id,
+            'media_path': os.path.join(social_rocket.QUEUE_DIR, f"{post_id}.png"),
+            'caption': caption,
+            'hashtags': hashtags,
+            'keywords': "keyword one, keyword two",
+            'full_text': caption + "\n\n" + hashtags,
+            'platforms': rng.sample(social_rocket.ALL_PLATFORMS, rng.randint(1, 4)),
+            'created_at': (now - timedelta(days=1)).isoformat(),
+            'scheduled_time': scheduled.isoformat(),
+        })
+    queue.sort(key=lambda x: x.get('scheduled_time', ''))
+    return queue
+
+
+# --------------------------------------------------------------------
+# TIMING
+# --------------------------------------------------------------------
+
+def time_runs(fn, repeat, setup=None):
+    """Call fn() `repeat` times and return the wall-clock seconds of each run."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def summarize(size, operation, runs, **extra):
+    result = {
+        'size': size,
+        'operation': operation,
+        'runs': [round(r, 6) for r in runs],
+        'min': round(min(runs), 6),
+        'median': round(statistics.median(runs), 6),
+        'mean': round(statistics.mean(runs), 6),
+    }
+    result.update(extra)
+    return result
+
+
+def flush_deletes(app):
+    """Process deleteLater() so widget teardown isn't billed to the next run."""
+    app.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+    app.processEvents()
+
+
+def bench_size(app, window, size, repeat, args):
+    """Run every benchmark for one queue size."""
+    results = []
+    queue = generate_queue(size, seed=args.seed, due_fraction=args.due_fraction)
+    queue_file = os.path.join(social_rocket.QUEUE_DIR, "queue.json")
+
+    window.queue_data = queue
+    window.save_queue_data()
+    results.append(summarize(size, 'save_queue_data', time_runs(window.save_queue_data, repeat),
+                             bytes=os.path.getsize(queue_file)))
+    results.append(summarize(size, 'load_queue_data', time_runs(window.load_queue_data, repeat)))
+
+    # Dispatch only counts due posts; publishing is not part of the scan
+    dispatched = []
+    window.post_scheduled_items = dispatched.extend
+
+    def check_due():
+        window.check_due_posts()
+        app.processEvents()
+
+    def reset_leases():
+        # Each run starts from the unleased queue, as a fresh scheduler tick would
+        dispatched.clear()
+        window.inflight_posts.clear()
+        window.queue_data = queue
+        window.save_queue_data()
+
+    runs = time_runs(check_due, repeat, setup=reset_leases)
+    results.append(summarize(size, 'check_due_posts', runs, due=len(dispatched)))
+
+    results.append(summarize(size, 'ContentCalendar.set_scheduled_dates',
+                             time_runs(lambda: window.calendar.set_scheduled_dates(window.queue_data), repeat)))
+
+    rng = random.Random(args.seed)
+    today = datetime.now().date()
+    dates = [(today + timedelta(days=rng.randint(0, 90))).isoformat() for _ in range(args.lookups)]
+    matches = []
+
+    def lookups():
+        matches.clear()
+        for date_str in dates:
+            matches.append(len(window.posts_for_date(date_str)))
+
+    results.append(summarize(size, 'show_day_posts lookup', time_runs(lookups, repeat),
+                             lookups=len(dates), avg_matches=round(statistics.mean(matches), 2)))
+
+    if args.ui_max and size > args.ui_max:
+        print(f"  skipping refresh_queue_display at {size} (--ui-max {args.ui_max})")
+    else:
+        runs = time_runs(window.refresh_queue_display, args.ui_repeat, setup=lambda: flush_deletes(app))
+        flush_deletes(app)
+        results.append(summarize(size, 'refresh_queue_display', runs))
+
+    # Leave an empty queue behind so the next size starts clean
+    window.queue_data = []
+    window.refresh_queue_display()
+    flush_deletes(app)
+    return results
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        return None
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=social_rocket.BASE_DIR,
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+# --------------------------------------------------------------------
+# COMPARISON
+# --------------------------------------------------------------------
+
+def compare(old_file, new_file, threshold):
+    """Print median ratios new/old and return 1 if any exceed the threshold."""
+    with open(old_file, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_file, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    old_index = {(r['size'], r['operation']): r for r in old['results']}
+    regressions = 0
+    print(f"{'operation':<40} {'size':>8} {'old':>10} {'new':>10} {'ratio':>7}")
+    for r in new['results']:
+        before = old_index.get((r['size'], r['operation']))
+        if not before:
+            continue
+        ratio = r['median'] / before['median'] if before['median'] else float('inf')
+        flag = "  REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressions += 1
+        print(f"{r['operation']:<40} {r['size']:>8} {before['median']:>10.4f} {r['median']:>10.4f} {ratio:>6.2f}x{flag}")
+    return 1 if regressions else 0
+
+
+# --------------------------------------------------------------------
+# MAIN
+# --------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Social Rocket queue operations.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=5, help="runs per operation")
+    parser.add_argument('--ui-repeat', type=int, default=1, help="runs of refresh_queue_display")
+    parser.add_argument('--ui-max', type=int, default=10000,
+                        help="skip refresh_queue_display above this size (0 = never skip)")
+    parser.add_argument('--lookups', type=int, default=30, help="dates per show_day_posts lookup run")
+    parser.add_argument('--due-fraction', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('-o', '--output', default="benchmark_results.json")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help="compare two result files instead of running")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="median ratio flagged as a regression in --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold))
+
+    workdir = tempfile.mkdtemp(prefix="social_rocket_bench_")
+    social_rocket.QUEUE_DIR = os.path.join(workdir, "queue")
+    social_rocket.POSTED_DIR = os.path.join(workdir, "posted")
+    social_rocket.CONFIG_FILE = os.path.join(workdir, "config.json")
+    social_rocket.METRICS_DIR = os.path.join(workdir, "metrics")
+    social_rocket.LOG_DIR = os.path.join(workdir, "logs")
+    social_rocket.TRACE_DIR = os.path.join(workdir, "traces")
+    social_rocket.SESSIONS_DIR = os.path.join(workdir, "sessions")
+    social_rocket.SELECTOR_CACHE_FILE = os.path.join(workdir, "selector_cache.json")
+    social_rocket.LATENCY_FILE = os.path.join(workdir, "latency_history.json")
+    social_rocket.FAILURES_DIR = os.path.join(workdir, "failures")
+
+    app = QApplication(sys.argv[:1])
+    window = social_rocket.SocialRocket()
+    window.refresh_timer.stop()
+    window.metrics_timer.stop()
+    window.log_flush_timer.stop()
+
+    results = []
+    for size in args.sizes:
+        print(f"Benchmarking {size} posts...")
+        size_results = bench_size(app, window, size, args.repeat, args)
+        for r in size_results:
+            print(f"  {r['operation']:<40} median {r['median'] * 1000:10.2f} ms")
+        results.extend(size_results)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'qt': QT_VERSION_STR,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'qpa_platform': os.environ.get("QT_QPA_PLATFORM"),
+            'sizes': args.sizes,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'due_fraction': args.due_fraction,
+            'peak_rss_mb': peak_rss_mb(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
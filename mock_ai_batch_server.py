@@ -0,0 +1,435 @@
+"""
+Local stand-in for the Anthropic Message Batches and OpenAI Batch APIs,
+used to test social_rocket's batch mode (--ai-batch) offline.
+
+Accepts batches, reports them as in progress for --complete-after seconds
+and then serves results in each provider's JSONL shape. Every request is
+answered with generated caption/hashtags/keywords JSON, including
+per-platform variants when the prompt asks for them.
+
+    python mock_ai_batch_server.py --port 8766 --complete-after 5 --fail-rate 0.1
+
+Point social_rocket at it with "anthropic_base_url" / "openai_base_url"
+set to the printed URL in config.json, or run a self-test:
+
+    python mock_ai_batch_server.py --self-test 250 --provider OpenAI
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Minimal valid PNG (1x1 pixel) for self-test creatives
+TINY_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+# --------------------------------------------------------------------
+# SERVER STATE
+# --------------------------------------------------------------------
+
+class MockBatchState:
+    """Behaviour knobs, uploaded files and submitted batches."""
+
+    def __init__(self, complete_after=0.0, fail_rate=0.0, latency_ms=0, seed=None):
+        self.complete_after = complete_after
+        self.fail_rate = fail_rate
+        self.latency_ms = latency_ms
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.files = {}
+        self.batches = {}
+        self.requests = 0
+
+    def settings(self):
+        return {
+            'complete_after': self.complete_after,
+            'fail_rate': self.fail_rate,
+            'latency_ms': self.latency_ms,
+        }
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+    def ended(self, batch):
+        return time.time() - batch['created'] >= self.complete_after
+
+
+def fake_content(prompt, custom_id):
+    """The JSON a model would answer with for `prompt`."""
+    content = {
+        'caption': f"Mock caption for {custom_id} - stop scrolling, this one is worth it!",
+        'hashtags': "#mock #batch #socialrocket #viral",
+        'keywords': "mock keyword one, mock keyword two, batch generated content",
+    }
+    platforms = re.findall(r"^- (\w+): at most \d+ characters", prompt, re.MULTILINE)
+    if platforms:
+        content['variants'] = {p: {'caption': f"{p} take on {custom_id}", 'hashtags': f"#{p.lower()} #mock"}
+                               for p in platforms}
+    return json.dumps(content)
+
+
+def prompt_text(messages):
+    """The text parts of the last user message."""
+    content = messages[-1].get('content', '') if messages else ''
+    if isinstance(content, str):
+        return content
+    return "\n".join(part.get('text', '') for part in content if part.get('type') == 'text')
+
+
+class MockBatchHandler(BaseHTTPRequestHandler):
+    server_version = "MockAIBatch/1.0"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload))
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _authorized(self):
+        if self.headers.get('x-api-key') or self.headers.get('Authorization', '').startswith('Bearer '):
+            return True
+        self._send_json(401, {'error': {'type': 'authentication_error', 'message': 'missing API key'}})
+        return False
+
+    # --- Anthropic -------------------------------------------------
+
+    def _anthropic_batch(self, batch):
+        ended = self.state.ended(batch)
+        counts = {'processing': 0 if ended else len(batch['requests']),
+                  'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+        if ended:
+            for result in batch['results']:
+                counts['succeeded' if result['result']['type'] == 'succeeded' else 'errored'] += 1
+        base = f"http://{self.headers.get('Host')}"
+        return {
+            'id': batch['id'], 'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': counts,
+            'created_at': datetime.fromtimestamp(batch['created']).isoformat(),
+            'results_url': f"{base}/v1/messages/batches/{batch['id']}/results" if ended else None,
+        }
+
+    def _anthropic_result(self, request):
+        custom_id, params = request['custom_id'], request['params']
+        if self.state.roll(self.state.fail_rate):
+            return {'custom_id': custom_id, 'result': {
+                'type': 'errored', 'error': {'type': 'overloaded_error', 'message': 'Overloaded'}}}
+        text = fake_content(prompt_text(params.get('messages', [])), custom_id)
+        return {'custom_id': custom_id, 'result': {'type': 'succeeded', 'message': {
+            'id': f"msg_{uuid.uuid4().hex[:20]}", 'type': 'message', 'role': 'assistant',
+            'model': params.get('model'), 'content': [{'type': 'text', 'text': text}],
+            'stop_reason': 'end_turn',
+            'usage': {'input_tokens': 1500, 'output_tokens': len(text) // 4,
+                      'cache_read_input_tokens': 250, 'cache_creation_input_tokens': 0},
+        }}}
+
+    # --- OpenAI ----------------------------------------------------
+
+    def _openai_batch(self, batch):
+        ended = self.state.ended(batch)
+        failed = sum(1 for line in batch['results'] if line.get('error'))
+        return {
+            'id': batch['id'], 'object': 'batch', 'endpoint': batch['endpoint'],
+            'input_file_id': batch['input_file_id'],
+            'status': 'completed' if ended else 'in_progress',
+            'output_file_id': batch['output_file_id'] if ended else None,
+            'error_file_id': batch['error_file_id'] if ended and failed else None,
+            'request_counts': {'total': len(batch['results']), 'completed': len(batch['results']) - failed,
+                               'failed': failed},
+            'created_at': int(batch['created']),
+        }
+
+    def _openai_result(self, request):
+        custom_id, body = request['custom_id'], request.get('body', {})
+        if self.state.roll(self.state.fail_rate):
+            return {'id': f"batch_req_{uuid.uuid4().hex[:12]}", 'custom_id': custom_id, 'response': None,
+                    'error': {'code': 'server_error', 'message': 'The server had an error'}}
+        text = fake_content(prompt_text(body.get('messages', [])), custom_id)
+        return {'id': f"batch_req_{uuid.uuid4().hex[:12]}", 'custom_id': custom_id, 'error': None, 'response': {
+            'status_code': 200, 'request_id': uuid.uuid4().hex,
+            'body': {'id': f"chatcmpl-{uuid.uuid4().hex[:12]}", 'object': 'chat.completion',
+                     'model': body.get('model'),
+                     'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text},
+                                  'finish_reason': 'stop'}],
+                     'usage': {'prompt_tokens': 1700, 'completion_tokens': len(text) // 4,
+                               'prompt_tokens_details': {'cached_tokens': 256}}},
+        }}
+
+    def _parse_upload(self, body):
+        """The purpose field and file bytes of a multipart /v1/files upload."""
+        headers = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode('utf-8')
+        message = BytesParser(policy=HTTP).parsebytes(headers + body)
+        fields = {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                  for part in message.iter_parts()}
+        return (fields.get('purpose') or b'').decode('utf-8'), fields.get('file') or b''
+
+    def _store_file(self, lines):
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        self.state.files[file_id] = "\n".join(json.dumps(line) for line in lines).encode('utf-8')
+        return file_id
+
+    # --- Routing ---------------------------------------------------
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.state.delay()
+
+        if path == '/__mock/batches':
+            with self.state.lock:
+                self._send_json(200, {'batches': len(self.state.batches), 'requests': self.state.requests,
+                                      'files': len(self.state.files)})
+            return
+        if path == '/__mock/config':
+            self._send_json(200, self.state.settings())
+            return
+        if not self._authorized():
+            return
+
+        match = re.fullmatch(r"/v1/messages/batches/([\w-]+)(/results)?", path)
+        if match:
+            batch = self.state.batches.get(match.group(1))
+            if batch is None or batch['provider'] != 'Anthropic':
+                self._send_json(404, {'error': {'type': 'not_found_error', 'message': 'batch not found'}})
+            elif not match.group(2):
+                self._send_json(200, self._anthropic_batch(batch))
+            elif not self.state.ended(batch):
+                self._send_json(400, {'error': {'type': 'invalid_request_error',
+                                                'message': 'batch is still processing'}})
+            else:
+                self._send(200, "\n".join(json.dumps(r) for r in batch['results']), 'application/binary')
+            return
+
+        match = re.fullmatch(r"/v1/batches/([\w-]+)", path)
+        if match:
+            batch = self.state.batches.get(match.group(1))
+            if batch is None or batch['provider'] != 'OpenAI':
+                self._send_json(404, {'error': {'message': 'No batch found', 'type': 'invalid_request_error'}})
+            else:
+                self._send_json(200, self._openai_batch(batch))
+            return
+
+        match = re.fullmatch(r"/v1/files/([\w-]+)/content", path)
+        if match and match.group(1) in self.state.files:
+            self._send(200, self.state.files[match.group(1)], 'application/octet-stream')
+            return
+        self._send_json(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        self.state.delay()
+
+        if path == '/__mock/config':
+            updates = json.loads(body or b'{}')
+            for key in self.state.settings():
+                if key in updates:
+                    setattr(self.state, key, type(getattr(self.state, key))(updates[key]))
+            self._send_json(200, self.state.settings())
+            return
+        if path == '/__mock/reset':
+            with self.state.lock:
+                self.state.files.clear()
+                self.state.batches.clear()
+                self.state.requests = 0
+            self._send_json(200, {'ok': True})
+            return
+        if not self._authorized():
+            return
+
+        if path == '/v1/messages/batches':
+            requests = json.loads(body or b'{}').get('requests', [])
+            if not requests:
+                self._send_json(400, {'error': {'type': 'invalid_request_error', 'message': 'no requests'}})
+                return
+            batch = {'id': f"msgbatch_{uuid.uuid4().hex[:24]}", 'provider': 'Anthropic', 'created': time.time(),
+                     'requests': requests, 'results': [self._anthropic_result(r) for r in requests]}
+            with self.state.lock:
+                self.state.batches[batch['id']] = batch
+                self.state.requests += len(requests)
+            self._send_json(200, self._anthropic_batch(batch))
+
+        elif path == '/v1/files':
+            purpose, data = self._parse_upload(body)
+            if purpose != 'batch':
+                self._send_json(400, {'error': {'message': f"unsupported purpose {purpose!r}"}})
+                return
+            file_id = f"file-{uuid.uuid4().hex[:24]}"
+            with self.state.lock:
+                self.state.files[file_id] = data
+            self._send_json(200, {'id': file_id, 'object': 'file', 'bytes': len(data), 'purpose': purpose})
+
+        elif path == '/v1/batches':
+            payload = json.loads(body or b'{}')
+            data = self.state.files.get(payload.get('input_file_id'))
+            if data is None:
+                self._send_json(400, {'error': {'message': 'input file not found'}})
+                return
+            requests = [json.loads(line) for line in data.decode('utf-8').splitlines() if line.strip()]
+            results = [self._openai_result(r) for r in requests]
+            with self.state.lock:
+                batch = {'id': f"batch_{uuid.uuid4().hex[:24]}", 'provider': 'OpenAI', 'created': time.time(),
+                         'endpoint': payload.get('endpoint'), 'input_file_id': payload['input_file_id'],
+                         'results': results,
+                         'output_file_id': self._store_file([r for r in results if not r['error']]),
+                         'error_file_id': self._store_file([r for r in results if r['error']])}
+                self.state.batches[batch['id']] = batch
+                self.state.requests += len(requests)
+            self._send_json(200, self._openai_batch(batch))
+
+        else:
+            self._send_json(404, {'error': {'message': 'Not found'}})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_mock_server(port=0, host="127.0.0.1", verbose=False, **state_kwargs):
+    """Start the mock on a daemon thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), MockBatchHandler)
+    server.daemon_threads = True
+    server.state = MockBatchState(**state_kwargs)
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# --------------------------------------------------------------------
+# SELF TEST
+# --------------------------------------------------------------------
+
+def run_self_test(base_url, total, provider, batch_size, platforms=None, poll_interval=0.5):
+    """Generate content for `total` temporary creatives through social_rocket's batch runner."""
+    import social_rocket
+
+    workdir = tempfile.mkdtemp(prefix="social_rocket_batch_")
+    social_rocket.CONFIG_FILE = os.path.join(workdir, "config.json")
+    social_rocket.QUEUE_DIR = os.path.join(workdir, "queue")
+    social_rocket.METRICS_DIR = os.path.join(workdir, "metrics")
+    social_rocket.LOG_DIR = os.path.join(workdir, "logs")
+    social_rocket.TRACE_DIR = os.path.join(workdir, "traces")
+    social_rocket.save_config({
+        'anthropic_key': 'mock-key',
+        'openai_key': 'mock-key',
+        'anthropic_base_url': base_url,
+        'openai_base_url': base_url,
+        'ai_batch_size': batch_size,
+    })
+    media_dir = os.path.join(workdir, "media")
+    os.makedirs(media_dir)
+    paths = []
+    for i in range(total):
+        path = os.path.join(media_dir, f"creative_{i:04d}.png")
+        with open(path, 'wb') as f:
+            f.write(TINY_PNG)
+        paths.append(path)
+
+    started = time.perf_counter()
+    runner = social_rocket.AIBatchRunner()
+    jobs = runner.run(paths, provider, poll_interval=poll_interval, platforms=platforms)
+    elapsed = time.perf_counter() - started
+    # A second run skips stored creatives and only retries the failed ones
+    retry_batches = len(runner.submit(paths, provider))
+
+    stored = runner.store.load()
+    with_variants = sum(1 for entry in stored.values() if entry.get('variants'))
+    snapshot = social_rocket.METRICS.snapshot()
+    return {
+        'total': total,
+        'provider': provider,
+        'batch_size': batch_size,
+        'batches': len(jobs),
+        'stored': len(stored),
+        'with_variants': with_variants,
+        'failed': sum(job.get('failed', 0) for job in jobs),
+        'retry_batches': retry_batches,
+        'elapsed_s': round(elapsed, 3),
+        'cost_usd': round(sum(entry.get('cost_usd') or 0 for entry in stored.values()), 6),
+        'counters': [c for c in snapshot['counters'] if c['name'].startswith('ai_batch')],
+        'workdir': workdir,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Anthropic and OpenAI batch APIs.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--complete-after', type=float, default=0.0,
+                        help="seconds a batch stays in progress before its results are ready")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of requests that error")
+    parser.add_argument('--latency-ms', type=int, default=0, help="delay added to every API call")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    parser.add_argument('--self-test', type=int, default=0, metavar='N',
+                        help="run N temporary creatives through the batch runner against this server, then exit")
+    parser.add_argument('--provider', choices=('Anthropic', 'OpenAI'), default='Anthropic')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--platforms', nargs='+', default=None, help="request variants for these platforms")
+    parser.add_argument('-o', '--output', default=None, help="write --self-test summary JSON here")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(
+        port=0 if args.self_test else args.port,
+        host=args.host,
+        verbose=args.verbose,
+        complete_after=args.complete_after,
+        fail_rate=args.fail_rate,
+        latency_ms=args.latency_ms,
+        seed=args.seed,
+    )
+
+    if args.self_test:
+        summary = run_self_test(base_url, args.self_test, args.provider, args.batch_size, args.platforms)
+        summary['server'] = server.state.settings()
+        summary['server_requests'] = server.state.requests
+        output = json.dumps(summary, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(output)
+        print(output)
+        server.shutdown()
+        return
+
+    print(f"Mock AI batch API listening on {base_url} "
+          f"(set \"anthropic_base_url\" / \"openai_base_url\": \"{base_url}\" in config.json)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
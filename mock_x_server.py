@@ -0,0 +1,451 @@
+"""
+Local stand-in for X (x.com) used to test and benchmark post_to_x offline.
+
+Reproduces the login flow and the composer DOM with the selectors the
+adapter relies on (input[name="text"], input[name="password"],
+SideNav_NewPost_Button, tweetTextarea_0, input[type="file"],
+tweetButtonInline) and answers a CreateTweet call with X's response shape.
+
+    python mock_x_server.py --port 8765 --latency-ms 200 --fail-rate 0.1
+
+Point the adapter at it with "x_base_url": "http://127.0.0.1:8765" in
+config.json, or drive a load test directly:
+
+    python mock_x_server.py --load-test 50 --concurrency 4 --accounts 4
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+CREATE_TWEET_PATH = "/i/api/graphql/mock/CreateTweet"
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Log in to X / X</title></head>
+<body>
+<main>
+  <h1>Sign in to X</h1>
+  <div id="step-username">
+    <input name="text" autocomplete="username" type="text" placeholder="Phone, email, or username">
+  </div>
+  <div id="step-password"></div>
+  <div id="error" role="alert"></div>
+</main>
+<script>
+const username = document.querySelector('input[name="text"]');
+username.addEventListener('keydown', (e) => {
+  if (e.key !== 'Enter') return;
+  document.getElementById('step-username').style.display = 'none';
+  const pw = document.createElement('input');
+  pw.name = 'password';
+  pw.type = 'password';
+  pw.autocomplete = 'current-password';
+  pw.addEventListener('keydown', async (ev) => {
+    if (ev.key !== 'Enter') return;
+    const r = await fetch('/i/api/mock/login', {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json'},
+      body: JSON.stringify({username: username.value, password: pw.value})
+    });
+    if (r.ok) {
+      window.location.href = '/home';
+    } else {
+      document.getElementById('error').textContent = 'Wrong password!';
+    }
+  });
+  document.getElementById('step-password').appendChild(pw);
+  pw.focus();
+});
+</script>
+</body></html>
+"""
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><title>Home / X</title></head>
+<body>
+<nav>
+  <a href="/compose/post" aria-label="Post" data-testid="SideNav_NewPost_Button" role="link">Post</a>
+</nav>
+<main>
+  <div data-testid="primaryColumn">
+    <div id="composer">
+      <div aria-label="Post text" data-testid="tweetTextarea_0" contenteditable="true" role="textbox"></div>
+      <input type="file" data-testid="fileInput" accept="image/*,video/*" multiple style="display:none">
+      <div data-testid="attachments"></div>
+      <div data-testid="tweetButtonInline" role="button" tabindex="0" aria-disabled="false">Post</div>
+    </div>
+  </div>
+</main>
+<div id="layers"></div>
+<script>
+const textarea = document.querySelector('[data-testid="tweetTextarea_0"]');
+const fileInput = document.querySelector('input[type="file"]');
+const attachments = document.querySelector('[data-testid="attachments"]');
+const button = document.querySelector('[data-testid="tweetButtonInline"]');
+let mediaIds = [];
+let uploading = 0;
+
+document.querySelector('[data-testid="SideNav_NewPost_Button"]').addEventListener('click', (e) => {
+  e.preventDefault();
+  textarea.focus();
+});
+
+fileInput.addEventListener('change', async () => {
+  for (const file of fileInput.files) {
+    uploading += 1;
+    button.setAttribute('aria-disabled', 'true');
+    const item = document.createElement('div');
+    item.setAttribute('data-testid', 'attachmentProgress');
+    item.setAttribute('role', 'progressbar');
+    item.textContent = 'Uploading ' + file.name;
+    attachments.appendChild(item);
+    const r = await fetch('/i/api/mock/upload', {method: 'POST', body: file});
+    const data = await r.json();
+    uploading -= 1;
+    if (r.ok) {
+      mediaIds.push(data.media_id_string);
+      item.setAttribute('data-testid', 'attachmentComplete');
+      item.removeAttribute('role');
+      item.textContent = file.name;
+    } else {
+      item.setAttribute('data-testid', 'attachmentError');
+      item.textContent = 'Upload failed';
+    }
+    if (uploading === 0) button.setAttribute('aria-disabled', 'false');
+  }
+});
+
+button.addEventListener('click', async () => {
+  if (button.getAttribute('aria-disabled') === 'true') return;
+  const r = await fetch('CREATE_TWEET_PATH', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({variables: {tweet_text: textarea.innerText, media: {media_entities: mediaIds.map(id => ({media_id: id}))}}})
+  });
+  const toast = document.createElement('div');
+  toast.setAttribute('data-testid', 'toast');
+  toast.setAttribute('role', 'alert');
+  if (r.ok) {
+    toast.textContent = 'Your post was sent.';
+    textarea.innerText = '';
+    attachments.innerHTML = '';
+    mediaIds = [];
+  } else {
+    toast.textContent = 'Something went wrong, but don\\u2019t fret \\u2014 let\\u2019s give it another shot.';
+  }
+  document.getElementById('layers').appendChild(toast);
+});
+</script>
+</body></html>
+""".replace("CREATE_TWEET_PATH", CREATE_TWEET_PATH)
+
+
+# --------------------------------------------------------------------
+# SERVER STATE
+# --------------------------------------------------------------------
+
+class MockXState:
+    """Behaviour knobs and everything the server has received."""
+
+    def __init__(self, username="", password="", latency_ms=0, jitter_ms=0,
+                 fail_rate=0.0, login_fail_rate=0.0, upload_ms_per_mb=200, seed=None):
+        self.username = username
+        self.password = password
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.login_fail_rate = login_fail_rate
+        self.upload_ms_per_mb = upload_ms_per_mb
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sessions = set()
+        self.posts = []
+        self.uploads = 0
+        self.failures = 0
+
+    def settings(self):
+        return {
+            'latency_ms': self.latency_ms,
+            'jitter_ms': self.jitter_ms,
+            'fail_rate': self.fail_rate,
+            'login_fail_rate': self.login_fail_rate,
+            'upload_ms_per_mb': self.upload_ms_per_mb,
+        }
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def delay(self):
+        extra = self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0
+        if self.latency_ms or extra:
+            time.sleep((self.latency_ms + extra) / 1000.0)
+
+
+class MockXHandler(BaseHTTPRequestHandler):
+    server_version = "MockX/1.0"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _session(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        token = cookie.get('auth_token')
+        return token.value if token and token.value in self.state.sessions else None
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload), 'application/json', headers)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0) or 0)
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        self.state.delay()
+
+        if path in ('/', '/login', '/i/flow/login'):
+            self._send(200, LOGIN_PAGE)
+        elif path in ('/home', '/compose/post'):
+            if not self._session():
+                self._send(302, '', headers={'Location': '/login'})
+            else:
+                self._send(200, HOME_PAGE)
+        elif path == '/__mock/posts':
+            with self.state.lock:
+                self._send_json(200, {'posts': list(self.state.posts), 'uploads': self.state.uploads,
+                                      'failures': self.state.failures})
+        elif path == '/__mock/config':
+            self._send_json(200, self.state.settings())
+        else:
+            self._send(404, 'Not found')
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._read_body()
+        self.state.delay()
+
+        if path == '/i/api/mock/login':
+            creds = json.loads(body or b'{}')
+            wrong = (self.state.username and creds.get('username') != self.state.username) or \
+                    (self.state.password and creds.get('password') != self.state.password)
+            if wrong or self.state.roll(self.state.login_fail_rate):
+                self._send_json(403, {'errors': [{'message': 'Wrong password!'}]})
+                return
+            token = uuid.uuid4().hex
+            with self.state.lock:
+                self.state.sessions.add(token)
+            self._send_json(200, {'ok': True}, headers={'Set-Cookie': f'auth_token={token}; Path=/'})
+
+        elif path == '/i/api/mock/upload':
+            if not self._session():
+                self._send_json(401, {'errors': [{'message': 'Unauthorized'}]})
+                return
+            time.sleep(len(body) / (1024 * 1024) * self.state.upload_ms_per_mb / 1000.0)
+            with self.state.lock:
+                self.state.uploads += 1
+            self._send_json(200, {'media_id_string': str(random.getrandbits(63))})
+
+        elif path == CREATE_TWEET_PATH:
+            if not self._session():
+                self._send_json(401, {'errors': [{'message': 'Unauthorized'}]})
+                return
+            if self.state.roll(self.state.fail_rate):
+                with self.state.lock:
+                    self.state.failures += 1
+                self._send_json(500, {'errors': [{'message': 'Internal error', 'code': 131}]})
+                return
+            payload = json.loads(body or b'{}').get('variables', {})
+            rest_id = str(random.getrandbits(63))
+            media = [m.get('media_id') for m in payload.get('media', {}).get('media_entities', [])]
+            with self.state.lock:
+                self.state.posts.append({
+                    'id': rest_id,
+                    'text': payload.get('tweet_text', ''),
+                    'media_ids': media,
+                    'created_at': datetime.now().isoformat(),
+                })
+            self._send_json(200, {'data': {'create_tweet': {'tweet_results': {'result': {
+                'rest_id': rest_id,
+                'legacy': {'full_text': payload.get('tweet_text', '')},
+            }}}}})
+
+        elif path == '/__mock/config':
+            updates = json.loads(body or b'{}')
+            for key in self.state.settings():
+                if key in updates:
+                    setattr(self.state, key, type(getattr(self.state, key))(updates[key]))
+            self._send_json(200, self.state.settings())
+
+        elif path == '/__mock/reset':
+            with self.state.lock:
+                self.state.posts.clear()
+                self.state.sessions.clear()
+                self.state.uploads = 0
+                self.state.failures = 0
+            self._send_json(200, {'ok': True})
+
+        else:
+            self._send(404, 'Not found')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def start_mock_server(port=0, host="127.0.0.1", verbose=False, **state_kwargs):
+    """Start the mock on a daemon thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), MockXHandler)
+    server.daemon_threads = True
+    server.state = MockXState(**state_kwargs)
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# --------------------------------------------------------------------
+# LOAD TEST
+# --------------------------------------------------------------------
+
+def run_load_test(base_url, total, concurrency, image_path=None, accounts=1):
+    """Post `total` times through social_rocket's asyncio posting engine against the mock.
+
+    Posts are spread round-robin over `accounts` X accounts; posts for one
+    account run one at a time, so concurrency only pays off across accounts.
+    """
+    import asyncio
+    import social_rocket
+
+    workdir = tempfile.mkdtemp(prefix="social_rocket_mock_")
+    social_rocket.CONFIG_FILE = os.path.join(workdir, "config.json")
+    social_rocket.METRICS_DIR = os.path.join(workdir, "metrics")
+    social_rocket.LOG_DIR = os.path.join(workdir, "logs")
+    social_rocket.TRACE_DIR = os.path.join(workdir, "traces")
+    social_rocket.SESSIONS_DIR = os.path.join(workdir, "sessions")
+    social_rocket.SELECTOR_CACHE_FILE = os.path.join(workdir, "selector_cache.json")
+    social_rocket.LATENCY_FILE = os.path.join(workdir, "latency_history.json")
+    social_rocket.FAILURES_DIR = os.path.join(workdir, "failures")
+    social_rocket.save_config({
+        'x_username': 'mock-user',
+        'x_password': 'mock-password',
+        'x_base_url': base_url,
+        'accounts': {'X': {f"load{n}": {'x_username': f"mock-user-{n}", 'x_password': 'mock-password'}
+                           for n in range(1, accounts)}},
+    })
+    names = [social_rocket.DEFAULT_ACCOUNT] + [f"load{n}" for n in range(1, accounts)]
+
+    async def run_all():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with limit:
+                start = time.perf_counter()
+                ok, info = await social_rocket.post_to_x_async(
+                    f"Load test post {i} at {datetime.now().isoformat()}", image_path, names[i % len(names)]
+                )
+                return ok, info, time.perf_counter() - start
+
+        return await asyncio.gather(*(one(i) for i in range(total)))
+
+    started = time.perf_counter()
+    try:
+        results = social_rocket.BROWSER_POOL.call(run_all())
+    finally:
+        social_rocket.BROWSER_POOL.close()
+    elapsed = time.perf_counter() - started
+
+    durations = sorted(r[2] for r in results)
+    failures = [r[1] for r in results if not r[0]]
+    summary = {
+        'total': total,
+        'concurrency': concurrency,
+        'accounts': accounts,
+        'succeeded': total - len(failures),
+        'failed': len(failures),
+        'elapsed_s': round(elapsed, 3),
+        'posts_per_s': round(total / elapsed, 3) if elapsed else None,
+        'p50_s': round(durations[len(durations) // 2], 3) if durations else None,
+        'p99_s': round(durations[min(len(durations) - 1, int(len(durations) * 0.99))], 3) if durations else None,
+        'errors': sorted(set(failures))[:10],
+        'metrics': social_rocket.METRICS.snapshot()['histograms'],
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of X for offline posting tests.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--username', default="", help="require this username (any if empty)")
+    parser.add_argument('--password', default="", help="require this password (any if empty)")
+    parser.add_argument('--latency-ms', type=int, default=0, help="delay added to every request")
+    parser.add_argument('--jitter-ms', type=int, default=0, help="extra random delay up to this value")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="fraction of CreateTweet calls that fail")
+    parser.add_argument('--login-fail-rate', type=float, default=0.0, help="fraction of logins rejected")
+    parser.add_argument('--upload-ms-per-mb', type=int, default=200, help="simulated upload speed")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    parser.add_argument('--load-test', type=int, default=0, metavar='N',
+                        help="post N times through post_to_x against this server, then exit")
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--accounts', type=int, default=1, help="X accounts to spread --load-test posts over")
+    parser.add_argument('--image', default=None, help="media file to attach during --load-test")
+    parser.add_argument('-o', '--output', default=None, help="write --load-test summary JSON here")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(
+        port=0 if args.load_test else args.port,
+        host=args.host,
+        verbose=args.verbose,
+        username=args.username,
+        password=args.password,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        fail_rate=args.fail_rate,
+        login_fail_rate=args.login_fail_rate,
+        upload_ms_per_mb=args.upload_ms_per_mb,
+        seed=args.seed,
+    )
+
+    if args.load_test:
+        summary = run_load_test(base_url, args.load_test, args.concurrency, args.image, args.accounts)
+        summary['server'] = server.state.settings()
+        summary['server_posts'] = len(server.state.posts)
+        output = json.dumps(summary, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(output)
+        print(output)
+        server.shutdown()
+        return
+
+    print(f"Mock X listening on {base_url} (set \"x_base_url\": \"{base_url}\" in config.json)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
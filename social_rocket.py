@@ -8,20 +8,39 @@ import base64
 import uuid
 import random
 import shutil
+import glob
+import logging
+import logging.handlers
+import zlib
+import queue
+import socket
+import argparse
+import asyncio
+import contextvars
+import signal
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import urlparse
+from urllib.request import Request, urlopen
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QPlainTextEdit, QLineEdit, QTextEdit,
     QCheckBox, QStatusBar, QDialog, QFormLayout, QScrollArea,
     QFrame, QSizePolicy, QMessageBox, QTabWidget, QGroupBox, QComboBox,
-    QCalendarWidget, QDateTimeEdit, QGridLayout, QSpinBox, QFileDialog
+    QCalendarWidget, QDateTimeEdit, QGridLayout, QSpinBox, QFileDialog, QListWidget,
+    QListWidgetItem
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QMimeData, QDate, QDateTime, QTime
-from PyQt6.QtGui import QPixmap, QDragEnterEvent, QDropEvent, QImage, QTextCharFormat, QColor, QBrush, QIcon
+from PyQt6.QtGui import QPixmap, QDragEnterEvent, QDropEvent, QImage, QTextCharFormat, QColor, QBrush, QIcon, QTextCursor
 
 import schedule
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
 try:
     import anthropic
@@ -47,6 +66,12 @@ try:
 except ImportError:
     PIL_AVAILABLE = False
 
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 # --------------------------------------------------------------------
 # CONFIG
 # --------------------------------------------------------------------
@@ -57,6 +82,13 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 QUEUE_DIR = os.path.join(BASE_DIR, "queue")
 POSTED_DIR = os.path.join(BASE_DIR, "posted")
 CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
+METRICS_DIR = os.path.join(BASE_DIR, "metrics")
+LOG_DIR = os.path.join(BASE_DIR, "logs")
+TRACE_DIR = os.path.join(BASE_DIR, "traces")
+SESSIONS_DIR = os.path.join(BASE_DIR, "sessions")
+SELECTOR_CACHE_FILE = os.path.join(BASE_DIR, "selector_cache.json")
+LATENCY_FILE = os.path.join(BASE_DIR, "latency_history.json")
+FAILURES_DIR = os.path.join(BASE_DIR, "failures")
 
 # Times to post (24h format)
 POST_TIMES = ["07:00", "12:00", "17:00"]
@@ -76,6 +108,18 @@ DEFAULT_BEST_TIMES = {
 # All supported platforms
 ALL_PLATFORMS = ['X', 'Threads', 'LinkedIn', 'Reddit', 'Facebook', 'Instagram', 'TikTok', 'Quora']
 
+# Longest post text (caption plus hashtags) each platform accepts, in characters
+PLATFORM_TEXT_LIMITS = {
+    'X': 280,
+    'Threads': 500,
+    'LinkedIn': 3000,
+    'Reddit': 40000,
+    'Facebook': 63206,
+    'Instagram': 2200,
+    'TikTok': 2200,
+    'Quora': 10000,
+}
+
 # Platform colors (brand colors)
 PLATFORM_COLORS = {
     'X': '#000000',           # Black
@@ -97,6 +141,7 @@ MEDIA_EXTENSIONS = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS + WEB_EXTENSIONS
 # --- CREDENTIALS / PER-PLATFORM SETTINGS ---
 X_USERNAME_OR_EMAIL = ""
 X_PASSWORD = ""
+X_BASE_URL = "https://x.com"  # override with "x_base_url" in config.json (e.g. mock_x_server.py)
 
 REDDIT_USERNAME = ""
 REDDIT_PASSWORD = ""
@@ -134,10 +179,1272 @@ def save_config(config):
         json.dump(config, f, indent=2)
 
 
+# --------------------------------------------------------------------
+# ACCOUNTS
+# --------------------------------------------------------------------
+
+DEFAULT_ACCOUNT = "default"
+
+# Config keys holding each platform's credentials: (login, password, extra)
+PLATFORM_CREDENTIAL_KEYS = {
+    'X': ('x_username', 'x_password', None),
+    'Threads': ('threads_username', 'threads_password', None),
+    'LinkedIn': ('linkedin_email', 'linkedin_password', None),
+    'Reddit': ('reddit_username', 'reddit_password', 'reddit_subreddit'),
+    'Facebook': ('facebook_email', 'facebook_password', 'facebook_url'),
+    'Instagram': ('instagram_username', 'instagram_password', None),
+    'TikTok': ('tiktok_username', 'tiktok_password', None),
+    'Quora': ('quora_email', 'quora_password', None),
+}
+
+
+def get_account(platform, account=None, config=None):
+    """Return the credential dict for (platform, account).
+
+    The "default" account is read from the top-level keys in config.json
+    (x_username, x_password, ...); named accounts live under
+    config['accounts'][platform][name] using the same keys.
+    """
+    config = config if config is not None else load_config()
+    account = account or DEFAULT_ACCOUNT
+    named = config.get('accounts', {}).get(platform, {})
+    if account in named:
+        return dict(named[account])
+    if account == DEFAULT_ACCOUNT:
+        return {k: config.get(k, '') for k in PLATFORM_CREDENTIAL_KEYS.get(platform, ()) if k}
+    return {}
+
+
+def list_accounts(platform=None, config=None):
+    """Account names for one platform, or across all platforms; "default" first."""
+    config = config if config is not None else load_config()
+    accounts = config.get('accounts', {})
+    platforms = [platform] if platform else list(accounts)
+    names = {name for p in platforms for name in accounts.get(p, {})}
+    names.discard(DEFAULT_ACCOUNT)
+    return [DEFAULT_ACCOUNT] + sorted(names)
+
+
+def post_account(post, platform):
+    """Account a queued post targets on `platform`."""
+    return post.get('accounts', {}).get(platform) or DEFAULT_ACCOUNT
+
+
+def post_text(post, platform):
+    """Text a queued post sends to `platform`: its tailored variant if it has one, else full_text."""
+    return (post.get('variants') or {}).get(platform) or post.get('full_text', '')
+
+
+def fit_post_text(caption, hashtags, limit=None):
+    """Join caption and hashtags like the editor does, trimmed to `limit` characters.
+
+    Whole hashtags are dropped from the end first; only then is the
+    caption cut, at a word boundary with an ellipsis.
+    """
+    caption, tags = caption.strip(), hashtags.split()
+    while True:
+        text = caption + ("\n\n" + " ".join(tags) if tags else "")
+        if not limit or len(text) <= limit or not tags:
+            break
+        tags.pop()
+    if limit and len(text) > limit:
+        text = caption[:limit - 1].rsplit(' ', 1)[0].rstrip() + "…"
+    return text
+
+
+# --------------------------------------------------------------------
+# LOGGING
+# --------------------------------------------------------------------
+
+log = logging.getLogger("social_rocket")
+
+# Attributes every LogRecord has; anything else was passed via extra= and is context
+_STANDARD_LOG_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def log_context(record):
+    """Return the extra= context fields (post_id, platform, ...) of a record."""
+    return {k: v for k, v in vars(record).items() if k not in _STANDARD_LOG_ATTRS}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg plus any context fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        entry.update(log_context(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LogRingBuffer(logging.Handler):
+    """Bounded in-memory buffer feeding the UI log pane.
+
+    Records are formatted on arrival; the UI drains pending lines in
+    batches from a timer instead of touching the widget per record.
+    """
+
+    def __init__(self, capacity=1000, level=logging.INFO):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+        self._pending = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.lock:
+            self.records.append(record)
+            self._pending.append(line)
+
+    def drain(self):
+        """Return and clear the lines not yet shown."""
+        with self.lock:
+            lines = list(self._pending)
+            self._pending.clear()
+        return lines
+
+
+def setup_logging(verbose=None, name="social_rocket", max_bytes=5 * 1024 * 1024, backup_count=5):
+    """Configure JSON-lines file logging (rotating) and console output.
+
+    Verbose (DEBUG) output is off unless `verbose_logging` is set in
+    config.json or SOCIAL_ROCKET_VERBOSE=1. Safe to call more than once.
+    """
+    if verbose is None:
+        verbose = bool(load_config().get('verbose_logging')) or os.environ.get('SOCIAL_ROCKET_VERBOSE') == '1'
+    level = logging.DEBUG if verbose else logging.INFO
+    log.setLevel(level)
+    log.propagate = False
+
+    if not any(getattr(h, '_social_rocket', False) for h in log.handlers):
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                os.path.join(LOG_DIR, f"{name}.jsonl"), maxBytes=max_bytes,
+                backupCount=backup_count, encoding='utf-8'
+            )
+            file_handler.setFormatter(JsonLineFormatter())
+            file_handler._social_rocket = True
+            log.addHandler(file_handler)
+        except OSError as e:
+            sys.stderr.write(f"Could not open log file in {LOG_DIR}: {e}\n")
+
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        console._social_rocket = True
+        log.addHandler(console)
+
+    for handler in log.handlers:
+        if getattr(handler, '_social_rocket', False) and isinstance(handler, logging.StreamHandler) \
+                and not isinstance(handler, logging.FileHandler):
+            handler.setLevel(logging.DEBUG if verbose else logging.WARNING)
+    return log
+
+
+def search_logs(post_id=None, platform=None, level=None, text=None, limit=500):
+    """Search the JSON-lines logs (including rotated files), oldest first."""
+    paths = sorted(glob.glob(os.path.join(LOG_DIR, "*.jsonl*")), key=os.path.getmtime)
+    min_level = logging.getLevelName(level) if isinstance(level, str) else level
+    matches = deque(maxlen=limit)
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if post_id is not None and entry.get('post_id') != post_id:
+                        continue
+                    if platform is not None and entry.get('platform') != platform:
+                        continue
+                    if min_level is not None and logging.getLevelName(entry.get('level', 'INFO')) < min_level:
+                        continue
+                    if text and text.lower() not in entry.get('msg', '').lower():
+                        continue
+                    matches.append(entry)
+        except OSError:
+            continue
+    return sorted(matches, key=lambda e: e.get('ts', ''))
+
+
+def run_search_logs(argv=None):
+    """Command-line entry point for search_logs; prints the matching entries as JSON lines."""
+    parser = argparse.ArgumentParser(description="Search the Social Rocket JSON logs")
+    parser.add_argument('--search-logs', action='store_true')
+    parser.add_argument('--post-id', default=None)
+    parser.add_argument('--platform', choices=ALL_PLATFORMS, default=None)
+    parser.add_argument('--level', default=None, type=str.upper,
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'], help="minimum level")
+    parser.add_argument('--text', default=None, help="case-insensitive text in the message")
+    parser.add_argument('--limit', type=int, default=500, help="newest matches to show")
+    args = parser.parse_args(argv)
+
+    for entry in search_logs(args.post_id, args.platform, args.level, args.text, args.limit):
+        print(json.dumps(entry, ensure_ascii=False))
+
+
+# --------------------------------------------------------------------
+# METRICS
+# --------------------------------------------------------------------
+
+# Histogram bucket upper bounds (seconds)
+METRIC_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and latency histograms for the hot paths.
+
+    Exported as Prometheus text (file or local HTTP) and as a JSON snapshot
+    with p50/p90/p99 computed over the most recent samples.
+    """
+
+    def __init__(self, prefix="social_rocket", buckets=METRIC_BUCKETS, sample_size=1024):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._counters = {}    # {(name, labels): value}
+        self._gauges = {}      # {(name, labels): value}
+        self._histograms = {}  # {(name, labels): {'counts', 'sum', 'count', 'samples'}}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Increment a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Set a gauge to its current value."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration into a histogram."""
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = {
+                    'counts': [0] * len(self.buckets),
+                    'sum': 0.0,
+                    'count': 0,
+                    'samples': deque(maxlen=self.sample_size),
+                }
+                self._histograms[key] = hist
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    hist['counts'][i] += 1
+            hist['sum'] += seconds
+            hist['count'] += 1
+            hist['samples'].append(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the wrapped block into histogram `name` (recorded on error too)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _quantile(sorted_samples, q):
+        if not sorted_samples:
+            return None
+        index = min(len(sorted_samples) - 1, int(round(q * (len(sorted_samples) - 1))))
+        return sorted_samples[index]
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serialisable dict."""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            gauges = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._gauges.items())
+            ]
+            histograms = []
+            for (name, labels), hist in sorted(self._histograms.items(), key=lambda item: item[0]):
+                samples = sorted(hist['samples'])
+                histograms.append({
+                    'name': name,
+                    'labels': dict(labels),
+                    'count': hist['count'],
+                    'sum': round(hist['sum'], 6),
+                    'p50': self._quantile(samples, 0.50),
+                    'p90': self._quantile(samples, 0.90),
+                    'p99': self._quantile(samples, 0.99),
+                    'max': samples[-1] if samples else None,
+                })
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'pid': os.getpid(),
+            'counters': counters,
+            'gauges': gauges,
+            'histograms': histograms,
+        }
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        def fmt_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (
+                '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                for k, v in pairs
+            )
+            return "{" + ",".join(escaped) + "}"
+
+        lines = []
+        with self._lock:
+            seen = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} counter")
+                    seen.add(metric)
+                lines.append(f"{metric}{fmt_labels(labels)} {value}")
+
+            for (name, labels), value in sorted(self._gauges.items()):
+                metric = f"{self.prefix}_{name}"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} gauge")
+                    seen.add(metric)
+                lines.append(f"{metric}{fmt_labels(labels)} {value}")
+
+            for (name, labels), hist in sorted(self._histograms.items(), key=lambda item: item[0]):
+                metric = f"{self.prefix}_{name}"
+                if metric not in seen:
+                    lines.append(f"# TYPE {metric} histogram")
+                    seen.add(metric)
+                for bound, count in zip(self.buckets, hist['counts']):
+                    lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', bound)])} {count}")
+                lines.append(f"{metric}_bucket{fmt_labels(labels, [('le', '+Inf')])} {hist['count']}")
+                lines.append(f"{metric}_sum{fmt_labels(labels)} {hist['sum']:.6f}")
+                lines.append(f"{metric}_count{fmt_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_files(self, directory=None, name="social_rocket"):
+        """Write <name>.prom and <name>.json atomically into the metrics directory."""
+        directory = directory or METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        for ext, content in (('prom', self.to_prometheus()),
+                             ('json', json.dumps(self.snapshot(), indent=2))):
+            path = os.path.join(directory, f"{name}.{ext}")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+
+METRICS = MetricsRegistry()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves /metrics (Prometheus text), /metrics.json, /selectors.json and /providers.json."""
+
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body = json.dumps(METRICS.snapshot(), indent=2).encode('utf-8')
+            content_type = 'application/json'
+        elif self.path.startswith('/selectors.json'):
+            body = json.dumps(SELECTORS.stats(), indent=2).encode('utf-8')
+            content_type = 'application/json'
+        elif self.path.startswith('/providers.json'):
+            body = json.dumps({'health': AI_HEALTH.stats(), 'policy': AI_POLICY.stats()}, indent=2).encode('utf-8')
+            content_type = 'application/json'
+        elif self.path.startswith('/metrics'):
+            body = METRICS.to_prometheus().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve metrics on a local port from a daemon thread. Returns the server."""
+    server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# --------------------------------------------------------------------
+# TRACING
+# --------------------------------------------------------------------
+
+class Tracer:
+    """Lifecycle spans for posts, written in the Chrome trace event format.
+
+    Each correlation id (the queue `id`) gets its own track, so a daily
+    traces/trace-YYYY-MM-DD.json opened in Perfetto or chrome://tracing
+    shows where one post spent its time. Files are appended one event per
+    line and never closed with "]", which the format allows.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # Per thread and per asyncio task, so concurrent posts keep their own ids
+        self._ids = contextvars.ContextVar(f"trace_ids_{id(self)}", default=())
+        self._named_tracks = set()
+
+    @property
+    def current_id(self):
+        """Correlation id of the innermost open span in this thread or task."""
+        ids = self._ids.get()
+        return ids[-1] if ids else None
+
+    def adopt(self, post_id):
+        """Continue `post_id`'s track in work handed to another thread or task."""
+        if post_id:
+            self._ids.set((post_id,))
+
+    @staticmethod
+    def _track(post_id):
+        return zlib.crc32(str(post_id).encode('utf-8')) & 0x7FFFFFFF if post_id else 0
+
+    def _path(self):
+        return os.path.join(TRACE_DIR, f"trace-{datetime.now().strftime('%Y-%m-%d')}.json")
+
+    def _write(self, events):
+        path = self._path()
+        data = "".join(json.dumps(e, default=str) + ",\n" for e in events).encode('utf-8')
+        try:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                if os.fstat(fd).st_size == 0:
+                    data = b"[\n" + data
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            log.debug("Could not write trace events: %s", e)
+
+    def _emit(self, event, post_id):
+        track = self._track(post_id)
+        event.setdefault('pid', os.getpid())
+        event['tid'] = track
+        events = []
+        with self._lock:
+            key = (event['pid'], track)
+            if key not in self._named_tracks:
+                self._named_tracks.add(key)
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': event['pid'], 'tid': track,
+                               'args': {'name': f"post {post_id}" if post_id else "app"}})
+        events.append(event)
+        self._write(events)
+
+    @contextmanager
+    def span(self, name, post_id=None, cat="post", **args):
+        """Record the wrapped block as a complete ("X") event.
+
+        post_id defaults to the enclosing span's id, so nested work such as
+        browser stages lands on the post's track.
+        """
+        if not self.enabled:
+            yield args
+            return
+        post_id = post_id or self.current_id
+        token = self._ids.set(self._ids.get() + (post_id,))
+        start_us = time.time() * 1_000_000
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args.setdefault('error', repr(e))
+            raise
+        finally:
+            self._ids.reset(token)
+            args['post_id'] = post_id
+            self._emit({
+                'name': name, 'cat': cat, 'ph': 'X',
+                'ts': int(start_us), 'dur': int((time.perf_counter() - start) * 1_000_000),
+                'args': args,
+            }, post_id)
+
+    def instant(self, name, post_id=None, cat="post", **args):
+        """Record a point-in-time event on the post's track."""
+        if not self.enabled:
+            return
+        post_id = post_id or self.current_id
+        args['post_id'] = post_id
+        self._emit({
+            'name': name, 'cat': cat, 'ph': 'i', 's': 't',
+            'ts': int(time.time() * 1_000_000), 'args': args,
+        }, post_id)
+
+
+TRACER = Tracer()
+
+
+def load_post_trace(post_id, days=7):
+    """Return a post's trace events from the last `days` trace files, oldest first."""
+    events = []
+    for path in sorted(glob.glob(os.path.join(TRACE_DIR, "trace-*.json")))[-days:]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip().rstrip(',')
+                    if not line.startswith('{'):
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    args = event.get('args', {})
+                    if event.get('ph') != 'M' and (args.get('post_id') == post_id or args.get('draft_id') == post_id):
+                        events.append(event)
+        except OSError:
+            continue
+    return sorted(events, key=lambda e: e.get('ts', 0))
+
+
+def run_trace(argv=None):
+    """Command-line entry point for load_post_trace: a post's timeline, optionally saved for Perfetto."""
+    parser = argparse.ArgumentParser(description="Show one post's trace events")
+    parser.add_argument('--trace', metavar='POST_ID', required=True)
+    parser.add_argument('--days', type=int, default=7, help="daily trace files to search")
+    parser.add_argument('--out', default=None, help="also write the events as a trace file for Perfetto")
+    args = parser.parse_args(argv)
+
+    events = load_post_trace(args.trace, args.days)
+    if not events:
+        print(f"No trace events for post {args.trace}")
+        return
+    start = events[0].get('ts', 0)
+    for event in events:
+        duration = f" {event['dur'] / 1000:.1f} ms" if 'dur' in event else ""
+        details = " ".join(f"{k}={v}" for k, v in event.get('args', {}).items() if k != 'post_id')
+        print(f"+{(event.get('ts', 0) - start) / 1e6:9.3f}s  {event.get('name')}{duration}  {details}".rstrip())
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events}, f, default=str)
+        print(f"Wrote {len(events)} events to {args.out}")
+
+
+# --------------------------------------------------------------------
+# RESOURCE GOVERNOR
+# --------------------------------------------------------------------
+
+def available_memory_mb():
+    """Memory available to new processes in MB (psutil, then /proc/meminfo); None if unknown."""
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.virtual_memory().available / (1024 * 1024)
+        except Exception:
+            pass
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+# Rough cost of one unit of work, used to derive limits from available RAM
+RESOURCE_MEMORY_MB = {'browser': 400, 'ai': 50, 'media': 150}
+
+
+def default_resource_limits(cpus=None, memory_mb=None):
+    """Concurrency limits for this machine: {resource: slots}.
+
+    Browsers are CPU- and memory-heavy, AI requests mostly wait on the
+    network, media work is CPU-bound.
+    """
+    cpus = cpus or os.cpu_count() or 1
+    memory_mb = memory_mb if memory_mb is not None else available_memory_mb()
+    limits = {
+        'browser': max(1, cpus // 2),
+        'ai': max(2, min(8, cpus * 2)),
+        'media': max(1, cpus - 1),
+    }
+    if memory_mb:
+        for resource, cost in RESOURCE_MEMORY_MB.items():
+            limits[resource] = max(1, min(limits[resource], int(memory_mb // cost)))
+    return limits
+
+
+class ResourceGovernor:
+    """Caps concurrent browser sessions, AI requests and media work process-wide.
+
+    Each resource has a fixed number of slots; callers beyond that wait in
+    a first-come, first-served queue, so a burst of due posts or clicks
+    queues up instead of overcommitting the machine. A thread that already
+    holds a slot may re-enter it (a batch that falls back to single posts
+    doesn't deadlock against itself). Limits come from
+    default_resource_limits(), overridable with "resource_limits" in
+    config.json.
+    """
+
+    def __init__(self, limits=None):
+        self._lock = threading.Lock()
+        self._held = threading.local()
+        self._limits = {}
+        self._in_use = {}
+        self._waiters = {}  # {resource: deque of threading.Event}
+        self.configure({'resource_limits': limits or {}})
+
+    def configure(self, config=None):
+        config = config if config is not None else load_config()
+        limits = default_resource_limits()
+        limits.update({k: max(1, int(v)) for k, v in (config.get('resource_limits') or {}).items()})
+        with self._lock:
+            self._limits = limits
+            for resource in limits:
+                self._in_use.setdefault(resource, 0)
+                self._waiters.setdefault(resource, deque())
+                self._wake(resource)
+
+    def acquire(self, resource, timeout=None):
+        """Take a slot of `resource`, waiting in line up to `timeout` seconds; True if taken."""
+        held = self._held_counts()
+        if held.get(resource):
+            held[resource] += 1
+            return True
+        started = time.perf_counter()
+        with self._lock:
+            waiters = self._waiters[resource]
+            if not waiters and self._in_use[resource] < self._limits[resource]:
+                self._in_use[resource] += 1
+                ticket = None
+            else:
+                ticket = threading.Event()
+                waiters.append(ticket)
+                METRICS.set('governor_waiting', len(waiters), resource=resource)
+        if ticket is not None and not ticket.wait(timeout):
+            with self._lock:
+                if not ticket.is_set():
+                    self._waiters[resource].remove(ticket)
+                    METRICS.set('governor_waiting', len(self._waiters[resource]), resource=resource)
+                    METRICS.inc('governor_timeouts_total', resource=resource)
+                    return False
+        # A set ticket means _wake() already counted the slot as ours
+        held[resource] = 1
+        METRICS.observe('governor_wait_seconds', time.perf_counter() - started, resource=resource)
+        METRICS.set('governor_in_use', self._in_use[resource], resource=resource)
+        return True
+
+    def release(self, resource):
+        held = self._held_counts()
+        held[resource] -= 1
+        if held[resource]:
+            return
+        del held[resource]
+        with self._lock:
+            self._in_use[resource] -= 1
+            self._wake(resource)
+            METRICS.set('governor_in_use', self._in_use[resource], resource=resource)
+
+    @contextmanager
+    def slot(self, resource):
+        """Hold one slot of `resource` for the block, waiting for it in turn."""
+        with TRACER.span('governor.wait', cat="governor", resource=resource):
+            self.acquire(resource)
+        try:
+            yield
+        finally:
+            self.release(resource)
+
+    def stats(self):
+        with self._lock:
+            return {resource: {'limit': limit, 'in_use': self._in_use[resource],
+                               'waiting': len(self._waiters[resource])}
+                    for resource, limit in self._limits.items()}
+
+    def _held_counts(self):
+        counts = getattr(self._held, 'counts', None)
+        if counts is None:
+            counts = self._held.counts = {}
+        return counts
+
+    def _wake(self, resource):
+        """Hand free slots to the longest-waiting callers (lock held)."""
+        waiters = self._waiters[resource]
+        while waiters and self._in_use[resource] < self._limits[resource]:
+            self._in_use[resource] += 1
+            waiters.popleft().set()
+        METRICS.set('governor_waiting', len(waiters), resource=resource)
+
+
+GOVERNOR = ResourceGovernor()
+
+
 # --------------------------------------------------------------------
 # AI SERVICE
 # --------------------------------------------------------------------
 
+class ProviderHealth:
+    """Recent error rate and latency per AI provider, with a circuit breaker.
+
+    A provider that fails `failure_threshold` times in a row, or at least
+    `error_rate` of its last `window` requests (once `min_requests` were
+    made), is opened: analyze_media skips it without a request for
+    `cooldown` seconds. After that one probe request is let through
+    (half-open); success closes the circuit, failure opens it again with
+    the cool-down doubled up to `max_cooldown`.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+
+    def __init__(self, failure_threshold=3, error_rate=0.5, window=20, min_requests=5,
+                 cooldown=60, max_cooldown=900):
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.window = window
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._providers = {}
+
+    def configure(self, config=None):
+        config = config if config is not None else load_config()
+        settings = config.get('ai_circuit_breaker') or {}
+        self.failure_threshold = int(settings.get('failure_threshold', self.failure_threshold))
+        self.error_rate = float(settings.get('error_rate', self.error_rate))
+        self.window = int(settings.get('window', self.window))
+        self.min_requests = int(settings.get('min_requests', self.min_requests))
+        self.cooldown = float(settings.get('cooldown_seconds', self.cooldown))
+        self.max_cooldown = float(settings.get('max_cooldown_seconds', self.max_cooldown))
+
+    def _state(self, provider):
+        state = self._providers.get(provider)
+        if state is None:
+            state = self._providers[provider] = {
+                'state': self.CLOSED, 'recent': deque(maxlen=self.window), 'failures': 0,
+                'opened_at': None, 'cooldown': self.cooldown, 'probing': False,
+            }
+        return state
+
+    def allow(self, provider):
+        """Whether to send `provider` a request now; claims the probe when half-open."""
+        with self._lock:
+            state = self._state(provider)
+            if state['state'] == self.CLOSED:
+                return True
+            if state['probing']:
+                return False
+            if state['state'] == self.OPEN and time.monotonic() - state['opened_at'] < state['cooldown']:
+                return False
+            self._transition(provider, state, self.HALF_OPEN)
+            state['probing'] = True
+            return True
+
+    def record(self, provider, ok, seconds):
+        """Record the outcome of one request to `provider`."""
+        with self._lock:
+            state = self._state(provider)
+            state['recent'].append((ok, seconds))
+            state['failures'] = 0 if ok else state['failures'] + 1
+            probe, state['probing'] = state['probing'], False
+            if ok:
+                if state['state'] != self.CLOSED:
+                    state['cooldown'] = self.cooldown
+                    self._transition(provider, state, self.CLOSED)
+                return
+            if probe:
+                state['cooldown'] = min(self.max_cooldown, state['cooldown'] * 2)
+                self._open(provider, state)
+                return
+            errors = sum(1 for good, _ in state['recent'] if not good)
+            if state['failures'] >= self.failure_threshold or (
+                    len(state['recent']) >= self.min_requests
+                    and errors / len(state['recent']) >= self.error_rate):
+                self._open(provider, state)
+
+    def abandon(self, provider):
+        """Give back a probe claimed by allow() whose request was cancelled, without an outcome."""
+        with self._lock:
+            self._state(provider)['probing'] = False
+
+    def stats(self):
+        with self._lock:
+            result = {}
+            for provider, state in sorted(self._providers.items()):
+                recent = list(state['recent'])
+                latencies = sorted(seconds for _, seconds in recent)
+                remaining = None
+                if state['state'] == self.OPEN:
+                    remaining = max(0.0, state['cooldown'] - (time.monotonic() - state['opened_at']))
+                result[provider] = {
+                    'state': state['state'],
+                    'requests': len(recent),
+                    'error_rate': round(sum(1 for ok, _ in recent if not ok) / len(recent), 3) if recent else None,
+                    'p50_seconds': round(latencies[len(latencies) // 2], 3) if latencies else None,
+                    'consecutive_failures': state['failures'],
+                    'reopens_in_seconds': round(remaining, 1) if remaining is not None else None,
+                }
+            return result
+
+    def _open(self, provider, state):
+        state['opened_at'] = time.monotonic()
+        self._transition(provider, state, self.OPEN)
+        log.warning(f"{provider} circuit opened for {state['cooldown']:.0f}s "
+                    f"after {state['failures']} consecutive failures", extra={'provider': provider})
+
+    def _transition(self, provider, state, new_state):
+        if state['state'] != new_state:
+            state['state'] = new_state
+            METRICS.inc('ai_circuit_transitions_total', provider=provider, state=new_state)
+        METRICS.set('ai_provider_open', 1 if new_state == self.OPEN else 0, provider=provider)
+
+
+AI_HEALTH = ProviderHealth()
+
+
+# Config key and SDK availability per provider
+AI_PROVIDER_KEYS = {
+    'Anthropic': ('anthropic_key', ANTHROPIC_AVAILABLE),
+    'OpenAI': ('openai_key', OPENAI_AVAILABLE),
+    'Gemini': ('gemini_key', GEMINI_AVAILABLE),
+}
+
+# Default model per provider; override with "ai_models" in config.json
+AI_MODELS = {
+    'Anthropic': "claude-sonnet-4-5-20250929",
+    'OpenAI': "gpt-4o",
+    'Gemini': "gemini-1.5-flash",
+}
+
+# USD per million (input, output) tokens; override or extend with "ai_pricing"
+AI_PRICING = {
+    "claude-sonnet-4-5-20250929": (3.00, 15.00),
+    "gpt-4o": (2.50, 10.00),
+    "gemini-1.5-flash": (0.075, 0.30),
+}
+
+# Price of cached input relative to normal input per provider: (cache read, cache write)
+AI_CACHE_FACTORS = {
+    'Anthropic': (0.1, 1.25),
+    'OpenAI': (0.5, 1.0),
+    'Gemini': (0.25, 1.0),
+}
+
+# Tokens assumed for one image request until a model's real usage is seen
+AI_PRIOR_TOKENS = (1600, 250)
+
+
+def ai_cost_usd(model, input_tokens, output_tokens, pricing=None, cache_read_tokens=0, cache_write_tokens=0,
+                cache_factors=(1.0, 1.0)):
+    """Cost of one request in USD, or None for a model without a price.
+
+    `input_tokens` are the uncached ones; cache reads and writes are billed
+    at `cache_factors` times the input price.
+    """
+    prices = (pricing or AI_PRICING).get(model)
+    if not prices:
+        return None
+    billed_input = (input_tokens + cache_read_tokens * cache_factors[0]
+                    + cache_write_tokens * cache_factors[1])
+    return (billed_input * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+
+def ai_cache_savings_usd(model, cache_read_tokens, pricing=None, cache_factors=(1.0, 1.0)):
+    """What reading `cache_read_tokens` from the cache saved over sending them uncached, in USD."""
+    prices = (pricing or AI_PRICING).get(model)
+    if not prices:
+        return None
+    return cache_read_tokens * (1 - cache_factors[0]) * prices[0] / 1_000_000
+
+
+class ProviderPolicy:
+    """Orders AI providers by moving averages of latency, failures and cost.
+
+    Every request updates exponentially weighted averages per (provider,
+    model). order() then ranks the candidates for an objective:
+
+    - "primary": the configured primary provider first, then the rest
+    - "fastest": lowest expected time to a successful response
+    - "cheapest": lowest expected cost of a successful response
+    - "best_within_budget": fastest among those expected to cost at most
+      `budget` USD per request, then the rest by cost
+
+    Expectations divide by the success rate, so a provider that fails half
+    the time counts twice as slow and twice as expensive. Providers not
+    yet measured are assumed to be the fastest (an optimistic prior, so
+    each gets tried once); their cost is estimated from AI_PRICING and
+    AI_PRIOR_TOKENS. Averages only move for providers that get requests,
+    so every `explore_every`-th latency ranking also puts the least-used
+    candidate first to give a provider that was slow once another chance.
+    """
+
+    OBJECTIVES = ('primary', 'fastest', 'cheapest', 'best_within_budget')
+
+    def __init__(self, alpha=0.2, explore_every=20):
+        self.alpha = alpha
+        self.explore_every = explore_every
+        self._lock = threading.Lock()
+        self._stats = {}  # {(provider, model): {'latency', 'failure', 'cost', 'requests'}}
+        self._rankings = 0
+
+    def record(self, provider, model, ok, seconds, cost=None):
+        with self._lock:
+            stats = self._stats.get((provider, model))
+            if stats is None:
+                stats = self._stats[(provider, model)] = {
+                    'latency': seconds, 'failure': 0.0 if ok else 1.0, 'cost': cost, 'requests': 0}
+            else:
+                a = self.alpha
+                stats['failure'] = (1 - a) * stats['failure'] + a * (0.0 if ok else 1.0)
+                if ok:
+                    stats['latency'] = (1 - a) * stats['latency'] + a * seconds
+                if cost is not None:
+                    stats['cost'] = cost if stats['cost'] is None else (1 - a) * stats['cost'] + a * cost
+            stats['requests'] += 1
+
+    def expected(self, provider, model, pricing=None):
+        """(seconds, usd) expected per successful request; either may be None if unknown."""
+        with self._lock:
+            stats = dict(self._stats.get((provider, model)) or {})
+        success = max(0.05, 1.0 - stats.get('failure', 0.0))
+        latency = stats['latency'] / success if 'latency' in stats else None
+        cost = stats.get('cost')
+        if cost is None:
+            cost = ai_cost_usd(model, *AI_PRIOR_TOKENS, pricing=pricing)
+        return latency, (cost / success if cost is not None else None)
+
+    def order(self, providers, models, objective="primary", budget=None, pricing=None):
+        """Rank `providers` (in configured order) for `objective`."""
+        if objective not in self.OBJECTIVES or objective == 'primary':
+            return list(providers)
+        rank = {p: n for n, p in enumerate(providers)}
+        expected = {p: self.expected(p, models.get(p), pricing) for p in providers}
+
+        def by_latency(p):
+            latency = expected[p][0]
+            return (latency or 0.0, rank[p])
+
+        def by_cost(p):
+            cost = expected[p][1]
+            return (cost is None, cost or 0.0, rank[p])
+
+        if objective == 'fastest':
+            return self._explore(sorted(providers, key=by_latency), models)
+        if objective == 'cheapest':
+            return sorted(providers, key=by_cost)
+        within = [p for p in providers if budget is None or
+                  (expected[p][1] is not None and expected[p][1] <= budget)]
+        return (self._explore(sorted(within, key=by_latency), models)
+                + sorted((p for p in providers if p not in within), key=by_cost))
+
+    def _explore(self, ranked, models):
+        """Every explore_every-th ranking, move the candidate with the fewest requests to the front."""
+        with self._lock:
+            self._rankings += 1
+            if not self.explore_every or self._rankings % self.explore_every or len(ranked) < 2:
+                return ranked
+            requests = {p: (self._stats.get((p, models.get(p))) or {}).get('requests', 0) for p in ranked}
+        probe = min(ranked, key=requests.get)
+        return [probe] + [p for p in ranked if p != probe]
+
+    def stats(self):
+        with self._lock:
+            return {f"{provider}/{model}": {
+                'latency_seconds': round(stats['latency'], 3),
+                'failure_rate': round(stats['failure'], 3),
+                'cost_usd': round(stats['cost'], 6) if stats['cost'] is not None else None,
+                'requests': stats['requests'],
+            } for (provider, model), stats in sorted(self._stats.items())}
+
+
+AI_POLICY = ProviderPolicy()
+
+
+class IncrementalJSONFields:
+    """Pulls the top-level fields out of a JSON object while it is still arriving.
+
+    feed() takes the next fragment of model output and returns
+    [(field, value, done)]: a string field is reported with its text so
+    far while it grows (done=False) and once more when its closing quote
+    arrives (done=True); other values are reported once complete. Text
+    before the first "{" (prose, a ```json fence) is ignored.
+    """
+
+    ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', '\\': '\\', '/': '/'}
+
+    def __init__(self, fields=None):
+        self.fields = fields
+        self.values = {}
+        self._state = 'start'
+        self._key = None
+        self._chars = []
+        self._escape = None  # None, '' after a backslash, or the \u digits so far
+        self._depth = 0
+        self._raw_string = False
+        self._raw_escape = False
+
+    def feed(self, text):
+        events = []
+        growing = False
+        for char in text:
+            state = self._state
+            if state == 'start':
+                if char == '{':
+                    self._state = 'key'
+            elif state == 'key':
+                if char == '"':
+                    self._chars, self._state = [], 'key_string'
+                elif char == '}':
+                    self._state = 'done'
+            elif state in ('key_string', 'string'):
+                if not self._string_char(char):
+                    growing = growing or state == 'string'
+                    continue
+                if state == 'key_string':
+                    self._key, self._state = self._text(), 'colon'
+                else:
+                    growing = False
+                    self._emit(events, self._key, self._text(), True)
+                    self._state = 'after_value'
+                continue
+            elif state == 'colon':
+                if char == ':':
+                    self._state = 'value'
+            elif state == 'value':
+                if char == '"':
+                    self._chars, self._state = [], 'string'
+                elif not char.isspace():
+                    self._chars, self._depth, self._raw_string, self._raw_escape = [], 0, False, False
+                    self._state = 'raw'
+                    self._raw_char(char, events)
+            elif state == 'raw':
+                self._raw_char(char, events)
+            elif state == 'after_value':
+                if char == ',':
+                    self._state = 'key'
+                elif char == '}':
+                    self._state = 'done'
+        if growing and self._state == 'string':
+            self._emit(events, self._key, self._text(), False)
+        return events
+
+    def _string_char(self, char):
+        """Consume one character of a string; True when it was the closing quote."""
+        if self._escape is not None:
+            if self._escape == '' and char != 'u':
+                self._chars.append(self.ESCAPES.get(char, char))
+                self._escape = None
+            elif self._escape == '':
+                self._escape = 'u'
+            else:
+                self._escape += char
+                if len(self._escape) == 5:
+                    try:
+                        self._chars.append(chr(int(self._escape[1:], 16)))
+                    except ValueError:
+                        pass
+                    self._escape = None
+            return False
+        if char == '\\':
+            self._escape = ''
+            return False
+        if char == '"':
+            return True
+        self._chars.append(char)
+        return False
+
+    def _raw_char(self, char, events):
+        if self._raw_string:
+            if self._raw_escape:
+                self._raw_escape = False
+            elif char == '\\':
+                self._raw_escape = True
+            elif char == '"':
+                self._raw_string = False
+        elif char == '"':
+            self._raw_string = True
+        elif char in '[{':
+            self._depth += 1
+        elif char in ']}':
+            if self._depth == 0:
+                self._finish_raw(events)
+                self._state = 'done' if char == '}' else 'after_value'
+                return
+            self._depth -= 1
+        elif char == ',' and self._depth == 0:
+            self._finish_raw(events)
+            self._state = 'key'
+            return
+        self._chars.append(char)
+
+    def _finish_raw(self, events):
+        try:
+            value = json.loads("".join(self._chars))
+        except ValueError:
+            return
+        self._emit(events, self._key, value, True)
+
+    def _text(self):
+        # \u escapes of a surrogate pair arrive as two halves; hold a high half back until its pair
+        chars = self._chars
+        if chars and '\ud800' <= chars[-1] <= '\udbff':
+            chars = chars[:-1]
+        return "".join(chars).encode('utf-16', 'surrogatepass').decode('utf-16', 'replace')
+
+    def _emit(self, events, key, value, done):
+        if self.fields is not None and key not in self.fields:
+            return
+        if done:
+            self.values[key] = value
+        events.append((key, value, done))
+
+
+# Conventions per platform, part of AI_BULK_SYSTEM_PROMPT
+AI_PLATFORM_GUIDE = {
+    'X': "Punchy and conversational. Lead with the hook in the first few words; one idea per post. "
+         "1-3 hashtags at most, woven in or at the end. Questions and bold opinions drive replies.",
+    'Threads': "Casual, friendly and personal, like talking to followers. Short paragraphs, light emoji. "
+               "Few or no hashtags (one topic tag works best). Invite replies with an open question.",
+    'LinkedIn': "Professional but human. Open with a one-line hook, then short paragraphs with line breaks, "
+                "a concrete takeaway or lesson, and a question or call to action at the end. "
+                "3-5 specific industry hashtags at the end. No slang, sparing emoji.",
+    'Reddit': "Authentic and community-first; no marketing speak, no hashtags. Write like a member sharing "
+              "something useful or interesting, give context and invite discussion. Overt promotion gets "
+              "downvoted, so lead with value.",
+    'Facebook': "Warm, story-driven and shareable. A relatable opening, a short story or benefit, and a "
+                "clear call to action (comment, share, tag a friend). 1-3 hashtags at most.",
+    'Instagram': "Visual-first: the caption supports the image. Strong first line (it is all that shows "
+                 "before \"more\"), emoji welcome, line breaks for readability, a call to action. "
+                 "8-15 hashtags mixing broad, niche and branded tags, placed at the end.",
+    'TikTok': "Energetic, trend-aware and brief. Hook in the first line, speak the audience's language, "
+              "reference the sound or trend if relevant. 3-6 hashtags including one or two broad "
+              "discovery tags.",
+    'Quora': "Helpful and expert, written as an answer: address the implied question directly, explain "
+             "the reasoning, add a concrete example. No hashtags, no hype, no emoji.",
+}
+
+# Instructions shared by every request. Sent first and unchanged (as the system
+# prompt) so providers can serve it from their prompt cache; only the image
+# and _build_prompt()'s part differ between requests.
+AI_SYSTEM_PROMPT = """You are an expert social media content strategist specializing in creating viral, conversion-focused posts.
+
+Focus on:
+- Emotional triggers and storytelling
+- Benefit-driven language (not just features)
+- Viral-worthy, shareable content
+- Platform-optimized formatting
+- Trending topics and search terms
+
+Respond ONLY with valid JSON in this exact format:
+{
+  "caption": "Your compelling caption here",
+  "hashtags": "#hashtag1 #hashtag2 #hashtag3 ...",
+  "keywords": "keyword1, keyword2, keyword3, ..."
+}"""
+
+# Longer instructions for batch runs (AIBatchRunner) on Anthropic and OpenAI.
+# Providers only cache prefixes of about 1024 tokens or more, which the short
+# prompt is not; across hundreds of requests in one batch the cached block can
+# cost less than the short one, but it is billed on every request and changes
+# the output. Off unless "ai_bulk_system_prompt" is set; each batch logs its
+# cache savings to compare.
+AI_BULK_SYSTEM_PROMPT = """You are an expert social media content strategist specializing in creating viral, conversion-focused posts.
+
+Focus on:
+- Emotional triggers and storytelling
+- Benefit-driven language (not just features)
+- Viral-worthy, shareable content
+- Platform-optimized formatting
+- Trending topics and search terms
+
+## How to read the creative
+
+Look at the image (or the file name when there is no image) before writing anything. Identify the subject, the product or idea being shown, the setting, the mood, the colours and any visible text, logo or price. Infer who it is for and what they would want from it. Write about what is actually there: never invent product names, prices, statistics, dates, discounts, testimonials or claims that the creative does not support. If the creative is ambiguous, stay general rather than guessing specifics.
+
+## Captions
+
+- Open with a hook: a bold statement, a surprising fact the image supports, a question, or a relatable pain point. The first line decides whether anyone reads on.
+- Sell the outcome, not the object: what the viewer gets, feels or avoids.
+- Use the viewer's language; prefer short, concrete words over jargon and filler.
+- One clear call to action where it fits (save, share, comment, follow, click the link in bio, shop now).
+- Emoji are optional; use them to add tone or structure, never more than a handful.
+- Avoid clickbait that the content cannot deliver, ALL CAPS sentences, excessive exclamation marks and engagement bait such as "like if you agree".
+- Keep it inclusive and brand-safe: no profanity, no political or medical claims, nothing that mocks a group of people.
+
+## Hashtags
+
+- Return them space-separated, each starting with "#", no spaces or punctuation inside a tag, CamelCase for multi-word tags (#MorningRoutine).
+- Mix reach and relevance: a few broad tags with large audiences, several niche tags where buyers and enthusiasts actually search, and one specific to the product or theme.
+- Favour buyer-intent and community tags over generic ones such as #love, #instagood or #photooftheday.
+- Never use banned, misleading or unrelated trending tags, and never repeat a tag.
+
+## Keywords
+
+- Return them comma-separated, lower case unless a proper noun.
+- Prefer longtail search phrases (3-6 words) that describe what a person would type to find this content: the product, its use, its audience, its style and its benefits.
+- Include a mix of informational ("how to style a linen shirt"), commercial ("best linen shirt for summer") and descriptive ("relaxed fit beige linen shirt") phrases.
+- No hashtags, no duplicates, no keyword stuffing.
+
+## Platform conventions
+
+When asked to tailor the post to platforms, follow each platform's conventions and keep caption plus hashtags within the character limit given for it:
+{platform_guide}
+
+## Output format
+
+Respond ONLY with valid JSON in this exact format:
+{{
+  "caption": "Your compelling caption here",
+  "hashtags": "#hashtag1 #hashtag2 #hashtag3 ...",
+  "keywords": "keyword1, keyword2, keyword3, ..."
+}}
+
+- No markdown, no code fences, no commentary before or after the JSON object.
+- Escape quotes and newlines inside strings; use \\n for line breaks in captions.
+- The caption field holds the caption text only; hashtags go only in the hashtags field.
+- When platform variants are requested, add a "variants" object keyed by platform name, each with its own "caption" and "hashtags", and still fill the top-level fields with the general version.
+
+## Example
+
+For a photo of a steaming ceramic mug of coffee on a sunlit wooden desk next to an open notebook:
+{{
+  "caption": "Your best ideas start before the inbox does. Slow mornings, strong coffee, blank pages - what's the first thing you write each day?",
+  "hashtags": "#MorningRoutine #CoffeeTime #SlowLiving #JournalingHabit #WorkFromHome #DeskSetup #CoffeeAndNotes #ProductiveMorning",
+  "keywords": "morning routine for productivity, coffee and journaling habit, cozy home office desk setup, slow morning routine ideas, ceramic coffee mug aesthetic, how to start a journaling habit"
+}}
+
+For the same photo with variants requested for X and LinkedIn, the object would also contain:
+"variants": {{
+  "X": {{"caption": "Best ideas show up before the inbox does. What's your first-thing-in-the-morning ritual?", "hashtags": "#MorningRoutine #Productivity"}},
+  "LinkedIn": {{"caption": "The most productive hour of my day happens before I open email.\\n\\nNo meetings, no notifications - just coffee and a blank page. That's where the ideas that actually move work forward come from.\\n\\nDo you protect a focus hour? When is yours?", "hashtags": "#Productivity #DeepWork #Leadership #WorkHabits"}}
+}}""".format(platform_guide="\n".join(
+    f"- {platform} (max {PLATFORM_TEXT_LIMITS[platform]} characters): {guide}"
+    for platform, guide in AI_PLATFORM_GUIDE.items()))
+
+
 class AIService:
     """Service for generating captions, hashtags, and keywords using multiple AI providers."""
 
@@ -147,9 +1454,19 @@ class AIService:
     def reload_config(self):
         """Reload configuration from file."""
         self.config = load_config()
+        AI_HEALTH.configure(self.config)
+
+    def _configured(self, provider):
+        key, available = AI_PROVIDER_KEYS.get(provider, (None, False))
+        return available and bool(self.config.get(key))
+
+    def _get_provider_order(self, objective=None):
+        """Get the order of providers to try.
 
-    def _get_provider_order(self):
-        """Get the order of providers to try (primary first, then others)."""
+        The "primary" objective keeps the configured primary first, then
+        the others; any other objective ("ai_objective" in config.json) lets
+        AI_POLICY rank them.
+        """
         primary = self.config.get('primary_provider', 'Anthropic')
         all_providers = ['Anthropic', 'OpenAI', 'Gemini']
 
@@ -158,10 +1475,60 @@ class AIService:
         for p in all_providers:
             if p != primary:
                 order.append(p)
-        return order
 
-    def _build_prompt(self, caption_prompt="", hashtag_prompt="", keyword_prompt=""):
-        """Build the combined prompt for all providers using JSON format."""
+        objective = objective or self.config.get('ai_objective', 'primary')
+        models = {p: self._model(p) for p in order}
+        # Only providers with a key are ranked, so exploration never picks one that will be skipped
+        configured = [p for p in order if self._configured(p)]
+        ranked = AI_POLICY.order(configured, models, objective, self.config.get('ai_budget_usd'),
+                                 self._pricing())
+        return ranked + [p for p in order if p not in configured]
+
+    def _model(self, provider):
+        return (self.config.get('ai_models') or {}).get(provider, AI_MODELS.get(provider))
+
+    def _pricing(self):
+        pricing = dict(AI_PRICING)
+        pricing.update({model: tuple(prices) for model, prices in (self.config.get('ai_pricing') or {}).items()})
+        return pricing
+
+    def _record_usage(self, provider, usage, price_factor=1.0):
+        """Count and log a response's tokens and cost; returns the cost in USD or None.
+
+        `usage` has input_tokens (uncached), output_tokens and, where the
+        provider reports them, cache_read_tokens and cache_write_tokens.
+        `price_factor` scales the cost (AI_BATCH_DISCOUNT for batch results).
+        """
+        if not usage:
+            return None
+        model = self._model(provider)
+        tokens = {kind: usage.get(f'{kind}_tokens') or 0
+                  for kind in ('input', 'output', 'cache_read', 'cache_write')}
+        for kind, count in tokens.items():
+            METRICS.inc('ai_tokens_total', count, provider=provider, kind=kind)
+        pricing, cache_factors = self._pricing(), AI_CACHE_FACTORS.get(provider, (1.0, 1.0))
+        cost = ai_cost_usd(model, tokens['input'], tokens['output'], pricing,
+                           tokens['cache_read'], tokens['cache_write'], cache_factors)
+        if cost is not None:
+            cost *= price_factor
+            METRICS.inc('ai_cost_usd_total', cost, provider=provider)
+        saved = ai_cache_savings_usd(model, tokens['cache_read'], pricing, cache_factors)
+        if saved:
+            saved *= price_factor
+            METRICS.inc('ai_cache_savings_usd_total', saved, provider=provider)
+        log.info(f"{provider} usage: {tokens['input']} input + {tokens['cache_read']} cached "
+                 f"+ {tokens['cache_write']} cache-write, {tokens['output']} output tokens"
+                 + (f", ${cost:.5f}" if cost is not None else "")
+                 + (f" (${saved:.5f} saved by the cache)" if saved else ""),
+                 extra={'provider': provider, 'model': model, **{f'{k}_tokens': v for k, v in tokens.items()}})
+        return cost
+
+    def _build_prompt(self, caption_prompt="", hashtag_prompt="", keyword_prompt="", platforms=None):
+        """Build the per-request part of the prompt; AI_SYSTEM_PROMPT holds the static instructions.
+
+        With `platforms`, the same response also carries a tailored caption
+        and hashtags for each of them (see _parse_response).
+        """
         default_caption_prompt = "Write a viral, engaging social media caption that drives engagement. Use emotional triggers, be compelling and benefit-focused. Keep it concise (100-150 characters)."
         default_hashtag_prompt = "Generate 8-12 trending, viral-worthy hashtags focusing on buyer intent and engagement. Mix popular and niche hashtags."
         default_keyword_prompt = "Generate 7-10 SEO-optimized longtail keywords focusing on search intent, trending terms, and specific content attributes."
@@ -170,27 +1537,22 @@ class AIService:
         final_hashtag_prompt = hashtag_prompt if hashtag_prompt.strip() else default_hashtag_prompt
         final_keyword_prompt = keyword_prompt if keyword_prompt.strip() else default_keyword_prompt
 
-        return f"""You are an expert social media content strategist specializing in creating viral, conversion-focused posts.
-
-Analyze this image and generate optimized social media content:
+        prompt = f"""Analyze this image and generate optimized social media content:
 
 1. **Caption**: {final_caption_prompt}
 2. **Hashtags**: {final_hashtag_prompt}
-3. **Keywords**: {final_keyword_prompt}
+3. **Keywords**: {final_keyword_prompt}"""
+        if platforms:
+            limits = "\n".join(f"- {p}: at most {PLATFORM_TEXT_LIMITS.get(p, 2000)} characters for caption "
+                               f"and hashtags together" for p in platforms)
+            prompt += f"""
 
-Focus on:
-- Emotional triggers and storytelling
-- Benefit-driven language (not just features)
-- Viral-worthy, shareable content
-- Platform-optimized formatting
-- Trending topics and search terms
+Also tailor the post to each platform below, matching its tone, audience and conventions:
+{limits}
 
-Respond ONLY with valid JSON in this exact format:
-{{
-  "caption": "Your compelling caption here",
-  "hashtags": "#hashtag1 #hashtag2 #hashtag3 ...",
-  "keywords": "keyword1, keyword2, keyword3, ..."
-}}"""
+Add them to the JSON object as a "variants" field:
+"variants": {{"<platform>": {{"caption": "...", "hashtags": "#..."}}, ...}}"""
+        return prompt
 
     def _parse_response(self, response_text):
         """Parse the AI response into structured data using JSON extraction."""
@@ -204,6 +1566,15 @@ Respond ONLY with valid JSON in this exact format:
                 result['caption'] = parsed_data.get('caption', '')
                 result['hashtags'] = parsed_data.get('hashtags', '')
                 result['keywords'] = parsed_data.get('keywords', '')
+                variants = parsed_data.get('variants')
+                if isinstance(variants, dict):
+                    # Stored ready to post, held to each platform's limit whatever the model returned
+                    result['variants'] = {
+                        platform: fit_post_text(str(v.get('caption', '')), str(v.get('hashtags', '')),
+                                                PLATFORM_TEXT_LIMITS.get(platform))
+                        for platform, v in variants.items()
+                        if platform in PLATFORM_TEXT_LIMITS and isinstance(v, dict) and v.get('caption')
+                    }
             else:
                 # Fallback to line-by-line parsing for backwards compatibility
                 for line in response_text.split('\n'):
@@ -235,7 +1606,7 @@ Respond ONLY with valid JSON in this exact format:
             return None, None
 
         try:
-            with open(media_path, 'rb') as f:
+            with GOVERNOR.slot('media'), open(media_path, 'rb') as f:
                 image_bytes = f.read()
                 media_data = base64.standard_b64encode(image_bytes).decode('utf-8')
 
@@ -254,299 +1625,2863 @@ Respond ONLY with valid JSON in this exact format:
         except Exception:
             return None, None
 
-    def _call_anthropic(self, media_path, prompt):
-        """Call Anthropic Claude API."""
+    def _anthropic_request(self, media_path, prompt, extra_tokens=0, system_prompt=AI_SYSTEM_PROMPT):
+        """Messages API parameters for one creative (shared by _call_anthropic and batches)."""
+        media_data, media_type = self._prepare_image(media_path)
+
+        if media_data and media_type:
+            content = [
+                {
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": media_type,
+                        "data": media_data
+                    }
+                },
+                {"type": "text", "text": prompt}
+            ]
+        else:
+            filename = os.path.basename(media_path)
+            content = f"Generate social media content for a file named '{filename}'.\n\n{prompt}"
+        return {
+            'model': self._model('Anthropic'),
+            'max_tokens': 2000 + extra_tokens,
+            'system': [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}],
+            'messages': [{"role": "user", "content": content}],
+        }
+
+    def _openai_request(self, media_path, prompt, extra_tokens=0, system_prompt=AI_SYSTEM_PROMPT):
+        """Chat Completions parameters for one creative (shared by _call_openai and batches)."""
+        media_data, media_type = self._prepare_image(media_path)
+
+        if media_data and media_type:
+            content = [
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{media_type};base64,{media_data}"
+                    }
+                },
+                {"type": "text", "text": prompt}
+            ]
+        else:
+            filename = os.path.basename(media_path)
+            content = f"Generate social media content for a file named '{filename}'.\n\n{prompt}"
+        # OpenAI caches long prompt prefixes automatically; the static system message leads
+        return {
+            'model': self._model('OpenAI'),
+            'max_tokens': 1024 + extra_tokens,
+            'messages': [{"role": "system", "content": system_prompt}, {"role": "user", "content": content}],
+        }
+
+    def _call_anthropic(self, media_path, prompt, on_delta=None, extra_tokens=0):
+        """Call Anthropic Claude API. Returns (text, error, usage).
+
+        With `on_delta` the response is streamed and each text fragment is
+        passed to it; returning False from on_delta stops the stream.
+        """
         api_key = self.config.get('anthropic_key', '')
         if not api_key or not ANTHROPIC_AVAILABLE:
-            return None, "Anthropic API key not configured"
+            return None, "Anthropic API key not configured", None
 
         try:
             client = anthropic.Anthropic(api_key=api_key)
-            media_data, media_type = self._prepare_image(media_path)
+            request = self._anthropic_request(media_path, prompt, extra_tokens)
 
-            if media_data and media_type:
-                message = client.messages.create(
-                    model="claude-sonnet-4-5-20250929",
-                    max_tokens=2000,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": media_type,
-                                        "data": media_data
-                                    }
-                                },
-                                {"type": "text", "text": prompt}
-                            ]
-                        }
-                    ]
-                )
+            if on_delta is None:
+                message = client.messages.create(**request)
+                text = message.content[0].text
             else:
-                filename = os.path.basename(media_path)
-                message = client.messages.create(
-                    model="claude-sonnet-4-5-20250929",
-                    max_tokens=2000,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"Generate social media content for a file named '{filename}'.\n\n{prompt}"
-                        }
-                    ]
-                )
-
-            return message.content[0].text, None
+                parts = []
+                with client.messages.stream(**request) as stream:
+                    for delta in stream.text_stream:
+                        parts.append(delta)
+                        if on_delta(delta) is False:
+                            return None, "cancelled", None
+                    message = stream.get_final_message()
+                text = "".join(parts)
+
+            usage = {
+                'input_tokens': message.usage.input_tokens,
+                'output_tokens': message.usage.output_tokens,
+                'cache_read_tokens': getattr(message.usage, 'cache_read_input_tokens', None) or 0,
+                'cache_write_tokens': getattr(message.usage, 'cache_creation_input_tokens', None) or 0,
+            }
+            return text, None, usage
         except Exception as e:
-            return None, f"Anthropic error: {e}"
+            return None, f"Anthropic error: {e}", None
 
-    def _call_openai(self, media_path, prompt):
-        """Call OpenAI GPT-4 Vision API."""
+    def _call_openai(self, media_path, prompt, on_delta=None, extra_tokens=0):
+        """Call OpenAI GPT-4 Vision API. Returns (text, error, usage); streams like _call_anthropic."""
         api_key = self.config.get('openai_key', '')
         if not api_key or not OPENAI_AVAILABLE:
-            return None, "OpenAI API key not configured"
+            return None, "OpenAI API key not configured", None
 
         try:
             client = openai.OpenAI(api_key=api_key)
-            media_data, media_type = self._prepare_image(media_path)
+            request = self._openai_request(media_path, prompt, extra_tokens)
 
-            if media_data and media_type:
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    max_tokens=1024,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image_url",
-                                    "image_url": {
-                                        "url": f"data:{media_type};base64,{media_data}"
-                                    }
-                                },
-                                {"type": "text", "text": prompt}
-                            ]
-                        }
-                    ]
-                )
+            if on_delta is None:
+                response = client.chat.completions.create(**request)
+                text, usage_info = response.choices[0].message.content, response.usage
             else:
-                filename = os.path.basename(media_path)
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    max_tokens=1024,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": f"Generate social media content for a file named '{filename}'.\n\n{prompt}"
-                        }
-                    ]
-                )
-
-            return response.choices[0].message.content, None
+                parts, usage_info = [], None
+                stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True},
+                                                        **request)
+                try:
+                    for chunk in stream:
+                        # The final chunk carries only the usage
+                        if chunk.usage is not None:
+                            usage_info = chunk.usage
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            if on_delta(delta) is False:
+                                return None, "cancelled", None
+                finally:
+                    stream.close()
+                text = "".join(parts)
+
+            usage = None
+            if usage_info is not None:
+                details = getattr(usage_info, 'prompt_tokens_details', None)
+                cached = getattr(details, 'cached_tokens', None) or 0
+                usage = {'input_tokens': usage_info.prompt_tokens - cached,
+                         'output_tokens': usage_info.completion_tokens,
+                         'cache_read_tokens': cached}
+            return text, None, usage
         except Exception as e:
-            return None, f"OpenAI error: {e}"
+            return None, f"OpenAI error: {e}", None
 
-    def _call_gemini(self, media_path, prompt):
-        """Call Google Gemini API."""
+    def _call_gemini(self, media_path, prompt, on_delta=None, extra_tokens=0):
+        """Call Google Gemini API. Returns (text, error, usage); streams like _call_anthropic."""
         api_key = self.config.get('gemini_key', '')
         if not api_key or not GEMINI_AVAILABLE:
-            return None, "Gemini API key not configured"
+            return None, "Gemini API key not configured", None
 
         try:
             genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-1.5-flash')
+            model = genai.GenerativeModel(self._model('Gemini'), system_instruction=AI_SYSTEM_PROMPT)
 
             media_data, media_type = self._prepare_image(media_path)
 
             if media_data and media_type and PIL_AVAILABLE:
                 # Load image for Gemini
-                image = Image.open(media_path)
-                response = model.generate_content([prompt, image])
+                with GOVERNOR.slot('media'):
+                    image = Image.open(media_path)
+                    image.load()
+                contents = [prompt, image]
             else:
                 filename = os.path.basename(media_path)
-                response = model.generate_content(
-                    f"Generate social media content for a file named '{filename}'.\n\n{prompt}"
-                )
+                contents = f"Generate social media content for a file named '{filename}'.\n\n{prompt}"
+
+            if on_delta is None:
+                response = model.generate_content(contents)
+                text = response.text
+            else:
+                parts = []
+                response = model.generate_content(contents, stream=True)
+                for chunk in response:
+                    delta = chunk.text
+                    parts.append(delta)
+                    if on_delta(delta) is False:
+                        return None, "cancelled", None
+                text = "".join(parts)
+
+            usage = None
+            metadata = getattr(response, 'usage_metadata', None)
+            if metadata is not None:
+                cached = getattr(metadata, 'cached_content_token_count', None) or 0
+                usage = {'input_tokens': metadata.prompt_token_count - cached,
+                         'output_tokens': metadata.candidates_token_count,
+                         'cache_read_tokens': cached}
+            return text, None, usage
+        except Exception as e:
+            return None, f"Gemini error: {e}", None
+
+    def _stream_handler(self, provider, on_update, cancel=None):
+        """on_delta callback for _call_*: parses fields as they arrive and reports them to on_update."""
+        parser = IncrementalJSONFields(('caption', 'hashtags', 'keywords'))
+        started = time.perf_counter()
+        first = []
+
+        def on_delta(text):
+            if cancel is not None and cancel.is_set():
+                return False
+            if not first:
+                first.append(True)
+                METRICS.observe('ai_first_token_seconds', time.perf_counter() - started, provider=provider)
+            for field, value, done in parser.feed(text):
+                if isinstance(value, str):
+                    on_update(field, value, done)
+            return True
+
+        on_delta.streamed = first
+        return on_delta
+
+    def analyze_media(self, media_path, caption_prompt="", hashtag_prompt="", keyword_prompt="", cancel=None,
+                      objective=None, on_update=None, platforms=None):
+        """
+        Analyze media and generate caption, hashtags, and keywords.
+        Uses fallback chain: tries providers in the order chosen for
+        `objective` (see ProviderPolicy), then others if one fails.
+        `cancel` is an optional threading.Event; once set, no further provider
+        is called (a streaming one is cut off) and the result has 'cancelled' set.
+        With `on_update(field, text, done)` responses are streamed ("ai_streaming"
+        in config.json) and fields are reported while they are generated.
+        With `platforms` the one request also returns 'variants': the post
+        text tailored to each platform, within its length limit.
+        Returns: dict with 'caption', 'hashtags', 'keywords' keys
+        """
+        self.reload_config()
+
+        prompt = self._build_prompt(caption_prompt, hashtag_prompt, keyword_prompt, platforms)
+        # Room in the response for each platform's variant
+        extra_tokens = 300 * len(platforms or ())
+        provider_order = self._get_provider_order(objective)
+
+        errors = []
+        started = time.perf_counter()
+        streaming = on_update is not None and self.config.get('ai_streaming', True)
+        on_delta = None
+
+        for provider in provider_order:
+            if cancel is not None and cancel.is_set():
+                METRICS.observe('ai_analyze_seconds', time.perf_counter() - started, outcome='cancelled')
+                return {'caption': '', 'hashtags': '', 'keywords': '', 'error': "cancelled", 'cancelled': True}
+            if on_delta is not None and on_delta.streamed:
+                # A provider failed after streaming part of its answer; start the fields over
+                for field in ('caption', 'hashtags', 'keywords'):
+                    on_update(field, '', True)
+            on_delta = self._stream_handler(provider, on_update, cancel) if streaming else None
+            # Unconfigured providers fail instantly anyway; only real requests feed the breaker
+            configured = self._configured(provider)
+            if configured and not AI_HEALTH.allow(provider):
+                errors.append(f"{provider}: skipped (circuit open)")
+                METRICS.inc('ai_requests_total', provider=provider, outcome='skipped')
+                continue
+            request_started = time.perf_counter()
+            with GOVERNOR.slot('ai'), METRICS.timer('ai_request_seconds', provider=provider), \
+                    TRACER.span(f"ai.{provider}", cat="ai", provider=provider):
+                if provider == 'Anthropic':
+                    response, error, usage = self._call_anthropic(media_path, prompt, on_delta, extra_tokens)
+                elif provider == 'OpenAI':
+                    response, error, usage = self._call_openai(media_path, prompt, on_delta, extra_tokens)
+                elif provider == 'Gemini':
+                    response, error, usage = self._call_gemini(media_path, prompt, on_delta, extra_tokens)
+                else:
+                    continue
+            elapsed = time.perf_counter() - request_started
+            if cancel is not None and cancel.is_set():
+                if configured:
+                    # A cancelled call says nothing about the provider; free the half-open probe
+                    AI_HEALTH.abandon(provider)
+                METRICS.observe('ai_analyze_seconds', time.perf_counter() - started, outcome='cancelled')
+                return {'caption': '', 'hashtags': '', 'keywords': '', 'error': "cancelled", 'cancelled': True}
+            cost = self._record_usage(provider, usage)
+
+            if response:
+                with METRICS.timer('ai_parse_seconds', provider=provider):
+                    result = self._parse_response(response)
+
+                # Validate that we got actual content
+                parsed = result.get('caption') or result.get('hashtags') or result.get('keywords')
+                if configured:
+                    AI_HEALTH.record(provider, bool(parsed), elapsed)
+                    AI_POLICY.record(provider, self._model(provider), bool(parsed), elapsed, cost)
+                if not parsed:
+                    errors.append(f"{provider}: Failed to parse response - no content extracted")
+                    METRICS.inc('ai_requests_total', provider=provider, outcome='parse_error')
+                    log.debug("Failed to parse %s response: %r", provider, response[:200],
+                              extra={'provider': provider})
+                    continue
+
+                result['provider'] = provider
+                result['cost_usd'] = cost
+                METRICS.inc('ai_requests_total', provider=provider, outcome='success')
+                METRICS.observe('ai_analyze_seconds', time.perf_counter() - started, outcome='success')
+                log.debug("Generated content using %s", provider, extra={'provider': provider})
+                return result
+            else:
+                if configured:
+                    AI_HEALTH.record(provider, False, elapsed)
+                    AI_POLICY.record(provider, self._model(provider), False, elapsed, cost)
+                errors.append(f"{provider}: {error}")
+                METRICS.inc('ai_requests_total', provider=provider, outcome='error')
+                log.warning("%s failed - %s", provider, error, extra={'provider': provider})
+
+        # All providers failed
+        error_msg = "All providers failed: " + "; ".join(errors)
+        METRICS.observe('ai_analyze_seconds', time.perf_counter() - started, outcome='failed')
+        log.error(error_msg)
+        return {
+            'caption': '',
+            'hashtags': '',
+            'keywords': '',
+            'error': error_msg
+        }
+
+
+# --------------------------------------------------------------------
+# AI BATCH
+# --------------------------------------------------------------------
+
+# Providers with an asynchronous batch endpoint; results arrive within 24h at a discount
+AI_BATCH_PROVIDERS = ('Anthropic', 'OpenAI')
+AI_BATCH_DISCOUNT = 0.5
+AI_BASE_URLS = {
+    'Anthropic': "https://api.anthropic.com",  # override with "anthropic_base_url" in config.json
+    'OpenAI': "https://api.openai.com",  # override with "openai_base_url" (e.g. mock_ai_batch_server.py)
+}
+
+
+def _write_json_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+class CreativeContentStore:
+    """Generated content per creative, keyed by media path (queue/creative_content.json).
+
+    Filled by batch runs; the editor uses a creative's entry instead of
+    asking a provider again when the creative is selected.
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self._path or os.path.join(QUEUE_DIR, 'creative_content.json')
+
+    def load(self):
+        return _read_json(self.path, {})
+
+    def get(self, media_path):
+        return self.load().get(os.path.abspath(media_path))
+
+    def update(self, entries):
+        """Merge {media_path: content} into the store."""
+        with self._lock:
+            content = self.load()
+            content.update({os.path.abspath(path): entry for path, entry in entries.items()})
+            _write_json_atomic(self.path, content)
+
+
+CREATIVE_CONTENT = CreativeContentStore()
+
+
+class AIBatchClient:
+    """Plain-HTTP client for the Anthropic Message Batches and OpenAI Batch APIs."""
+
+    def __init__(self, provider, config):
+        self.provider = provider
+        self.config = config
+        key = 'anthropic' if provider == 'Anthropic' else 'openai'
+        self.api_key = config.get(f'{key}_key', '')
+        self.base_url = (config.get(f'{key}_base_url') or AI_BASE_URLS[provider]).rstrip('/')
+
+    def _headers(self):
+        if self.provider == 'Anthropic':
+            return {'x-api-key': self.api_key, 'anthropic-version': "2023-06-01"}
+        return {'Authorization': f"Bearer {self.api_key}"}
+
+    def _request(self, method, url, body=None, content_type="application/json", raw=False):
+        if not url.startswith('http'):
+            url = self.base_url + url
+        headers = self._headers()
+        if body is not None:
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = content_type
+        try:
+            with urlopen(Request(url, data=body, headers=headers, method=method), timeout=120) as response:
+                data = response.read()
+        except HTTPError as e:
+            detail = e.read().decode('utf-8', 'replace')[:300]
+            raise RuntimeError(f"{self.provider} batch API {method} {url}: HTTP {e.code} {detail}") from None
+        return data if raw else json.loads(data)
+
+    def _upload_jsonl(self, lines):
+        """Upload batch input as an OpenAI file; returns its id."""
+        boundary = uuid.uuid4().hex
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"purpose\"\r\n\r\nbatch\r\n"
+                f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"batch.jsonl\"\r\n"
+                f"Content-Type: application/jsonl\r\n\r\n").encode('utf-8')
+        body += "\n".join(json.dumps(line) for line in lines).encode('utf-8')
+        body += f"\r\n--{boundary}--\r\n".encode('utf-8')
+        return self._request('POST', "/v1/files", body, f"multipart/form-data; boundary={boundary}")['id']
+
+    def submit(self, requests):
+        """Submit {custom_id: request params}; returns the provider's batch id."""
+        if self.provider == 'Anthropic':
+            batch = self._request('POST', "/v1/messages/batches", {
+                'requests': [{'custom_id': cid, 'params': params} for cid, params in requests.items()]})
+        else:
+            file_id = self._upload_jsonl([
+                {'custom_id': cid, 'method': "POST", 'url': "/v1/chat/completions", 'body': params}
+                for cid, params in requests.items()])
+            batch = self._request('POST', "/v1/batches", {
+                'input_file_id': file_id, 'endpoint': "/v1/chat/completions", 'completion_window': "24h"})
+        return batch['id']
+
+    def status(self, batch_id):
+        """Returns (state, batch) with state 'running', 'ended' or 'failed'."""
+        if self.provider == 'Anthropic':
+            batch = self._request('GET', f"/v1/messages/batches/{batch_id}")
+            return ('ended' if batch.get('processing_status') == 'ended' else 'running'), batch
+        batch = self._request('GET', f"/v1/batches/{batch_id}")
+        state = batch.get('status')
+        if state == 'completed':
+            return 'ended', batch
+        if state in ('failed', 'expired', 'cancelled'):
+            return 'failed', batch
+        return 'running', batch
+
+    def results(self, batch):
+        """Yields (custom_id, text, error, usage) for each request of an ended batch."""
+        if self.provider == 'Anthropic':
+            for line in self._jsonl(batch.get('results_url') or f"/v1/messages/batches/{batch['id']}/results"):
+                result = line.get('result') or {}
+                if result.get('type') != 'succeeded':
+                    yield line.get('custom_id'), None, f"Anthropic batch result: {result.get('type')}", None
+                    continue
+                message = result['message']
+                usage = message.get('usage') or {}
+                text = "".join(block.get('text', '') for block in message.get('content', []))
+                yield line.get('custom_id'), text, None, {
+                    'input_tokens': usage.get('input_tokens') or 0,
+                    'output_tokens': usage.get('output_tokens') or 0,
+                    'cache_read_tokens': usage.get('cache_read_input_tokens') or 0,
+                    'cache_write_tokens': usage.get('cache_creation_input_tokens') or 0,
+                }
+            return
+        for file_key in ('output_file_id', 'error_file_id'):
+            if not batch.get(file_key):
+                continue
+            for line in self._jsonl(f"/v1/files/{batch[file_key]}/content"):
+                response = line.get('response') or {}
+                body = response.get('body') or {}
+                if line.get('error') or response.get('status_code') != 200:
+                    error = line.get('error') or body.get('error') or response.get('status_code')
+                    yield line.get('custom_id'), None, f"OpenAI batch result: {error}", None
+                    continue
+                usage = body.get('usage') or {}
+                cached = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+                yield line.get('custom_id'), body['choices'][0]['message']['content'], None, {
+                    'input_tokens': (usage.get('prompt_tokens') or 0) - cached,
+                    'output_tokens': usage.get('completion_tokens') or 0,
+                    'cache_read_tokens': cached,
+                }
+
+    def _jsonl(self, url):
+        for line in self._request('GET', url, raw=True).decode('utf-8').splitlines():
+            if line.strip():
+                yield json.loads(line)
+
+
+class AIBatchRunner:
+    """Generates content for many creatives through the providers' batch endpoints.
+
+    Submitted batches are recorded in queue/ai_batches.json so polling can
+    resume after a restart; finished results go to CREATIVE_CONTENT.
+    """
+
+    def __init__(self, ai_service=None, store=None):
+        self.ai_service = ai_service or AIService()
+        self.store = store or CREATIVE_CONTENT
+
+    @property
+    def jobs_file(self):
+        return os.path.join(QUEUE_DIR, 'ai_batches.json')
+
+    def load_jobs(self):
+        return _read_json(self.jobs_file, [])
+
+    def save_jobs(self, jobs):
+        _write_json_atomic(self.jobs_file, jobs)
+
+    def _provider(self, provider=None):
+        config = self.ai_service.config
+        provider = provider or config.get('ai_batch_provider') or config.get('primary_provider', 'Anthropic')
+        if provider not in AI_BATCH_PROVIDERS:
+            raise ValueError(f"{provider} has no batch mode; use one of {', '.join(AI_BATCH_PROVIDERS)}")
+        key, _ = AI_PROVIDER_KEYS[provider]
+        if not config.get(key):
+            raise ValueError(f"{provider} API key not configured")
+        return provider
+
+    def pending_paths(self, paths, force=False):
+        """The creatives that still need content: not stored yet and not in a running batch."""
+        if force:
+            return list(dict.fromkeys(os.path.abspath(p) for p in paths))
+        done = self.store.load()
+        running = {path for job in self.load_jobs() if job['status'] == 'running'
+                   for path in job['requests'].values()}
+        return [path for path in dict.fromkeys(os.path.abspath(p) for p in paths)
+                if path not in done and path not in running]
+
+    def submit(self, paths, provider=None, caption_prompt="", hashtag_prompt="", keyword_prompt="",
+               platforms=None, force=False):
+        """Submit batches for `paths` ("ai_batch_size" creatives each); returns the new job records."""
+        self.ai_service.reload_config()
+        config = self.ai_service.config
+        provider = self._provider(provider)
+        if platforms is None and config.get('ai_platform_variants', True):
+            platforms = config.get('ai_batch_platforms') or None
+        prompt = self.ai_service._build_prompt(caption_prompt, hashtag_prompt, keyword_prompt, platforms)
+        extra_tokens = 300 * len(platforms or ())
+        bulk_prompt = bool(config.get('ai_bulk_system_prompt', False))
+        system_prompt = AI_BULK_SYSTEM_PROMPT if bulk_prompt else AI_SYSTEM_PROMPT
+        build = (self.ai_service._anthropic_request if provider == 'Anthropic'
+                 else self.ai_service._openai_request)
+        client = AIBatchClient(provider, config)
+        size = max(1, int(config.get('ai_batch_size', 100)))
+
+        paths = self.pending_paths(paths, force)
+        jobs, new_jobs = self.load_jobs(), []
+        for start in range(0, len(paths), size):
+            chunk = paths[start:start + size]
+            # custom_id must be short and plain; it maps back to the path in the job record
+            ids = {f"c{start + i:06d}": path for i, path in enumerate(chunk)}
+            with TRACER.span("ai.batch_submit", cat="ai", provider=provider, count=len(chunk)):
+                batch_id = client.submit({cid: build(path, prompt, extra_tokens, system_prompt)
+                                          for cid, path in ids.items()})
+            job = {'id': batch_id, 'provider': provider, 'model': self.ai_service._model(provider),
+                   'status': 'running', 'submitted_at': datetime.now().isoformat(), 'requests': ids,
+                   'system_prompt': 'bulk' if bulk_prompt else 'standard'}
+            jobs.append(job)
+            new_jobs.append(job)
+            # Recorded per batch, so a failure part way through doesn't orphan the earlier ones
+            self.save_jobs(jobs)
+            METRICS.inc('ai_batch_requests_total', len(chunk), provider=provider, outcome='submitted')
+            log.info(f"Submitted {provider} batch {batch_id} with {len(chunk)} creatives",
+                     extra={'provider': provider, 'batch_id': batch_id})
+        return new_jobs
+
+    def poll(self):
+        """Check running batches once and store the results of ended ones; returns the jobs still running."""
+        self.ai_service.reload_config()
+        jobs = self.load_jobs()
+        for job in jobs:
+            if job['status'] != 'running':
+                continue
+            client = AIBatchClient(job['provider'], self.ai_service.config)
+            try:
+                state, batch = client.status(job['id'])
+            except (OSError, RuntimeError, ValueError) as e:
+                log.warning(f"Polling {job['provider']} batch {job['id']} failed: {e}",
+                            extra={'provider': job['provider'], 'batch_id': job['id']})
+                continue
+            if state == 'running':
+                continue
+            if state == 'failed':
+                job['status'] = 'failed'
+                job['error'] = batch.get('status')
+                METRICS.inc('ai_batch_requests_total', len(job['requests']), provider=job['provider'],
+                            outcome='failed')
+                log.error(f"{job['provider']} batch {job['id']} {batch.get('status')}",
+                          extra={'provider': job['provider'], 'batch_id': job['id']})
+            else:
+                self._collect(client, job, batch)
+            job['finished_at'] = datetime.now().isoformat()
+            self.save_jobs(jobs)
+        return [job for job in jobs if job['status'] == 'running']
+
+    def _collect(self, client, job, batch):
+        provider, entries, errors = job['provider'], {}, {}
+        cache_read_tokens = 0
+        for custom_id, text, error, usage in client.results(batch):
+            path = job['requests'].get(custom_id)
+            if path is None:
+                continue
+            cost = self.ai_service._record_usage(provider, usage, AI_BATCH_DISCOUNT)
+            cache_read_tokens += (usage or {}).get('cache_read_tokens') or 0
+            result = self.ai_service._parse_response(text) if text else {}
+            if not (result.get('caption') or result.get('hashtags') or result.get('keywords')):
+                errors[path] = error or "Failed to parse response - no content extracted"
+                continue
+            entries[path] = {
+                'caption': result['caption'], 'hashtags': result['hashtags'], 'keywords': result['keywords'],
+                'variants': result.get('variants') or {}, 'provider': provider, 'batch_id': job['id'],
+                'cost_usd': cost, 'generated_at': datetime.now().isoformat(),
+            }
+        # Requests missing from the results failed as well
+        for path in job['requests'].values():
+            if path not in entries and path not in errors:
+                errors[path] = "no result returned"
+        self.store.update(entries)
+        job['status'] = 'ended'
+        job['succeeded'], job['failed'] = len(entries), len(errors)
+        if errors:
+            job['errors'] = errors
+        # Recorded per job so bulk and standard system prompts can be compared before changing the default
+        saved = ai_cache_savings_usd(job.get('model'), cache_read_tokens, self.ai_service._pricing(),
+                                     AI_CACHE_FACTORS.get(provider, (1.0, 1.0)))
+        job['cache_read_tokens'] = cache_read_tokens
+        job['cache_savings_usd'] = round(saved * AI_BATCH_DISCOUNT, 6) if saved is not None else None
+        METRICS.inc('ai_batch_requests_total', len(entries), provider=provider, outcome='success')
+        METRICS.inc('ai_batch_requests_total', len(errors), provider=provider, outcome='error')
+        log.info(f"{provider} batch {job['id']} ended: {len(entries)} stored, {len(errors)} failed, "
+                 f"{cache_read_tokens} input tokens read from the cache"
+                 + (f" (${job['cache_savings_usd']:.5f} saved)" if saved is not None else ""),
+                 extra={'provider': provider, 'batch_id': job['id'],
+                        'system_prompt': job.get('system_prompt', 'standard'),
+                        'cache_read_tokens': cache_read_tokens})
+
+    def run(self, paths, provider=None, poll_interval=60.0, submit_only=False, force=False, platforms=None,
+            stop=None):
+        """Submit `paths` and poll until every batch (including earlier unfinished ones) has ended."""
+        self.submit(paths, provider, platforms=platforms, force=force)
+        if submit_only:
+            return self.load_jobs()
+        while self.poll():
+            if stop is None:
+                time.sleep(poll_interval)
+            elif stop.wait(poll_interval):
+                break
+        return self.load_jobs()
+
+
+def run_ai_batch(argv=None):
+    """Command-line entry point for overnight batch generation over the creative library."""
+    parser = argparse.ArgumentParser(description="Generate content for many creatives with provider batch APIs")
+    parser.add_argument('--ai-batch', action='store_true')
+    parser.add_argument('paths', nargs='*', help="media files (default: the creative library)")
+    parser.add_argument('--provider', choices=AI_BATCH_PROVIDERS, default=None)
+    parser.add_argument('--poll-interval', type=float, default=60.0, help="seconds between status checks")
+    parser.add_argument('--submit-only', action='store_true', help="submit and exit; a later run collects")
+    parser.add_argument('--force', action='store_true', help="regenerate creatives that already have content")
+    parser.add_argument('--platforms', nargs='+', choices=ALL_PLATFORMS, default=None,
+                        help="also generate variants for these platforms (default: \"ai_batch_platforms\")")
+    args = parser.parse_args(argv)
+
+    setup_logging(name="ai-batch")
+    GOVERNOR.configure()
+    paths = args.paths or _read_json(os.path.join(QUEUE_DIR, 'creative_library.json'), [])
+    jobs = AIBatchRunner().run(paths, args.provider, args.poll_interval, args.submit_only, args.force,
+                               args.platforms)
+    for job in jobs:
+        print(f"{job['provider']} batch {job['id']}: {job['status']}"
+              + (f" ({job.get('succeeded', 0)} stored, {job.get('failed', 0)} failed)"
+                 if job['status'] == 'ended' else ""))
+
+
+# --------------------------------------------------------------------
+# BROWSER POOL
+# --------------------------------------------------------------------
+
+# Requests the posting flows never need. "allow_hosts" lists first-party
+# domains (subdomains included); any other host is aborted when set.
+# Override per platform with "network_profiles" in config.json, or turn
+# blocking off with "network_blocking": false.
+DEFAULT_NETWORK_PROFILES = {
+    'X': {
+        'block_types': ['image', 'media', 'font'],
+        # arkoselabs serves the login challenge
+        'allow_hosts': ['x.com', 'twitter.com', 'twimg.com', 'arkoselabs.com'],
+        'block_patterns': ['/jot/', '/client_event', '/live_pipeline/', '/guide.json', '/promoted_content/'],
+    },
+    '*': {
+        'block_types': ['media', 'font'],
+        'allow_hosts': None,
+        'block_patterns': [],
+    },
+}
+
+
+def network_profile(platform, config=None):
+    """Blocking profile for a platform, or None when blocking is switched off."""
+    config = config if config is not None else load_config()
+    if not config.get('network_blocking', True):
+        return None
+    profile = dict(DEFAULT_NETWORK_PROFILES.get(platform) or DEFAULT_NETWORK_PROFILES['*'])
+    profile.update((config.get('network_profiles') or {}).get(platform, {}))
+    if platform == 'X' and profile.get('allow_hosts') is not None:
+        # Keep a custom base URL (e.g. mock_x_server.py) first-party
+        host = urlparse(config.get('x_base_url') or X_BASE_URL).hostname
+        if host:
+            profile['allow_hosts'] = list(profile['allow_hosts']) + [host]
+    return profile
+
+
+def blocked_reason(profile, url, resource_type):
+    """Why `profile` blocks this request ('type', 'host' or 'pattern'), or None to let it through."""
+    if not url.startswith(('http://', 'https://')):
+        return None
+    if resource_type in profile.get('block_types', ()):
+        return 'type'
+    allow_hosts = profile.get('allow_hosts')
+    if allow_hosts is not None:
+        host = urlparse(url).hostname or ''
+        if not any(host == d or host.endswith('.' + d) for d in allow_hosts):
+            return 'host'
+    if any(pattern in url for pattern in profile.get('block_patterns', ())):
+        return 'pattern'
+    return None
+
+
+def apply_network_profile(context, platform, config=None):
+    """Abort the requests a platform's profile blocks on every page of `context`.
+
+    Returns the coroutine that installs the route, or None when blocking is off.
+    """
+    profile = network_profile(platform, config)
+    if not profile:
+        return None
+
+    async def handle(route):
+        request = route.request
+        reason = blocked_reason(profile, request.url, request.resource_type)
+        try:
+            if reason:
+                METRICS.inc('requests_blocked_total', platform=platform, reason=reason)
+                await route.abort()
+            else:
+                await route.continue_()
+        except Exception:
+            pass  # page closed while the request was in flight
+
+    return context.route("**/*", handle)
+
+
+def failure_reason(result):
+    """The error text if a flow result ((ok, info) or a list of them) contains a failure, else None."""
+    if isinstance(result, tuple) and len(result) == 2 and result[0] is False:
+        return str(result[1])
+    if isinstance(result, list):
+        reasons = [str(r[1]) for r in result if isinstance(r, tuple) and len(r) == 2 and r[0] is False]
+        return "; ".join(dict.fromkeys(reasons)) or None
+    return None
+
+
+class FailureCapture:
+    """Playwright trace and screenshots of a browser session, kept only when it fails.
+
+    Every context records a Playwright trace (screencast frames and DOM
+    snapshots) into Playwright's temporary chunk buffer. Each session
+    starts a new chunk; a successful one is discarded, a failed one is
+    written to failures/<time>-<platform>-<account>/ along with a
+    screenshot of each open page and the error. Only the newest `keep`
+    captures, at most `max_mb` in total, are retained.
+    """
+
+    def __init__(self, enabled=True, snapshots=True, keep=20, max_mb=200):
+        self.enabled = enabled
+        self.snapshots = snapshots
+        self.keep = keep
+        self.max_mb = max_mb
+
+    def configure(self, config=None):
+        config = config if config is not None else load_config()
+        settings = config.get('failure_capture') or {}
+        self.enabled = bool(settings.get('enabled', self.enabled))
+        self.snapshots = bool(settings.get('snapshots', self.snapshots))
+        self.keep = int(settings.get('keep', self.keep))
+        self.max_mb = float(settings.get('max_mb', self.max_mb))
+
+    async def attach(self, context):
+        """Start tracing a new context (chunks are opened per session)."""
+        if not self.enabled:
+            return
+        try:
+            await context.tracing.start(screenshots=True, snapshots=self.snapshots)
+            context.failure_tracing = True
+        except Exception as e:
+            log.debug("Could not start Playwright tracing: %s", e)
+
+    async def begin(self, context):
+        if getattr(context, 'failure_tracing', False):
+            try:
+                await context.tracing.start_chunk()
+            except Exception as e:
+                log.debug("Could not start trace chunk: %s", e)
+
+    async def finish(self, context, platform, account, reason):
+        """Drop the session's chunk, or save it with screenshots if `reason` says it failed."""
+        tracing = getattr(context, 'failure_tracing', False)
+        if not reason:
+            if tracing:
+                try:
+                    await context.tracing.stop_chunk()
+                except Exception:
+                    pass
+            return None
+        if not self.enabled:
+            return None
+
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{platform}-{account}")
+        directory = os.path.join(FAILURES_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{safe}")
+        os.makedirs(directory, exist_ok=True)
+        pages = []
+        for n, page in enumerate(context.pages):
+            try:
+                await page.screenshot(path=os.path.join(directory, f"page-{n}.png"), timeout=5000)
+                pages.append(page.url)
+            except Exception:
+                pass
+        if tracing:
+            try:
+                await context.tracing.stop_chunk(path=os.path.join(directory, "trace.zip"))
+            except Exception as e:
+                log.debug("Could not save trace chunk: %s", e)
+        with open(os.path.join(directory, "failure.json"), 'w', encoding='utf-8') as f:
+            json.dump({'platform': platform, 'account': account, 'error': reason, 'pages': pages,
+                       'post_id': TRACER.current_id, 'time': datetime.now().isoformat()}, f, indent=2)
+        METRICS.inc('failure_captures_total', platform=platform)
+        log.warning(f"Saved {platform} failure capture to {directory} "
+                    f"(open with: playwright show-trace {os.path.join(directory, 'trace.zip')})",
+                    extra={'platform': platform, 'account': account})
+        self.prune()
+        return directory
+
+    def prune(self):
+        """Delete the oldest captures beyond `keep` or `max_mb`."""
+        try:
+            captures = sorted(os.path.join(FAILURES_DIR, d) for d in os.listdir(FAILURES_DIR))
+        except OSError:
+            return
+        sizes = {}
+        for path in captures:
+            sizes[path] = sum(os.path.getsize(os.path.join(root, name))
+                              for root, _, names in os.walk(path) for name in names)
+        total = sum(sizes.values())
+        while captures and (len(captures) > self.keep or total > self.max_mb * 1024 * 1024):
+            oldest = captures.pop(0)
+            total -= sizes[oldest]
+            shutil.rmtree(oldest, ignore_errors=True)
+
+
+FAILURE_CAPTURE = FailureCapture()
+
+
+# Chromium flags for small posting servers: every context shares one renderer
+# process and background features that cost memory are switched off
+LOW_MEMORY_CHROMIUM_ARGS = [
+    '--renderer-process-limit=1',
+    '--disable-site-isolation-trials',
+    '--disable-features=site-per-process,IsolateOrigins,Translate,MediaRouter,OptimizationHints',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--mute-audio',
+    '--js-flags=--max-old-space-size=256',
+]
+
+
+class BrowserPool:
+    """Asyncio posting engine: one shared Chromium, an isolated context per (platform, account).
+
+    Playwright's async API runs on an event loop owned by one background
+    thread, so many platform/account sessions post concurrently without a
+    thread each. Work is a coroutine function taking the account's
+    BrowserContext; it runs as a task with a timeout, one at a time per
+    account, and is cancelled by cancelling the Future that submit()
+    returns. run() and call() are the blocking facade for sync callers.
+
+    Contexts are kept warm between posts and their cookies/localStorage
+    are saved to sessions/ so logins survive restarts. Contexts idle
+    longer than `idle_timeout` seconds are closed, and the browser with
+    them once none are left. A context can also hold one warm page
+    (logged in, on the home timeline) left by a pre-warm for the next
+    post to pick up.
+
+    The browser's resident memory (Chromium and the Playwright driver) is
+    sampled after every session and while idle. A context is recycled
+    after `max_context_uses` sessions, the whole browser once it exceeds
+    `max_rss_mb` or has served `max_sessions`; recycling waits until no
+    session is running, and logins survive through the saved session
+    state. `low_memory` launches Chromium with LOW_MEMORY_CHROMIUM_ARGS.
+    """
+
+    def __init__(self, headless=True, idle_timeout=600, task_timeout=240, low_memory=False,
+                 max_rss_mb=None, max_context_uses=50, max_sessions=500):
+        self.headless = headless
+        self.idle_timeout = idle_timeout
+        self.task_timeout = task_timeout
+        self.low_memory = low_memory
+        self.max_rss_mb = max_rss_mb
+        self.max_context_uses = max_context_uses
+        self.max_sessions = max_sessions
+        self.rss_mb = None
+        self._sessions = 0
+        self._recycle_reason = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = None
+        self._account_locks = {}
+        self._contexts = {}  # {(platform, account): {'context': ..., 'last_used': ..., 'busy': ..., 'uses': ...}}
+
+    def configure(self, config=None):
+        """Apply the "browser_memory" settings from config.json (used from the next launch)."""
+        config = config if config is not None else load_config()
+        settings = config.get('browser_memory') or {}
+        self.low_memory = bool(settings.get('low_memory', self.low_memory))
+        self.max_rss_mb = settings.get('max_rss_mb', self.max_rss_mb)
+        self.max_context_uses = settings.get('max_context_uses', self.max_context_uses)
+        self.max_sessions = settings.get('max_sessions', self.max_sessions)
+
+    @staticmethod
+    def session_path(platform, account):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{platform}-{account}")
+        return os.path.join(SESSIONS_DIR, f"{safe}.json")
+
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop; returns a concurrent.futures.Future.
+
+        Cancelling the Future cancels the task. The caller's trace id follows
+        the coroutine onto the loop.
+        """
+        trace_id = TRACER.current_id
+
+        async def traced():
+            TRACER.adopt(trace_id)
+            return await coro
+
+        return asyncio.run_coroutine_threadsafe(traced(), self._ensure_loop())
+
+    def call(self, coro, timeout=None):
+        """Run a coroutine on the engine loop and block until it finishes."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def run(self, platform, account, fn, timeout=None):
+        """Run async fn(context) for an account and return its result (sync facade)."""
+        timeout = timeout or self.task_timeout
+        # The task enforces `timeout`; the margin only guards against a wedged loop
+        return self.call(self.session(platform, account, fn, timeout), timeout + 30)
+
+    async def session(self, platform, account, fn, timeout=None):
+        """Await fn(context) with the account's context, one task per account at a time."""
+        account = account or DEFAULT_ACCOUNT
+        key = (platform, account)
+        timeout = timeout or self.task_timeout
+        lock = self._account_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            with TRACER.span('browser_pool.run', cat="browser", platform=platform, account=account):
+                context = await self._context(platform, account)
+                entry = self._contexts[key]
+                entry['busy'] = True
+                await FAILURE_CAPTURE.begin(context)
+                reason = "task raised"
+                try:
+                    result = await asyncio.wait_for(fn(context), timeout)
+                    reason = failure_reason(result)
+                    return result
+                except asyncio.CancelledError:
+                    # The caller gave up (e.g. shutdown); not a failure worth capturing
+                    reason = None
+                    raise
+                except asyncio.TimeoutError:
+                    reason = f"{platform} task timed out after {timeout:.0f}s"
+                    METRICS.inc('browser_task_timeouts_total', platform=platform)
+                    raise TimeoutError(reason) from None
+                except Exception as e:
+                    reason = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    try:
+                        await FAILURE_CAPTURE.finish(context, platform, account, reason)
+                    except Exception as e:
+                        log.debug("Failure capture failed: %s", e)
+                    await self.close_failed_pages(platform, account)
+                    entry['busy'] = False
+                    entry['last_used'] = time.monotonic()
+                    entry['uses'] += 1
+                    self._sessions += 1
+                    await self._save_session(platform, account)
+                    await self._check_memory(key)
+
+    async def release_page(self, platform, account, page, ok):
+        """Close a flow's page, or keep it open until the session's failure capture when not ok."""
+        entry = self._contexts.get((platform, account))
+        if not ok and entry is not None and FAILURE_CAPTURE.enabled:
+            entry.setdefault('failed_pages', []).append(page)
+            return
+        try:
+            await page.close()
+        except Exception:
+            pass
+
+    async def close_failed_pages(self, platform, account):
+        entry = self._contexts.get((platform, account))
+        for page in (entry or {}).pop('failed_pages', []):
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """Close every context and the browser, then stop the engine loop."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(30)
+        except Exception as e:
+            log.debug("Browser pool shutdown: %s", e)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=10)
+
+    def stats(self):
+        return {
+            'browser_running': self._browser is not None,
+            'low_memory': self.low_memory,
+            'rss_mb': round(self.rss_mb, 1) if self.rss_mb is not None else None,
+            'sessions': self._sessions,
+            'contexts': {f"{p}/{a}": entry['uses'] for (p, a), entry in sorted(self._contexts.items())},
+        }
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run_loop, args=(self._loop, ready),
+                                                name="browser-pool", daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    def _run_loop(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        # Locks and Playwright objects belong to this loop; a restarted loop starts clean
+        self._launch_lock = asyncio.Lock()
+        self._account_locks = {}
+        self._contexts = {}
+        self._playwright = self._browser = None
+        self._sessions = 0
+        self._recycle_reason = None
+        tasks = [loop.create_task(self._idle_loop()), loop.create_task(self._flush_loop())]
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    async def _idle_loop(self):
+        while True:
+            await asyncio.sleep(30)
+            await self._close_idle()
+            await self._check_memory()
+
+    async def _flush_loop(self, interval=10):
+        """Write learned selector stats and step latencies from a worker thread, never inside a posting flow."""
+        while True:
+            await asyncio.sleep(interval)
+            for registry in (SELECTORS, TIMEOUTS):
+                try:
+                    await asyncio.to_thread(registry.save_if_due)
+                except Exception as e:
+                    log.debug("Flushing %s failed: %s", type(registry).__name__, e)
+
+    async def _context(self, platform, account):
+        key = (platform, account)
+        entry = self._contexts.get(key)
+        if entry is None:
+            # Held while the context opens too, so a browser recycle can't close it midway
+            async with self._launch_lock:
+                if self._browser is None or not self._browser.is_connected():
+                    with METRICS.timer('post_stage_seconds', platform=platform, stage='browser_launch'), \
+                            TRACER.span('browser_launch', cat="browser", low_memory=self.low_memory):
+                        if self._playwright is None:
+                            self._playwright = await async_playwright().start()
+                        args = LOW_MEMORY_CHROMIUM_ARGS if self.low_memory else []
+                        self._browser = await self._playwright.chromium.launch(headless=self.headless, args=args)
+                    METRICS.inc('browser_launches_total')
+                options = {'viewport': {"width": 1280, "height": 720}}
+                state_path = self.session_path(platform, account)
+                if os.path.exists(state_path):
+                    options['storage_state'] = state_path
+                with METRICS.timer('post_stage_seconds', platform=platform, stage='context_open'):
+                    entry = {'context': await self._browser.new_context(**options), 'busy': False, 'uses': 0}
+                    install = apply_network_profile(entry['context'], platform)
+                    if install is not None:
+                        await install
+                    await FAILURE_CAPTURE.attach(entry['context'])
+                self._contexts[key] = entry
+                METRICS.inc('browser_contexts_opened_total', platform=platform)
+                METRICS.set('browser_contexts_open', len(self._contexts))
+        entry['last_used'] = time.monotonic()
+        return entry['context']
+
+    async def keep_warm_page(self, platform, account, page):
+        """Park a ready page on the account's context for the next post (engine loop only)."""
+        entry = self._contexts.get((platform, account))
+        if entry is None:
+            return
+        previous = entry.get('warm_page')
+        if previous is not None and previous is not page:
+            try:
+                await previous.close()
+            except Exception:
+                pass
+        entry['warm_page'] = page
+
+    def take_warm_page(self, platform, account):
+        """Return and forget the account's warm page, or None (engine loop only)."""
+        entry = self._contexts.get((platform, account))
+        page = entry.pop('warm_page', None) if entry else None
+        if page is not None and page.is_closed():
+            return None
+        return page
+
+    async def _save_session(self, platform, account):
+        entry = self._contexts.get((platform, account))
+        if not entry:
+            return
+        try:
+            os.makedirs(SESSIONS_DIR, exist_ok=True)
+            await entry['context'].storage_state(path=self.session_path(platform, account))
+        except Exception as e:
+            log.debug("Could not save session state: %s", e, extra={'platform': platform, 'account': account})
+
+    async def _close_context(self, key):
+        entry = self._contexts.pop(key, None)
+        METRICS.set('browser_contexts_open', len(self._contexts))
+        if entry:
+            try:
+                await entry['context'].close()
+            except Exception:
+                pass
+
+    def sample_memory(self):
+        """Sample the browser's resident memory in MB into `rss_mb` and the metrics."""
+        if self._browser is None:
+            self.rss_mb = None
+            return None
+        self.rss_mb = process_rss_mb(os.getpid(), children_only=True)
+        if self.rss_mb is not None:
+            METRICS.set('browser_rss_mb', round(self.rss_mb, 1))
+        return self.rss_mb
+
+    async def _check_memory(self, key=None):
+        """Recycle the context `key` or the whole browser once past their limits."""
+        entry = self._contexts.get(key)
+        if entry is not None and not entry['busy'] and self.max_context_uses \
+                and entry['uses'] >= self.max_context_uses:
+            platform, account = key
+            await self._close_context(key)
+            METRICS.inc('browser_context_recycles_total', platform=platform, reason='uses')
+            log.info(f"Recycled {platform} context after {entry['uses']} sessions",
+                     extra={'platform': platform, 'account': account})
+
+        rss = self.sample_memory()
+        if self.max_rss_mb and rss and rss > self.max_rss_mb:
+            self._recycle_reason = self._recycle_reason or 'rss'
+        elif self.max_sessions and self._sessions >= self.max_sessions:
+            self._recycle_reason = self._recycle_reason or 'sessions'
+        if self._recycle_reason and not any(e['busy'] for e in self._contexts.values()):
+            await self._recycle_browser()
+
+    async def _recycle_browser(self):
+        reason, rss = self._recycle_reason, self.rss_mb
+        async with self._launch_lock:
+            if any(e['busy'] for e in self._contexts.values()):
+                return
+            for key in list(self._contexts):
+                await self._close_context(key)
+            await self._close_browser()
+        self._recycle_reason = None
+        METRICS.inc('browser_recycles_total', reason=reason)
+        log.info(f"Recycled browser ({reason}, {rss:.0f} MB)" if rss else f"Recycled browser ({reason})")
+
+    async def _close_browser(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+            self._sessions = 0
+            self.rss_mb = None
+            METRICS.set('browser_rss_mb', 0)
+
+    async def _close_idle(self):
+        now = time.monotonic()
+        for key, entry in list(self._contexts.items()):
+            if not entry['busy'] and now - entry['last_used'] > self.idle_timeout:
+                await self._close_context(key)
+        if not self._contexts:
+            await self._close_browser()
+
+    async def _shutdown(self):
+        for key in list(self._contexts):
+            await self._close_context(key)
+        await self._close_browser()
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+BROWSER_POOL = BrowserPool()
+
+
+# --------------------------------------------------------------------
+# POSTING PROCESSES
+# --------------------------------------------------------------------
+
+# Module paths a posting process inherits from its parent (tests and tools patch these)
+_PROCESS_SETTINGS = ('CONFIG_FILE', 'QUEUE_DIR', 'POSTED_DIR', 'METRICS_DIR', 'LOG_DIR',
+                     'TRACE_DIR', 'SESSIONS_DIR', 'SELECTOR_CACHE_FILE', 'LATENCY_FILE', 'FAILURES_DIR')
+
+
+def process_rss_mb(pid, children_only=False):
+    """Resident memory of `pid` plus its children (Playwright driver, Chromium) in MB.
+
+    With `children_only` the process itself is left out, which is what the
+    browser costs. Uses psutil when installed, /proc otherwise; None if
+    neither works.
+    """
+    if PSUTIL_AVAILABLE:
+        try:
+            proc = psutil.Process(pid)
+            total = 0 if children_only else proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    try:
+        children = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'r') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except (OSError, ValueError, IndexError):
+                pass
+        page_size = os.sysconf('SC_PAGE_SIZE')
+        total, pending = 0, [pid]
+        while pending:
+            current = pending.pop()
+            pending.extend(children.get(current, []))
+            if children_only and current == pid:
+                continue
+            try:
+                with open(f'/proc/{current}/statm', 'r') as f:
+                    total += int(f.read().split()[1]) * page_size
+            except (OSError, ValueError, IndexError):
+                pass
+        return total / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _posting_process_main(conn, slot, settings):
+    """Entry point of a posting process: run post jobs from `conn` until told to stop."""
+    globals().update(settings.get('paths', {}))
+    if hasattr(os, 'setsid'):
+        os.setsid()  # own process group, so killing it takes Chromium down too
+    setup_logging(name=f"posting-{slot}")
+    TRACER.enabled = settings.get('tracing', True)
+    TIMEOUTS.configure()
+    FAILURE_CAPTURE.configure()
+    BROWSER_POOL.configure()
+    send_lock = threading.Lock()
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except (EOFError, OSError):
+                break
+            if job is None:
+                break
+            finished = {}
+
+            def progress(index, item_result):
+                # Sent as each batch item finishes, so the parent keeps them if this process dies
+                finished[index] = item_result
+                with send_lock:
+                    conn.send({'progress': index, 'item': item_result})
+
+            with TRACER.span('posting_process.job', post_id=job.get('trace_id'), cat="browser",
+                             slot=slot, platform=job['platform'], account=job['account']):
+                try:
+                    if job['action'] == 'warm':
+                        result = _dispatch_warm(job['platform'], job['account'])
+                    elif job['action'] == 'batch':
+                        result = _dispatch_batch(job['platform'], job['items'], job['account'], job['spacing'],
+                                                 on_result=progress)
+                    else:
+                        result = _dispatch_post(job['platform'], job['text'], job['image_path'], job['account'])
+                except Exception as e:
+                    log.exception("Posting job failed: %s", e, extra={'platform': job['platform']})
+                    result = (False, f"{job['platform']}: {e}")
+                    if job['action'] == 'batch':
+                        result = _partial_results(len(job['items']), dict(finished), result[1])
+            try:
+                METRICS.write_files(name=f"posting-{slot}")
+            except OSError:
+                pass
+            with send_lock:
+                conn.send({'result': result, 'rss_mb': process_rss_mb(os.getpid()),
+                           'browser_rss_mb': BROWSER_POOL.rss_mb})
+    finally:
+        BROWSER_POOL.close()
+        SELECTORS.save()
+        TIMEOUTS.save()
+
+
+class PostingProcessPool:
+    """Supervised worker processes that run the browser posting flows.
+
+    A hung, crashed or leaking Chromium then only costs a worker process,
+    never the GUI or the scheduler. Every job has a timeout after which
+    its process (and browser) is killed; a process over `max_rss_mb`
+    (Chromium included) or past `max_jobs` is recycled after its job and
+    killed outright above `hard_rss_mb`. Dead processes are restarted on
+    the next job. Jobs for one (platform, account) always go to the same
+    process so its warm browser context and login are reused.
+
+    A process runs one job at a time, so at most `processes` (the
+    posting_processes setting) sessions post at once; accounts that hash
+    to the same process wait for each other.
+    """
+
+    def __init__(self, processes=2, timeout=300, max_rss_mb=1024, hard_rss_mb=None,
+                 max_jobs=100, check_interval=5.0):
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.hard_rss_mb = hard_rss_mb
+        self.max_jobs = max_jobs
+        self.check_interval = check_interval
+        self._mp = multiprocessing.get_context('spawn')
+        self._slots = []
+        self.resize(processes)
+
+    @property
+    def enabled(self):
+        return bool(self._slots)
+
+    def configure(self, config=None):
+        """Apply the posting_* settings from config.json."""
+        config = config if config is not None else load_config()
+        self.timeout = float(config.get('posting_timeout', self.timeout))
+        self.max_rss_mb = float(config.get('posting_max_rss_mb', self.max_rss_mb))
+        hard_rss_mb = config.get('posting_hard_rss_mb', self.hard_rss_mb)
+        self.hard_rss_mb = float(hard_rss_mb) if hard_rss_mb else None
+        self.max_jobs = int(config.get('posting_max_jobs', self.max_jobs))
+        self.resize(int(config.get('posting_processes', len(self._slots))))
+
+    def resize(self, processes):
+        """Set the number of posting processes; 0 posts in-process as before."""
+        if processes == len(self._slots):
+            return
+        self.close()
+        self._slots = [{'lock': threading.Lock(), 'process': None, 'conn': None, 'jobs': 0, 'rss_mb': None,
+                        'browser_rss_mb': None} for _ in range(max(0, processes))]
+
+    def slot_for(self, platform, account):
+        return zlib.crc32(f"{platform}/{account}".encode('utf-8')) % len(self._slots)
+
+    def run(self, platform, text, image_path=None, account=DEFAULT_ACCOUNT, timeout=None):
+        """Post in a worker process and return (ok, info) like the post_to_* functions."""
+        return self._submit({'action': 'post', 'platform': platform, 'text': text,
+                             'image_path': image_path, 'account': account or DEFAULT_ACCOUNT}, timeout)
+
+    def warm(self, platform, account=DEFAULT_ACCOUNT, timeout=None):
+        """Pre-warm the account's browser session in the process that will post for it."""
+        return self._submit({'action': 'warm', 'platform': platform, 'account': account or DEFAULT_ACCOUNT},
+                            timeout)
+
+    def batch(self, platform, items, account=DEFAULT_ACCOUNT, spacing=0, timeout=None):
+        """Publish several posts for one account in one process and session.
+
+        `items` are dicts with text, image_path and post_id; returns one
+        (ok, info) per item. The timeout is per item. If the process times
+        out or dies, items it reported as finished keep their results and
+        only the rest fail.
+        """
+        timeout = (timeout or self.timeout) * len(items) + spacing * len(items)
+        return self._submit({'action': 'batch', 'platform': platform, 'items': items,
+                             'account': account or DEFAULT_ACCOUNT, 'spacing': spacing}, timeout)
+
+    def _submit(self, job, timeout=None):
+        platform, account = job['platform'], job['account']
+        index = self.slot_for(platform, account)
+        slot = self._slots[index]
+        timeout = timeout or self.timeout
+        job['trace_id'] = TRACER.current_id
+        context = {'platform': platform, 'account': account}
+        finished = {}  # batch items the process has reported
+
+        def failed(info):
+            if job['action'] == 'batch':
+                return _partial_results(len(job['items']), finished, info)
+            return False, info
+
+        with slot['lock']:
+            try:
+                self._ensure(index)
+            except Exception as e:
+                log.error("Could not start posting process %s: %s", index, e, extra=context)
+                return failed(f"{platform}: could not start posting process: {e}")
+
+            process, conn = slot['process'], slot['conn']
+            try:
+                conn.send(job)
+                deadline = time.monotonic() + timeout
+                while True:
+                    if conn.poll(min(self.check_interval, max(0.0, deadline - time.monotonic()))):
+                        result = conn.recv()
+                        if 'progress' not in result:
+                            break
+                        finished[result['progress']] = tuple(result['item'])
+                        continue
+                    if time.monotonic() >= deadline:
+                        self._kill(index, 'timeout')
+                        log.warning(f"Posting to {platform} timed out after {timeout:.0f}s; process killed",
+                                    extra=context)
+                        return failed(f"{platform}: posting timed out after {timeout:.0f}s")
+                    rss = process_rss_mb(process.pid)
+                    if self.hard_rss_mb and rss and rss > self.hard_rss_mb:
+                        self._kill(index, 'rss')
+                        log.warning(f"Posting process {index} used {rss:.0f} MB; killed", extra=context)
+                        return failed(f"{platform}: posting process exceeded {self.hard_rss_mb:.0f} MB")
+            except (EOFError, OSError):
+                process.join(timeout=1)
+                code = process.exitcode
+                self._kill(index, 'crash')
+                log.error(f"Posting process {index} died (exit code {code})", extra=context)
+                return failed(f"{platform}: posting process crashed (exit code {code})")
+
+            slot['jobs'] += 1
+            slot['rss_mb'] = result.get('rss_mb')
+            slot['browser_rss_mb'] = result.get('browser_rss_mb')
+            if slot['rss_mb'] is not None:
+                METRICS.set('posting_process_rss_mb', round(slot['rss_mb'], 1), slot=str(index))
+            if slot['browser_rss_mb'] is not None:
+                METRICS.set('posting_browser_rss_mb', round(slot['browser_rss_mb'], 1), slot=str(index))
+            if self.max_rss_mb and slot['rss_mb'] and slot['rss_mb'] > self.max_rss_mb:
+                log.info(f"Recycling posting process {index} at {slot['rss_mb']:.0f} MB", extra=context)
+                self._stop(index, 'rss')
+            elif self.max_jobs and slot['jobs'] >= self.max_jobs:
+                self._stop(index, 'max_jobs')
+            return result['result']
+
+    def close(self):
+        """Stop every posting process."""
+        for index, slot in enumerate(self._slots):
+            with slot['lock']:
+                self._stop(index, None)
+
+    def stats(self):
+        return [{
+            'slot': index,
+            'pid': slot['process'].pid if slot['process'] else None,
+            'alive': bool(slot['process'] and slot['process'].is_alive()),
+            'jobs': slot['jobs'],
+            'rss_mb': round(slot['rss_mb'], 1) if slot['rss_mb'] else None,
+            'browser_rss_mb': round(slot['browser_rss_mb'], 1) if slot['browser_rss_mb'] else None,
+        } for index, slot in enumerate(self._slots)]
+
+    def _ensure(self, index):
+        slot = self._slots[index]
+        if slot['process'] is not None and slot['process'].is_alive():
+            return
+        if slot['process'] is not None:
+            self._kill(index, 'died')
+        settings = {
+            'paths': {name: globals()[name] for name in _PROCESS_SETTINGS},
+            'tracing': TRACER.enabled,
+        }
+        parent_conn, child_conn = self._mp.Pipe()
+        process = self._mp.Process(target=_posting_process_main, args=(child_conn, index, settings),
+                                   name=f"posting-{index}", daemon=True)
+        process.start()
+        child_conn.close()
+        slot.update(process=process, conn=parent_conn, jobs=0, rss_mb=None, browser_rss_mb=None)
+        METRICS.inc('posting_process_starts_total')
+        log.debug(f"Started posting process {index} (pid {process.pid})")
+
+    def _stop(self, index, reason):
+        """Ask a process to finish (closing its browser cleanly), killing it if it won't."""
+        slot = self._slots[index]
+        process = slot['process']
+        if process is None:
+            return
+        try:
+            slot['conn'].send(None)
+        except (OSError, ValueError):
+            pass
+        process.join(timeout=15)
+        self._kill(index, reason)
+
+    def _kill(self, index, reason):
+        slot = self._slots[index]
+        process = slot['process']
+        if process is not None and process.is_alive():
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (AttributeError, OSError):
+                process.kill()
+            process.join(timeout=5)
+        if slot['conn'] is not None:
+            slot['conn'].close()
+        slot.update(process=None, conn=None)
+        if reason:
+            METRICS.inc('posting_process_restarts_total', reason=reason)
+
+
+POSTING_POOL = PostingProcessPool()
+
+
+# --------------------------------------------------------------------
+# SELECTOR CACHE
+# --------------------------------------------------------------------
+
+class SelectorRegistry:
+    """Learns which of an adapter's fallback selectors currently match.
+
+    Each (platform, role) lists candidate selectors in preference order.
+    The one that matched most recently is tried first next time, and a
+    selector that misses `demote_after` times in a row drops behind the
+    others until it matches again, so the flows stay fast as a site's DOM
+    drifts. Stats persist to selector_cache.json, merged on save so
+    posting processes share what they learn; recording only marks them
+    dirty, the engine's flush task and shutdown write them.
+    """
+
+    def __init__(self, path=None, demote_after=3, save_interval=30.0):
+        self.path = path
+        self.demote_after = demote_after
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._entries = None  # {platform: {role: {selector: stats}}}
+        self._dirty = False
+        self._last_save = 0.0
+
+    def _file(self):
+        return self.path or SELECTOR_CACHE_FILE
+
+    def _read(self):
+        try:
+            with open(self._file(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def ordered(self, platform, role, candidates):
+        """Candidates in the order they should be tried."""
+        with self._lock:
+            stats = dict(self._load().get(platform, {}).get(role, {}))
+
+        def rank(item):
+            index, selector = item
+            entry = stats.get(selector, {})
+            demoted = entry.get('streak', 0) >= self.demote_after
+            return demoted, -(entry.get('last_hit') or 0), index
+
+        return [selector for _, selector in sorted(enumerate(candidates), key=rank)]
+
+    def combined(self, platform, role, candidates):
+        """One comma-joined selector, best first, for waits that accept any candidate."""
+        return ", ".join(self.ordered(platform, role, candidates))
+
+    def record(self, platform, role, selector, found):
+        with self._lock:
+            entry = self._load().setdefault(platform, {}).setdefault(role, {}).setdefault(
+                selector, {'hits': 0, 'misses': 0, 'streak': 0, 'last_hit': None})
+            now = time.time()
+            if found:
+                entry['hits'] += 1
+                entry['streak'] = 0
+                entry['last_hit'] = now
+            else:
+                entry['misses'] += 1
+                entry['streak'] += 1
+            entry['updated'] = now
+            self._dirty = True
+        METRICS.inc('selector_checks_total', platform=platform, role=role, outcome='hit' if found else 'miss')
+
+    def save_if_due(self):
+        """Save once `save_interval` has passed since the last save (BrowserPool's flush task)."""
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    async def query(self, page, platform, role, candidates):
+        """First element matching one of the role's candidates, best-known first; None if none match."""
+        for position, selector in enumerate(self.ordered(platform, role, candidates)):
+            element = await page.query_selector(selector)
+            self.record(platform, role, selector, element is not None)
+            if element is not None:
+                if position:
+                    METRICS.inc('selector_fallbacks_total', platform=platform, role=role)
+                return element
+        return None
+
+    def stats(self):
+        with self._lock:
+            return json.loads(json.dumps(self._load()))
+
+    def save(self):
+        """Merge our stats into the cache file (newest entry wins) and write it atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = self._read()
+            for platform, roles in self._load().items():
+                for role, selectors in roles.items():
+                    target = merged.setdefault(platform, {}).setdefault(role, {})
+                    for selector, entry in selectors.items():
+                        if entry.get('updated', 0) >= target.get(selector, {}).get('updated', 0):
+                            target[selector] = entry
+            self._entries = merged
+            self._dirty = False
+            self._last_save = time.monotonic()
+            path = self._file()
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f, indent=2)
+                os.replace(tmp, path)
+            except OSError as e:
+                log.debug("Could not save selector cache: %s", e)
+
+
+SELECTORS = SelectorRegistry()
+
+
+# --------------------------------------------------------------------
+# ADAPTIVE TIMEOUTS
+# --------------------------------------------------------------------
+
+class AdaptiveTimeouts:
+    """Browser step timeouts derived from each step's recent latencies.
+
+    A step's timeout is `multiplier` x the p99 of its last `window`
+    runs, clamped between `floor` seconds and `ceiling_factor` x the
+    flow's fixed default. A broken login therefore fails in seconds
+    instead of a minute, while a slow but healthy day gets more headroom.
+    A run that times out counts as a sample at the timeout it was given
+    (it took at least that long), so a site that slows down past the
+    learned value pushes the timeout up towards the ceiling instead of
+    failing at it forever. Until `min_samples` runs are recorded the
+    fixed default applies. Samples persist to latency_history.json
+    (merged on save, like the selector cache) so posting processes start
+    warm; the engine's flush task and shutdown write them.
+    """
+
+    def __init__(self, path=None, multiplier=3.0, floor=3.0, ceiling_factor=2.0, window=200,
+                 min_samples=20, save_interval=60.0):
+        self.path = path
+        self.multiplier = multiplier
+        self.floor = floor
+        self.ceiling_factor = ceiling_factor
+        self.window = window
+        self.min_samples = min_samples
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._samples = None  # {"platform/step": [seconds, ...]}
+        self._new = {}
+        self._last_save = 0.0
+
+    def configure(self, config=None):
+        config = config if config is not None else load_config()
+        settings = config.get('adaptive_timeouts') or {}
+        self.multiplier = float(settings.get('multiplier', self.multiplier))
+        self.floor = float(settings.get('floor_seconds', self.floor))
+        self.ceiling_factor = float(settings.get('ceiling_factor', self.ceiling_factor))
+        self.min_samples = int(settings.get('min_samples', self.min_samples))
+
+    def _file(self):
+        return self.path or LATENCY_FILE
+
+    def _read(self):
+        try:
+            with open(self._file(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        if self._samples is None:
+            self._samples = self._read()
+        return self._samples
+
+    def timeout_ms(self, platform, step, default_ms):
+        """Timeout in milliseconds for one run of a step."""
+        with self._lock:
+            samples = sorted(self._load().get(f"{platform}/{step}", ()))
+        if len(samples) < self.min_samples:
+            return default_ms
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        seconds = min(max(p99 * self.multiplier, self.floor), default_ms / 1000 * self.ceiling_factor)
+        return int(seconds * 1000)
+
+    def observe(self, platform, step, seconds):
+        key = f"{platform}/{step}"
+        with self._lock:
+            samples = self._load().setdefault(key, [])
+            samples.append(round(seconds, 4))
+            del samples[:-self.window]
+            self._new.setdefault(key, []).append(round(seconds, 4))
+        METRICS.observe('browser_step_seconds', seconds, platform=platform, step=step)
+
+    def save_if_due(self):
+        """Save once `save_interval` has passed since the last save (BrowserPool's flush task)."""
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    async def run(self, platform, step, default_ms, action):
+        """Await action(timeout_ms) under the step's adaptive timeout and record its latency.
+
+        A timeout is recorded as a (censored) sample at the timeout itself.
+        Other failures are not recorded, so a step that errors out fast
+        does not shrink the timeout.
+        """
+        timeout = self.timeout_ms(platform, step, default_ms)
+        start = time.perf_counter()
+        try:
+            result = await action(timeout)
+        except PlaywrightTimeoutError:
+            METRICS.inc('browser_step_timeouts_total', platform=platform, step=step)
+            log.info(f"{platform} step {step} timed out after {timeout / 1000:.1f}s", extra={'platform': platform})
+            self.observe(platform, step, max(timeout / 1000, time.perf_counter() - start))
+            raise
+        self.observe(platform, step, time.perf_counter() - start)
+        return result
+
+    def stats(self, platform=None):
+        """{"platform/step": {samples, p50, p99, timeout_s}} for the recorded steps."""
+        with self._lock:
+            snapshot = {k: sorted(v) for k, v in self._load().items()
+                        if platform is None or k.startswith(f"{platform}/")}
+        result = {}
+        for key, samples in snapshot.items():
+            if not samples:
+                continue
+            result[key] = {
+                'samples': len(samples),
+                'p50': samples[len(samples) // 2],
+                'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+            }
+        return result
+
+    def save(self):
+        """Add this process's new samples to the history file and write it atomically."""
+        with self._lock:
+            self._last_save = time.monotonic()
+            if not self._new:
+                return
+            merged = self._read()
+            for key, samples in self._new.items():
+                merged[key] = (merged.get(key, []) + samples)[-self.window:]
+            self._samples = merged
+            self._new = {}
+            path = self._file()
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f)
+                os.replace(tmp, path)
+            except OSError as e:
+                log.debug("Could not save latency history: %s", e)
+
+
+TIMEOUTS = AdaptiveTimeouts()
+
+
+# --------------------------------------------------------------------
+# PLATFORM POSTING FUNCTIONS
+# --------------------------------------------------------------------
+
+# Fallback selectors per element, in preference order; SELECTORS learns which currently match
+X_SELECTORS = {
+    'username': ('input[name="text"]', 'input[autocomplete="username"]'),
+    'new_post': ('a[aria-label="Post"]', 'a[data-testid="SideNav_NewPost_Button"]'),
+    'composer': ('div[aria-label="Post text"]', 'div[data-testid="tweetTextarea_0"]'),
+    'file_input': ('input[type="file"]',),
+    'post_button': ('div[data-testid="tweetButtonInline"]', 'div[data-testid="tweetButton"]',
+                    'button[data-testid="tweetButtonInline"]'),
+}
+
+
+def _x_any(*roles):
+    """Comma-joined selector matching any candidate of the given roles."""
+    return ", ".join(SELECTORS.combined('X', role, X_SELECTORS[role]) for role in roles)
+
+
+async def _x_find(page, role):
+    return await SELECTORS.query(page, 'X', role, X_SELECTORS[role])
+
+
+async def _x_step(step, default_ms, action):
+    """Run one X browser step under its adaptive timeout (see TIMEOUTS)."""
+    return await TIMEOUTS.run('X', step, default_ms, action)
+
+
+async def _x_session_active(page, base_url):
+    """Open the home timeline; True if the saved session is still logged in."""
+    await _x_step('goto_home', 60000, lambda t: page.goto(f"{base_url}/home", timeout=t))
+    await _x_step('home_ready', 30000, lambda t: page.wait_for_selector(
+        _x_any('new_post', 'composer', 'username'), timeout=t))
+    return await page.query_selector(_x_any('username')) is None
+
+
+async def _x_login(page, base_url, username, password):
+    """Run the X login flow on `page`. Returns (ok, error message)."""
+    await _x_step('goto_login', 60000, lambda t: page.goto(f"{base_url}/login", timeout=t))
+
+    try:
+        await _x_step('username_field', 30000, lambda t: page.wait_for_selector(_x_any('username'), timeout=t))
+        username_box = await _x_find(page, 'username')
+        await username_box.fill(username)
+        await username_box.press("Enter")
+    except Exception as e:
+        return False, f"X login: username field error: {e}"
+
+    try:
+        await _x_step('password_field', 30000, lambda t: page.wait_for_selector('input[name="password"]', timeout=t))
+        await page.fill('input[name="password"]', password)
+        await page.press('input[name="password"]', "Enter")
+    except Exception as e:
+        return False, f"X login: password field error: {e}"
+
+    try:
+        await _x_step('login_redirect', 60000, lambda t: page.wait_for_url(f"{base_url}/home", timeout=t))
+    except Exception:
+        await _x_step('login_idle', 60000, lambda t: page.wait_for_load_state("networkidle", timeout=t))
+    return True, None
+
+
+# Attachments are present, none is still uploading and the post button is enabled again
+X_UPLOAD_SETTLED_JS = """() => {
+    const box = document.querySelector('[data-testid="attachments"]');
+    if (!box || !box.children.length) return false;
+    if (box.querySelector('[role="progressbar"], [data-testid="attachmentProgress"]')) return false;
+    const btn = document.querySelector('[data-testid="tweetButtonInline"], [data-testid="tweetButton"]');
+    return !btn || btn.getAttribute('aria-disabled') !== 'true';
+}"""
+
+# The composer is gone or has been emptied once the post went through
+X_COMPOSER_CLEARED_JS = """() => {
+    const box = document.querySelector('[data-testid="tweetTextarea_0"]');
+    return !box || !box.innerText.trim();
+}"""
+
+
+def _x_upload_timeout(path):
+    """Milliseconds to allow for a media upload: 30s plus 5s per MB, capped at 10 minutes."""
+    try:
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+    except OSError:
+        size_mb = 0
+    return int(min(600, 30 + 5 * size_mb) * 1000)
+
+
+def _x_is_create_post(response):
+    return response.request.method == "POST" and "/CreateTweet" in response.url
+
+
+def _x_created_post_id(payload):
+    """Pull the new post's id out of a CreateTweet GraphQL response, or None."""
+    try:
+        return payload['data']['create_tweet']['tweet_results']['result']['rest_id']
+    except (KeyError, TypeError):
+        return None
+
+
+async def _x_page_ready(page, base_url):
+    """True if a pre-warmed page is still on the home timeline with the composer available."""
+    try:
+        return page.url.startswith(f"{base_url}/home") and await page.query_selector(
+            _x_any('new_post', 'composer')
+        ) is not None
+    except Exception:
+        return False
+
+
+def _x_settings(account):
+    """Return (username, password, base_url, error) for an X account."""
+    config = load_config()
+    creds = get_account('X', account, config)
+    username = creds.get('x_username', '')
+    password = creds.get('x_password', '')
+    base_url = (config.get('x_base_url') or X_BASE_URL).rstrip('/')
+
+    if not username or not password:
+        if account == DEFAULT_ACCOUNT:
+            return username, password, base_url, "X credentials not configured. Please set them in Settings."
+        return username, password, base_url, \
+            f"X account '{account}' not configured. Please add it in Settings > Accounts."
+    return username, password, base_url, None
+
+
+@contextmanager
+def _x_stage(name):
+    with METRICS.timer('post_stage_seconds', platform='X', stage=name), \
+            TRACER.span(f"x.{name}", cat="browser", platform='X'):
+        yield
+
+
+async def warm_x_async(account=DEFAULT_ACCOUNT):
+    """Launch the browser, restore or establish the X session and park a page on /home."""
+    username, password, base_url, error = _x_settings(account)
+    if error:
+        return False, error
+
+    async def flow(context):
+        page = BROWSER_POOL.take_warm_page('X', account)
+        if page is not None and await _x_page_ready(page, base_url):
+            await BROWSER_POOL.keep_warm_page('X', account, page)
+            return True, "X session already warm"
+        page = page or await context.new_page()
+        try:
+            with _x_stage('login'):
+                if not await _x_session_active(page, base_url):
+                    METRICS.inc('logins_total', platform='X')
+                    ok, error = await _x_login(page, base_url, username, password)
+                    if not ok:
+                        await BROWSER_POOL.release_page('X', account, page, False)
+                        return False, error
+        except BaseException:
+            await BROWSER_POOL.release_page('X', account, page, False)
+            raise
+        await BROWSER_POOL.keep_warm_page('X', account, page)
+        return True, "X session warm"
+
+    try:
+        return await BROWSER_POOL.session('X', account, flow)
+    except Exception as e:
+        return False, f"X Playwright error: {e}"
+
+
+def warm_x(account=DEFAULT_ACCOUNT):
+    """Sync facade over warm_x_async()."""
+    return BROWSER_POOL.call(warm_x_async(account), BROWSER_POOL.task_timeout + 30)
+
+
+async def _x_open_page(context, account, base_url, username, password):
+    """Return (page, error): the warm page if still usable, else a fresh page logged in on /home."""
+    page = BROWSER_POOL.take_warm_page('X', account)
+    warm = page is not None and await _x_page_ready(page, base_url)
+    if page is not None and not warm:
+        await page.close()
+        page = None
+    METRICS.inc('prewarm_hits_total' if warm else 'prewarm_misses_total', platform='X')
+    if warm:
+        TRACER.instant('x.warm_page', cat="browser", platform='X')
+        return page, None
+
+    page = await context.new_page()
+    try:
+        with _x_stage('login'):
+            if not await _x_session_active(page, base_url):
+                METRICS.inc('logins_total', platform='X')
+                ok, error = await _x_login(page, base_url, username, password)
+                if not ok:
+                    await BROWSER_POOL.release_page('X', account, page, False)
+                    return None, error
+    except BaseException:
+        await BROWSER_POOL.release_page('X', account, page, False)
+        raise
+    return page, None
+
+
+async def _x_publish(page, text, image_path=None):
+    """Compose, attach and submit one post on a logged-in page.
+
+    Returns (True, created post id) or (False, error message).
+    """
+    with _x_stage('compose'):
+        try:
+            post_button = await _x_find(page, 'new_post')
+            if post_button:
+                await post_button.click()
+            else:
+                composer = await _x_find(page, 'composer')
+                if composer:
+                    await composer.click()
+            await _x_step('composer_open', 15000, lambda t: page.wait_for_selector(
+                _x_any('composer'), state='visible', timeout=t))
+        except Exception as e:
+            return False, f"X: could not open composer: {e}"
+
+        try:
+            textarea = await _x_find(page, 'composer')
+            if not textarea:
+                return False, "X: composer textarea not found."
+            await textarea.fill(text)
+        except Exception as e:
+            return False, f"X: error filling text: {e}"
+
+    if image_path and os.path.exists(image_path):
+        with _x_stage('media_upload'):
+            try:
+                file_input = await _x_find(page, 'file_input')
+                if file_input:
+                    await file_input.set_input_files(image_path)
+                    await page.wait_for_function(X_UPLOAD_SETTLED_JS, timeout=_x_upload_timeout(image_path))
+                    if await page.query_selector('[data-testid="attachmentError"]'):
+                        return False, "X: media upload failed."
+            except Exception as e:
+                return False, f"X: error attaching image: {e}"
+
+    with _x_stage('submit'):
+        try:
+            btn = await _x_find(page, 'post_button')
+            if not btn:
+                return False, "X: tweet button not found."
+
+            async def click_and_confirm(timeout):
+                async with page.expect_response(_x_is_create_post, timeout=timeout) as response_info:
+                    await btn.click()
+                return await response_info.value
+
+            response = await _x_step('create_response', 60000, click_and_confirm)
+        except Exception as e:
+            return False, f"X: error clicking tweet button: {e}"
+
+        if not response.ok:
+            return False, f"X: post was rejected (HTTP {response.status})."
+        try:
+            created_id = _x_created_post_id(await response.json())
+        except ValueError:
+            created_id = None
+        if not created_id:
+            return False, "X: post response did not include a post id."
+        TRACER.instant('x.created', cat="browser", platform='X', created_id=created_id)
+
+        # Confirmation only; the response above already proves the post exists
+        try:
+            await _x_step('composer_clear', 10000, lambda t: page.wait_for_function(
+                X_COMPOSER_CLEARED_JS, timeout=t))
+        except Exception:
+            log.debug("X composer did not clear after posting", extra={'platform': 'X'})
+    return True, created_id
+
+
+def _x_posted_message(account, created_id):
+    who = "" if account == DEFAULT_ACCOUNT else f" as {account}"
+    return f"Posted to X{who} (id {created_id})"
+
+
+async def post_to_x_async(text, image_path=None, account=DEFAULT_ACCOUNT, timeout=None):
+    """Log in to X/Twitter via Playwright and create a post from `account`.
+
+    A page left by warm_x() skips navigation and login entirely.
+    """
+    username, password, base_url, error = _x_settings(account)
+    if error:
+        return False, error
+
+    async def flow(context):
+        page, error = await _x_open_page(context, account, base_url, username, password)
+        if error:
+            return False, error
+        ok = False
+        try:
+            ok, result = await _x_publish(page, text, image_path)
+            return (True, _x_posted_message(account, result)) if ok else (False, result)
+        finally:
+            await BROWSER_POOL.release_page('X', account, page, ok)
+
+    try:
+        return await BROWSER_POOL.session('X', account, flow, timeout)
+    except Exception as e:
+        return False, f"X Playwright error: {e}"
+
+
+def post_to_x(text, image_path=None, account=DEFAULT_ACCOUNT):
+    """Sync facade over post_to_x_async() for the post_to_platform dispatch."""
+    return BROWSER_POOL.call(post_to_x_async(text, image_path, account), BROWSER_POOL.task_timeout + 30)
+
+
+async def post_batch_to_x_async(items, account=DEFAULT_ACCOUNT, spacing=0, timeout=None, on_result=None):
+    """Publish several posts from `account` in one logged-in session.
+
+    `items` are dicts with text, image_path and post_id. Login happens once;
+    each post then only composes and submits, `spacing` seconds apart.
+    Returns one (ok, info) per item. `on_result(index, (ok, info))` is
+    called as each item finishes, so a caller that gives up on the batch
+    still knows which items went out.
+    """
+    username, password, base_url, error = _x_settings(account)
+    if error:
+        return [(False, error)] * len(items)
+    results = []
+
+    async def flow(context):
+        page, error = await _x_open_page(context, account, base_url, username, password)
+        if error:
+            return [(False, error)] * len(items)
+        try:
+            for n, item in enumerate(items):
+                if n and spacing:
+                    await asyncio.sleep(spacing)
+                with TRACER.span('x.batch_item', post_id=item.get('post_id'), cat="browser",
+                                 platform='X', index=n) as span:
+                    try:
+                        if n and not await _x_page_ready(page, base_url):
+                            await _x_step('goto_home', 60000, lambda t: page.goto(f"{base_url}/home", timeout=t))
+                        ok, result = await _x_publish(page, item['text'], item.get('image_path'))
+                    except Exception as e:
+                        ok, result = False, f"X Playwright error: {e}"
+                    span['ok'] = ok
+                results.append((True, _x_posted_message(account, result)) if ok else (False, result))
+                if on_result is not None:
+                    on_result(n, results[-1])
+        finally:
+            await BROWSER_POOL.release_page('X', account, page,
+                                            len(results) == len(items) and all(r[0] for r in results))
+        return results
+
+    timeout = (timeout or BROWSER_POOL.task_timeout) * len(items) + spacing * len(items)
+    try:
+        return await BROWSER_POOL.session('X', account, flow, timeout)
+    except Exception as e:
+        # Items that finished before the timeout or error keep their results
+        return _partial_results(len(items), dict(enumerate(results)), f"X Playwright error: {e}")
+
+
+def post_batch_to_x(items, account=DEFAULT_ACCOUNT, spacing=0, on_result=None):
+    """Sync facade over post_batch_to_x_async()."""
+    timeout = (BROWSER_POOL.task_timeout + spacing) * len(items) + 30
+    finished = {}
+
+    def record(index, result):
+        finished[index] = result
+        if on_result is not None:
+            on_result(index, result)
+
+    try:
+        return BROWSER_POOL.call(post_batch_to_x_async(items, account, spacing, on_result=record), timeout)
+    except Exception as e:
+        return _partial_results(len(items), dict(finished), f"X: {e or type(e).__name__}")
+
+
+def _partial_results(count, finished, error):
+    """One (ok, info) per item of a cut-off batch: finished items as recorded, the rest failed."""
+    return [finished.get(index, (False, error)) for index in range(count)]
+
+
+def post_to_reddit(text, image_path=None, account=DEFAULT_ACCOUNT):
+    return False, "Reddit posting not implemented yet."
+
+
+def post_to_facebook(text, image_path=None, account=DEFAULT_ACCOUNT):
+    return False, "Facebook posting not implemented yet."
+
+
+def post_to_linkedin(text, image_path=None, account=DEFAULT_ACCOUNT):
+    return False, "LinkedIn posting not implemented yet."
+
+
+def post_to_threads(text, image_path=None, account=DEFAULT_ACCOUNT):
+    return False, "Threads posting not implemented yet."
+
+
+def post_to_instagram(text, image_path=None, account=DEFAULT_ACCOUNT):
+    return False, "Instagram posting not implemented yet."
 
-            return response.text, None
-        except Exception as e:
-            return None, f"Gemini error: {e}"
 
-    def analyze_media(self, media_path, caption_prompt="", hashtag_prompt="", keyword_prompt=""):
-        """
-        Analyze media and generate caption, hashtags, and keywords.
-        Uses fallback chain: tries primary provider first, then others if it fails.
-        Returns: dict with 'caption', 'hashtags', 'keywords' keys
-        """
-        self.reload_config()
+def post_to_tiktok(text, image_path=None, account=DEFAULT_ACCOUNT):
+    return False, "TikTok posting not implemented yet."
 
-        prompt = self._build_prompt(caption_prompt, hashtag_prompt, keyword_prompt)
-        provider_order = self._get_provider_order()
 
-        errors = []
+def post_to_quora(text, image_path=None, account=DEFAULT_ACCOUNT):
+    return False, "Quora posting not implemented yet."
 
-        for provider in provider_order:
-            if provider == 'Anthropic':
-                response, error = self._call_anthropic(media_path, prompt)
-            elif provider == 'OpenAI':
-                response, error = self._call_openai(media_path, prompt)
-            elif provider == 'Gemini':
-                response, error = self._call_gemini(media_path, prompt)
+
+def post_to_platform(platform_name, text, img_path, account=DEFAULT_ACCOUNT):
+    """Dispatch to the correct per-platform function, with metrics and tracing."""
+    with METRICS.timer('post_seconds', platform=platform_name), \
+            TRACER.span('post_to_platform', platform=platform_name, account=account) as span:
+        with GOVERNOR.slot('browser'):
+            if POSTING_POOL.enabled:
+                ok, info = POSTING_POOL.run(platform_name, text, img_path, account)
             else:
-                continue
+                ok, info = _dispatch_post(platform_name, text, img_path, account)
+        span['ok'] = ok
+        if not ok:
+            span['info'] = info
+    METRICS.inc('posts_total', platform=platform_name, account=account,
+                outcome='success' if ok else 'failed')
+    return ok, info
+
+
+def post_batch_to_platform(platform_name, items, account=DEFAULT_ACCOUNT, spacing=None):
+    """Publish several posts to one (platform, account) in a single session.
+
+    `items` are dicts with text, image_path and post_id. Posts go out one
+    after another `spacing` seconds apart (config "batch_spacing_seconds").
+    Returns one (ok, info) per item.
+    """
+    if len(items) == 1:
+        item = items[0]
+        with TRACER.span('post_item', post_id=item.get('post_id')):
+            return [post_to_platform(platform_name, item['text'], item.get('image_path'), account)]
+    if spacing is None:
+        spacing = float(load_config().get('batch_spacing_seconds', 20))
+
+    with METRICS.timer('post_batch_seconds', platform=platform_name), \
+            TRACER.span('post_batch', platform=platform_name, account=account, posts=len(items),
+                        post_ids=[item.get('post_id') for item in items]) as span:
+        with GOVERNOR.slot('browser'):
+            if POSTING_POOL.enabled:
+                results = POSTING_POOL.batch(platform_name, items, account, spacing)
+            else:
+                results = _dispatch_batch(platform_name, items, account, spacing)
+        span['ok'] = sum(1 for ok, _ in results if ok)
+    for ok, _ in results:
+        METRICS.inc('posts_total', platform=platform_name, account=account,
+                    outcome='success' if ok else 'failed')
+    # Counters, not a histogram: the histogram buckets are in seconds
+    METRICS.inc('post_batches_total', platform=platform_name)
+    METRICS.inc('post_batch_items_total', len(items), platform=platform_name)
+    return results
+
+
+def _dispatch_post(platform_name, text, img_path, account=DEFAULT_ACCOUNT):
+    if platform_name == "X":
+        return post_to_x(text, img_path, account)
+    elif platform_name == "Reddit":
+        return post_to_reddit(text, img_path, account)
+    elif platform_name == "Facebook":
+        return post_to_facebook(text, img_path, account)
+    elif platform_name == "LinkedIn":
+        return post_to_linkedin(text, img_path, account)
+    elif platform_name == "Threads":
+        return post_to_threads(text, img_path, account)
+    elif platform_name == "Instagram":
+        return post_to_instagram(text, img_path, account)
+    elif platform_name == "TikTok":
+        return post_to_tiktok(text, img_path, account)
+    elif platform_name == "Quora":
+        return post_to_quora(text, img_path, account)
+    else:
+        return False, f"Unknown platform: {platform_name}"
+
+
+# Platforms whose sessions can be pre-warmed ahead of a scheduled post
+PLATFORM_WARMERS = {
+    'X': warm_x,
+}
 
-            if response:
-                result = self._parse_response(response)
 
-                # Validate that we got actual content
-                if not result.get('caption') and not result.get('hashtags') and not result.get('keywords'):
-                    errors.append(f"{provider}: Failed to parse response - no content extracted")
-                    print(f"DEBUG: Failed to parse {provider} response:", response[:200])
-                    continue
+# Platforms that can publish several posts in one session
+BATCH_POSTERS = {
+    'X': post_batch_to_x,
+}
 
-                result['provider'] = provider
-                print(f"SUCCESS: Generated content using {provider}")
-                return result
-            else:
-                errors.append(f"{provider}: {error}")
-                print(f"ERROR: {provider} failed - {error}")
 
-        # All providers failed
-        error_msg = "All providers failed: " + "; ".join(errors)
-        print(f"CRITICAL ERROR: {error_msg}")
-        return {
-            'caption': '',
-            'hashtags': '',
-            'keywords': '',
-            'error': error_msg
-        }
+def _dispatch_batch(platform_name, items, account=DEFAULT_ACCOUNT, spacing=0, on_result=None):
+    poster = BATCH_POSTERS.get(platform_name)
+    if poster is not None:
+        return poster(items, account, spacing, on_result=on_result)
+    results = []
+    for item in items:
+        if results and results[-1][0] and spacing:
+            time.sleep(spacing)
+        results.append(_dispatch_post(platform_name, item['text'], item.get('image_path'), account))
+        if on_result is not None:
+            on_result(len(results) - 1, results[-1])
+    return results
+
+
+def warm_platform(platform_name, account=DEFAULT_ACCOUNT):
+    """Pre-warm `account` on a platform, in the posting process that will post for it.
+
+    Warming is speculative, so it is skipped rather than queued when every
+    browser slot is taken.
+    """
+    if not GOVERNOR.acquire('browser', timeout=0):
+        return False, "No free browser slot for pre-warming."
+    try:
+        if POSTING_POOL.enabled:
+            return POSTING_POOL.warm(platform_name, account)
+        return _dispatch_warm(platform_name, account)
+    finally:
+        GOVERNOR.release('browser')
 
 
-# --------------------------------------------------------------------
-# PLATFORM POSTING FUNCTIONS
-# --------------------------------------------------------------------
+def _dispatch_warm(platform_name, account=DEFAULT_ACCOUNT):
+    warmer = PLATFORM_WARMERS.get(platform_name)
+    if warmer is None:
+        return False, f"{platform_name} has no pre-warm support."
+    return warmer(account)
 
-def post_to_x(text, image_path=None):
-    """Log in to X/Twitter via Playwright and create a post."""
-    config = load_config()
-    username = config.get('x_username', '')
-    password = config.get('x_password', '')
 
-    if not username or not password:
-        return False, "X credentials not configured. Please set them in Settings."
+def publish_post(post, fallback_platforms=None, worker_id=None):
+    """Publish a due queued post to each of its platforms and archive its media.
 
-    browser = None
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(viewport={"width": 1280, "height": 720})
-            page = context.new_page()
+    Returns a list of (platform, ok, info). The caller removes the post
+    from the queue.
+    """
+    return publish_posts([post], fallback_platforms, worker_id)[post.get('id', 'unknown')]
 
-            page.goto("https://x.com/login", timeout=60000)
 
-            try:
-                page.wait_for_selector('input[name="text"], input[autocomplete="username"]', timeout=30000)
-                username_box = page.query_selector('input[name="text"]') or page.query_selector('input[autocomplete="username"]')
-                username_box.fill(username)
-                username_box.press("Enter")
-            except Exception as e:
-                return False, f"X login: username field error: {e}"
+def _announce_publish(post):
+    """Log a post going out and record how late it is."""
+    post_id = post.get('id', 'unknown')
+    scheduled_time = post.get('scheduled_time', '')
+    lateness = None
+    time_str = None
+    if scheduled_time:
+        try:
+            dt = datetime.fromisoformat(scheduled_time)
+            lateness = max(0.0, (datetime.now() - dt).total_seconds())
+            METRICS.observe('post_lateness_seconds', lateness)
+            time_str = dt.strftime("%I:%M %p")
+        except ValueError:
+            pass
 
-            try:
-                page.wait_for_selector('input[name="password"]', timeout=30000)
-                page.fill('input[name="password"]', password)
-                page.press('input[name="password"]', "Enter")
-            except Exception as e:
-                return False, f"X login: password field error: {e}"
+    TRACER.instant('publish', post_id=post_id, scheduled_time=scheduled_time,
+                   lateness_s=round(lateness, 3) if lateness is not None else None)
+    context = {'post_id': post_id}
+    if time_str:
+        log.info(f"Publishing scheduled post {post_id} (scheduled for {time_str})", extra=context)
+    else:
+        log.info(f"Publishing post {post_id}", extra=context)
+
+
+def publish_posts(posts, fallback_platforms=None, worker_id=None):
+    """Publish due queued posts and archive their media.
+
+    Posts that share a (platform, account) go out one after another in a
+    single session (see post_batch_to_platform), so N posts cost one
+    browser setup and login instead of N. Different (platform, account)
+    groups publish concurrently, as many at a time as GOVERNOR has
+    browser slots and, with posting processes on, no more than
+    POSTING_POOL has processes. Returns {post_id: [(platform, ok, info)]}; the caller
+    removes the posts from the queue.
+    """
+    results = {}
+    groups = {}  # {(platform, account): [post, ...]} in queue order
+    for post in posts:
+        results[post.get('id', 'unknown')] = []
+        for p in post.get('platforms', []) or list(fallback_platforms or []):
+            groups.setdefault((p, post_account(post, p)), []).append(post)
+
+    single_id = posts[0].get('id', 'unknown') if len(posts) == 1 else None
+    with TRACER.span('publish_post' if single_id else 'publish_batch', post_id=single_id,
+                     worker=worker_id, posts=len(posts)):
+        for post in posts:
+            _announce_publish(post)
+
+        batches = []  # [(platform, account, items)]
+        for (p, account), group in groups.items():
+            if DRY_RUN:
+                for post in group:
+                    post_id = post.get('id', 'unknown')
+                    media_path = post.get('media_path')
+                    log.info(
+                        f"[DRY RUN] Would post to {p} as {account}: {post_text(post, p)[:80]!r} "
+                        f"(media: {os.path.basename(media_path) if media_path else 'none'})",
+                        extra={'post_id': post_id, 'platform': p}
+                    )
+                    TRACER.instant('dry_run_post', post_id=post_id, platform=p)
+                    results[post_id].append((p, True, "dry run"))
+                continue
 
-            try:
-                page.wait_for_url("https://x.com/home", timeout=60000)
-            except Exception:
-                page.wait_for_load_state("networkidle", timeout=60000)
+            batches.append((p, account, [{'text': post_text(post, p), 'image_path': post.get('media_path'),
+                                          'post_id': post.get('id', 'unknown')} for post in group]))
+
+        if len(batches) > 1:
+            # One thread per group, each blocking in its own browser session; the
+            # governor's browser slots bound how many run at once
+            with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix="publish") as executor:
+                futures = [executor.submit(contextvars.copy_context().run, post_batch_to_platform,
+                                           p, items, account) for p, account, items in batches]
+                outcomes = []
+                for (p, account, items), future in zip(batches, futures):
+                    try:
+                        outcomes.append(future.result())
+                    except Exception as e:
+                        log.exception("Publishing to %s as %s failed: %s", p, account, e, extra={'platform': p})
+                        outcomes.append([(False, f"{p}: {e}")] * len(items))
+        else:
+            outcomes = [post_batch_to_platform(p, items, account) for p, account, items in batches]
 
-            try:
-                post_button = page.query_selector('a[aria-label="Post"], a[data-testid="SideNav_NewPost_Button"]')
-                if post_button:
-                    post_button.click()
+        for (p, account, items), outcome in zip(batches, outcomes):
+            for item, (ok, info) in zip(items, outcome):
+                context = {'post_id': item['post_id'], 'platform': p}
+                if ok:
+                    log.info(f"[LIVE] {info}", extra=context)
                 else:
-                    composer = page.query_selector('div[aria-label="Post text"], div[data-testid="tweetTextarea_0"]')
-                    if composer:
-                        composer.click()
-                page.wait_for_timeout(1000)
-            except Exception as e:
-                return False, f"X: could not open composer: {e}"
+                    log.warning(f"[LIVE] Failed to post to {p}: {info}", extra=context)
+                results[item['post_id']].append((p, ok, info))
 
-            try:
-                textarea = page.query_selector('div[aria-label="Post text"]') or page.query_selector(
-                    'div[data-testid="tweetTextarea_0"]'
-                )
-                if not textarea:
-                    return False, "X: composer textarea not found."
-                textarea.fill(text)
-            except Exception as e:
-                return False, f"X: error filling text: {e}"
+        # Move to posted
+        os.makedirs(POSTED_DIR, exist_ok=True)
+        for post in posts:
+            media_path = post.get('media_path')
+            if media_path and os.path.exists(media_path):
+                new_path = os.path.join(POSTED_DIR, os.path.basename(media_path))
+                os.replace(media_path, new_path)
+    return results
 
-            if image_path and os.path.exists(image_path):
-                try:
-                    file_input = page.query_selector('input[type="file"]')
-                    if file_input:
-                        file_input.set_input_files(image_path)
-                        page.wait_for_timeout(4000)
-                except Exception as e:
-                    return False, f"X: error attaching image: {e}"
 
-            try:
-                btn = (
-                    page.query_selector('div[data-testid="tweetButtonInline"]')
-                    or page.query_selector('div[data-testid="tweetButton"]')
-                    or page.query_selector('button[data-testid="tweetButtonInline"]')
-                )
-                if not btn:
-                    return False, "X: tweet button not found."
-                btn.click()
-                page.wait_for_timeout(5000)
-            except Exception as e:
-                return False, f"X: error clicking tweet button: {e}"
+# --------------------------------------------------------------------
+# PRE-WARMING
+# --------------------------------------------------------------------
 
-            return True, "Posted to X"
-    except Exception as e:
-        return False, f"X Playwright error: {e}"
-    finally:
-        if browser is not None:
+class Prewarmer:
+    """Warms browser sessions `lead_seconds` before their posts are due.
+
+    Each (platform, account) with a post coming up gets its browser
+    launched and its login restored or redone ahead of time, so at the
+    scheduled minute the post only has to compose and submit. Warm-ups
+    run on a background thread and never block the scheduler.
+    """
+
+    def __init__(self, lead_seconds=120):
+        self.lead_seconds = lead_seconds
+        self._warmed = {}  # {(platform, account): scheduled_time warmed for}
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def configure(self, config=None):
+        config = config if config is not None else load_config()
+        self.lead_seconds = float(config.get('prewarm_lead_seconds', self.lead_seconds))
+
+    def upcoming(self, posts, now=None):
+        """Return [(platform, account, post_id)] due within the lead time and not yet warmed."""
+        now = now or datetime.now()
+        horizon = now + timedelta(seconds=self.lead_seconds)
+        targets = []
+        for post in posts:
+            scheduled_time = post.get('scheduled_time', '')
             try:
-                browser.close()
-            except Exception:
-                pass
-
-
-def post_to_reddit(text, image_path=None):
-    return False, "Reddit posting not implemented yet."
+                if not now <= datetime.fromisoformat(scheduled_time) <= horizon:
+                    continue
+            except ValueError:
+                continue
+            for p in post.get('platforms', []):
+                if p not in PLATFORM_WARMERS:
+                    continue
+                key = (p, post_account(post, p))
+                if self._warmed.get(key) == scheduled_time:
+                    continue
+                self._warmed[key] = scheduled_time
+                targets.append((p, key[1], post.get('id')))
+        return targets
+
+    def schedule(self, posts, now=None):
+        """Queue warm-ups for the posts coming due; returns how many were queued."""
+        if DRY_RUN or not self.lead_seconds:
+            return 0
+        targets = self.upcoming(posts, now)
+        for target in targets:
+            self._jobs.put(target)
+        if targets:
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._loop, name="prewarmer", daemon=True)
+                    self._thread.start()
+        return len(targets)
+
+    def _loop(self):
+        while True:
+            try:
+                platform, account, post_id = self._jobs.get(timeout=60)
+            except queue.Empty:
+                return
+            context = {'post_id': post_id, 'platform': platform, 'account': account}
+            try:
+                with METRICS.timer('prewarm_seconds', platform=platform), \
+                        TRACER.span('prewarm', post_id=post_id, cat="browser", platform=platform,
+                                    account=account) as span:
+                    ok, info = warm_platform(platform, account)
+                    span['ok'] = ok
+            except Exception as e:
+                ok, info = False, str(e)
+            METRICS.inc('prewarms_total', platform=platform, outcome='success' if ok else 'failed')
+            if ok:
+                log.info(f"Pre-warmed {platform} as {account}: {info}", extra=context)
+            else:
+                log.warning(f"Pre-warm of {platform} as {account} failed: {info}", extra=context)
 
 
-def post_to_facebook(text, image_path=None):
-    return False, "Facebook posting not implemented yet."
+PREWARMER = Prewarmer()
 
 
-def post_to_linkedin(text, image_path=None):
-    return False, "LinkedIn posting not implemented yet."
+# --------------------------------------------------------------------
+# SHARED QUEUE STORE
+# --------------------------------------------------------------------
 
+def default_worker_id(role="worker"):
+    return f"{socket.gethostname()}-{os.getpid()}-{role}"
+
+
+class QueueStore:
+    """queue.json shared by the GUI and any number of posting workers.
+
+    All writes happen under an exclusive lock file (O_CREAT|O_EXCL, which
+    also works on shared network filesystems) and replace the file
+    atomically. Due posts are handed out with leases: a worker owns a post
+    until `lease_expires`, renews it while posting, and a lease whose
+    owner stopped sending heartbeats is reclaimed by the next worker.
+    """
+
+    def __init__(self, directory=None, lock_timeout=30.0, heartbeat_timeout=90.0):
+        self.directory = directory or QUEUE_DIR
+        self.path = os.path.join(self.directory, "queue.json")
+        self.lock_path = self.path + ".lock"
+        self.workers_dir = os.path.join(self.directory, "workers")
+        self.lock_timeout = lock_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+
+    # ---- Locking / IO ----
+    @contextmanager
+    def locked(self):
+        """Hold the queue lock; a lock older than lock_timeout is considered stale."""
+        os.makedirs(self.directory, exist_ok=True)
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.lock_path) > self.lock_timeout:
+                        os.remove(self.lock_path)
+                        log.warning("Removed stale queue lock %s", self.lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {self.lock_path}")
+                time.sleep(0.05)
+        try:
+            os.write(fd, f"{socket.gethostname()} {os.getpid()} {time.time()}".encode('utf-8'))
+            os.close(fd)
+            yield
+        finally:
+            try:
+                os.remove(self.lock_path)
+            except OSError:
+                pass
 
-def post_to_threads(text, image_path=None):
-    return False, "Threads posting not implemented yet."
+    def load(self):
+        """Read the queue (no lock needed: writers replace the file atomically)."""
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return []
+
+    def _write(self, posts):
+        tmp_path = f"{self.path}.{socket.gethostname()}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(posts, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def save(self, posts):
+        """Replace the whole queue."""
+        with self.locked():
+            self._write(posts)
+
+    def update(self, fn):
+        """Apply fn(posts) to the current queue under the lock and save; returns fn's result."""
+        with self.locked():
+            posts = self.load()
+            result = fn(posts)
+            self._write(posts)
+        return result
 
+    # ---- Queue edits ----
+    def add(self, new_posts):
+        def apply(posts):
+            posts.extend(new_posts)
+            posts.sort(key=lambda x: x.get('scheduled_time', ''))
+            return posts
+        return self.update(apply)
 
-def post_to_instagram(text, image_path=None):
-    return False, "Instagram posting not implemented yet."
+    def update_post(self, post_id, fields):
+        def apply(posts):
+            for post in posts:
+                if post.get('id') == post_id:
+                    post.update(fields)
+            posts.sort(key=lambda x: x.get('scheduled_time', ''))
+            return posts
+        return self.update(apply)
+
+    def remove(self, post_id):
+        """Remove a post; returns it (or None if it was already gone)."""
+        def apply(posts):
+            for i, post in enumerate(posts):
+                if post.get('id') == post_id:
+                    return posts.pop(i)
+            return None
+        return self.update(apply)
+
+    # ---- Leases ----
+    def heartbeat(self, worker_id, **info):
+        """Record that worker_id is alive."""
+        os.makedirs(self.workers_dir, exist_ok=True)
+        path = os.path.join(self.workers_dir, f"{worker_id}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(info, worker_id=worker_id, host=socket.gethostname(),
+                           pid=os.getpid(), ts=time.time()), f)
+        os.replace(tmp_path, path)
+
+    def workers(self):
+        """Heartbeat records of all known workers, with an 'alive' flag."""
+        records = []
+        for path in glob.glob(os.path.join(self.workers_dir, "*.json")):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                continue
+            record['alive'] = time.time() - record.get('ts', 0) <= self.heartbeat_timeout
+            records.append(record)
+        return records
+
+    def acquire_due(self, worker_id, lease_seconds=300, limit=None, now=None):
+        """Lease posts that are due and not held by a live worker; returns copies."""
+        now_dt = now or datetime.now()
+        now_ts = time.time()
+        alive = {w['worker_id'] for w in self.workers() if w['alive']}
+
+        def apply(posts):
+            acquired = []
+            for post in posts:
+                if limit is not None and len(acquired) >= limit:
+                    break
+                scheduled_time = post.get('scheduled_time', '')
+                if not scheduled_time or post.get('failed_at'):
+                    continue
+                try:
+                    if datetime.fromisoformat(scheduled_time) > now_dt:
+                        continue
+                except ValueError:
+                    continue
+                owner = post.get('lease_owner')
+                if owner and post.get('lease_expires', 0) > now_ts and (owner in alive or owner == worker_id):
+                    continue
+                if owner and owner != worker_id:
+                    METRICS.inc('queue_leases_reclaimed_total')
+                    log.warning(f"Reclaiming post {post.get('id')} from {owner}", extra={'post_id': post.get('id')})
+                post['lease_owner'] = worker_id
+                post['lease_expires'] = now_ts + lease_seconds
+                post['lease_attempts'] = post.get('lease_attempts', 0) + 1
+                acquired.append(dict(post))
+            return acquired
+
+        acquired = self.update(apply)
+        METRICS.inc('queue_leases_acquired_total', len(acquired))
+        return acquired
+
+    def renew(self, worker_id, post_ids, lease_seconds=300):
+        """Extend the leases worker_id holds on post_ids."""
+        if not post_ids:
+            return
+        expires = time.time() + lease_seconds
 
+        def apply(posts):
+            for post in posts:
+                if post.get('id') in post_ids and post.get('lease_owner') == worker_id:
+                    post['lease_expires'] = expires
+        self.update(apply)
+
+    def complete(self, worker_id, post_id):
+        """Remove a published post, unless another worker has since taken its lease."""
+        def apply(posts):
+            for i, post in enumerate(posts):
+                if post.get('id') == post_id:
+                    if post.get('lease_owner') in (None, worker_id):
+                        posts.pop(i)
+                        return True
+                    return False
+            return False
+        return self.update(apply)
+
+    def release(self, worker_id, post_id):
+        """Give a lease back so another worker can pick the post up."""
+        def apply(posts):
+            for post in posts:
+                if post.get('id') == post_id and post.get('lease_owner') == worker_id:
+                    post.pop('lease_owner', None)
+                    post.pop('lease_expires', None)
+        self.update(apply)
 
-def post_to_tiktok(text, image_path=None):
-    return False, "TikTok posting not implemented yet."
+    def fail(self, worker_id, post_id, error):
+        """Drop the lease and park a post whose publish broke off midway.
 
+        Some of its platforms may already have it, so it is not picked up
+        again until it is rescheduled (which clears 'failed_at').
+        """
+        def apply(posts):
+            for post in posts:
+                if post.get('id') == post_id and post.get('lease_owner') == worker_id:
+                    post.pop('lease_owner', None)
+                    post.pop('lease_expires', None)
+                    post['failed_at'] = datetime.now().isoformat()
+                    post['error'] = str(error)
+        self.update(apply)
+        METRICS.inc('queue_posts_failed_total')
+
+
+class QueueWorker:
+    """Headless posting worker pulling due posts from a shared QueueStore.
+
+    Run several (`python social_rocket.py --worker`) on one host or on
+    hosts that share the queue directory to scale posting horizontally.
+    """
+
+    def __init__(self, store=None, worker_id=None, poll_interval=10.0, lease_seconds=300,
+                 heartbeat_interval=15.0, batch_size=5):
+        self.store = store or QueueStore()
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.batch_size = batch_size
+        self.inflight = set()
+        self.published = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def heartbeat(self):
+        """Report liveness and keep the leases of in-flight posts alive."""
+        ids = set(self.inflight)
+        self.store.heartbeat(self.worker_id, inflight=sorted(ids), published=self.published)
+        self.store.renew(self.worker_id, ids, self.lease_seconds)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                log.warning("Worker heartbeat failed: %s", e)
 
-def post_to_quora(text, image_path=None):
-    return False, "Quora posting not implemented yet."
+    def run_once(self):
+        """Lease and publish one batch of due posts; returns how many were published."""
+        PREWARMER.schedule(self.store.load())
+        posts = self.store.acquire_due(self.worker_id, self.lease_seconds, limit=self.batch_size)
+        if posts and self._stop.is_set():
+            for post in posts:
+                self.store.release(self.worker_id, post.get('id'))
+            return 0
+        if posts:
+            self.publish(posts)
+        return len(posts)
+
+    def publish(self, posts):
+        """Publish leased posts, batching those that share a platform account."""
+        ids = [post.get('id') for post in posts]
+        self.inflight.update(ids)
+        pending = list(ids)
+        try:
+            publish_posts(posts, worker_id=self.worker_id)
+            for post_id in ids:
+                self.store.complete(self.worker_id, post_id)
+                pending.remove(post_id)
+                self.published += 1
+                log.info(f"Completed post {post_id}.", extra={'post_id': post_id})
+        except Exception as e:
+            # Without this the leases would lapse and this worker would post them again
+            for post_id in pending:
+                self.store.fail(self.worker_id, post_id, e)
+                log.error(f"Publishing post {post_id} failed: {e}", extra={'post_id': post_id})
+            raise
+        finally:
+            self.inflight.difference_update(ids)
+
+    def run_forever(self):
+        log.info(f"Worker {self.worker_id} started on {self.store.directory}")
+        self.heartbeat()
+        threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True).start()
+        while not self._stop.is_set():
+            try:
+                with METRICS.timer('scheduler_tick_seconds'):
+                    published = self.run_once()
+            except Exception as e:
+                log.exception("Worker poll failed: %s", e)
+                published = 0
+            try:
+                METRICS.write_files(name=f"worker-{self.worker_id}")
+            except OSError:
+                pass
+            if not published:
+                self._stop.wait(self.poll_interval)
+        log.info(f"Worker {self.worker_id} stopped")
+
+
+def run_worker(argv=None):
+    """Command-line entry point for a headless posting worker."""
+    parser = argparse.ArgumentParser(description="Social Rocket posting worker")
+    parser.add_argument('--worker', action='store_true')
+    parser.add_argument('--worker-id', default=None)
+    parser.add_argument('--queue-dir', default=None, help="shared queue directory (default: ./queue)")
+    parser.add_argument('--poll', type=float, default=10.0, help="seconds between polls when idle")
+    parser.add_argument('--lease', type=float, default=300.0, help="lease length in seconds")
+    parser.add_argument('--batch', type=int, default=5, help="posts leased per poll")
+    parser.add_argument('--metrics-port', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    worker_id = args.worker_id or default_worker_id()
+    setup_logging(name=f"worker-{worker_id}")
+    POSTING_POOL.configure()
+    PREWARMER.configure()
+    TIMEOUTS.configure()
+    FAILURE_CAPTURE.configure()
+    BROWSER_POOL.configure()
+    GOVERNOR.configure()
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    worker = QueueWorker(QueueStore(args.queue_dir), worker_id=worker_id, poll_interval=args.poll,
+                         lease_seconds=args.lease, batch_size=args.batch)
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        POSTING_POOL.close()
+        BROWSER_POOL.close()
+        SELECTORS.save()
+        TIMEOUTS.save()
 
 
 # --------------------------------------------------------------------
@@ -730,6 +4665,49 @@ class SettingsDialog(QDialog):
 
         tabs.addTab(platforms_tab, "Platforms")
 
+        # Accounts Tab
+        accounts_tab = QWidget()
+        accounts_layout = QVBoxLayout(accounts_tab)
+
+        accounts_info = QLabel("Extra accounts per platform (e.g. one per brand).\n"
+                               "The Platforms tab holds each platform's \"default\" account.")
+        accounts_info.setStyleSheet("color: gray; font-size: 11px; margin-bottom: 10px;")
+        accounts_layout.addWidget(accounts_info)
+
+        self.accounts = {}  # {platform: {account_name: {credential keys}}}
+        self.accounts_list = QListWidget()
+        self.accounts_list.currentItemChanged.connect(self.on_account_selected)
+        accounts_layout.addWidget(self.accounts_list)
+
+        account_form = QFormLayout()
+        self.account_platform = QComboBox()
+        self.account_platform.addItems(ALL_PLATFORMS)
+        self.account_name = QLineEdit()
+        self.account_name.setPlaceholderText("account name, e.g. brand-a")
+        self.account_login = QLineEdit()
+        self.account_login.setPlaceholderText("username or email")
+        self.account_password = QLineEdit()
+        self.account_password.setEchoMode(QLineEdit.EchoMode.Password)
+        self.account_extra = QLineEdit()
+        self.account_extra.setPlaceholderText("subreddit (Reddit) or page/group URL (Facebook)")
+        account_form.addRow("Platform:", self.account_platform)
+        account_form.addRow("Account Name:", self.account_name)
+        account_form.addRow("Username/Email:", self.account_login)
+        account_form.addRow("Password:", self.account_password)
+        account_form.addRow("Extra:", self.account_extra)
+        accounts_layout.addLayout(account_form)
+
+        account_btns = QHBoxLayout()
+        save_account_btn = QPushButton("Add / Update Account")
+        save_account_btn.clicked.connect(self.save_account)
+        remove_account_btn = QPushButton("Remove Account")
+        remove_account_btn.clicked.connect(self.remove_account)
+        account_btns.addWidget(save_account_btn)
+        account_btns.addWidget(remove_account_btn)
+        accounts_layout.addLayout(account_btns)
+
+        tabs.addTab(accounts_tab, "Accounts")
+
         # Best Times Tab
         times_tab = QWidget()
         times_layout = QVBoxLayout(times_tab)
@@ -790,6 +4768,59 @@ class SettingsDialog(QDialog):
         # Load existing config
         self.load_settings()
 
+    def refresh_accounts_list(self):
+        """Rebuild the accounts list from self.accounts."""
+        self.accounts_list.clear()
+        for platform in ALL_PLATFORMS:
+            for name in sorted(self.accounts.get(platform, {})):
+                item = QListWidgetItem(f"{platform} / {name}")
+                item.setData(Qt.ItemDataRole.UserRole, (platform, name))
+                self.accounts_list.addItem(item)
+
+    def on_account_selected(self, item, _previous=None):
+        """Load the selected account into the form."""
+        if item is None:
+            return
+        platform, name = item.data(Qt.ItemDataRole.UserRole)
+        login_key, password_key, extra_key = PLATFORM_CREDENTIAL_KEYS[platform]
+        creds = self.accounts.get(platform, {}).get(name, {})
+        self.account_platform.setCurrentText(platform)
+        self.account_name.setText(name)
+        self.account_login.setText(creds.get(login_key, ''))
+        self.account_password.setText(creds.get(password_key, ''))
+        self.account_extra.setText(creds.get(extra_key, '') if extra_key else '')
+
+    def save_account(self):
+        """Add or update the account in the form."""
+        platform = self.account_platform.currentText()
+        name = self.account_name.text().strip()
+        if not name or name == DEFAULT_ACCOUNT:
+            QMessageBox.warning(self, "Account Name",
+                                f"Enter an account name other than \"{DEFAULT_ACCOUNT}\".\n"
+                                "The default account is set on the Platforms tab.")
+            return
+
+        login_key, password_key, extra_key = PLATFORM_CREDENTIAL_KEYS[platform]
+        creds = {
+            login_key: self.account_login.text().strip(),
+            password_key: self.account_password.text(),
+        }
+        if extra_key:
+            creds[extra_key] = self.account_extra.text().strip()
+        self.accounts.setdefault(platform, {})[name] = creds
+        self.refresh_accounts_list()
+
+    def remove_account(self):
+        """Remove the selected account."""
+        item = self.accounts_list.currentItem()
+        if item is None:
+            return
+        platform, name = item.data(Qt.ItemDataRole.UserRole)
+        self.accounts.get(platform, {}).pop(name, None)
+        if not self.accounts.get(platform):
+            self.accounts.pop(platform, None)
+        self.refresh_accounts_list()
+
     def reset_best_times(self):
         """Reset best times to defaults."""
         for platform, times in DEFAULT_BEST_TIMES.items():
@@ -847,6 +4878,10 @@ class SettingsDialog(QDialog):
         self.quora_email.setText(config.get('quora_email', ''))
         self.quora_password.setText(config.get('quora_password', ''))
 
+        # Accounts
+        self.accounts = json.loads(json.dumps(config.get('accounts', {})))
+        self.refresh_accounts_list()
+
         # Best Times
         best_times = config.get('best_times', DEFAULT_BEST_TIMES)
         for platform, times in best_times.items():
@@ -892,6 +4927,7 @@ class SettingsDialog(QDialog):
             'quora_email': self.quora_email.text().strip(),
             'quora_password': self.quora_password.text(),
             'best_times': best_times,
+            'accounts': self.accounts,
         }
 
     def toggle_key_visibility(self):
@@ -1431,6 +5467,13 @@ class QueueCard(QFrame):
             except Exception:
                 pass
 
+        # Parked after a publish broke off; rescheduling puts it back in line
+        if post_data.get('failed_at'):
+            failed_label = QLabel("Failed - edit to reschedule")
+            failed_label.setToolTip(post_data.get('error') or "")
+            failed_label.setStyleSheet("font-weight: bold; color: #f44336; font-size: 11px;")
+            layout.addWidget(failed_label)
+
         # Thumbnail
         thumb_label = QLabel()
         thumb_label.setFixedSize(180, 100)
@@ -1530,12 +5573,23 @@ class QueueCard(QFrame):
 class SocialRocket(QMainWindow):
     # Create a signal for AI content updates
     ai_content_ready = pyqtSignal(dict)
+    ai_content_partial = pyqtSignal(int, str, str, bool)  # request seq, field, text so far, field complete
+    posts_completed = pyqtSignal(list)
+    posts_due = pyqtSignal(list)  # leased by the scheduler thread, dispatched on the GUI thread
 
     def __init__(self):
         super().__init__()
 
         os.makedirs(QUEUE_DIR, exist_ok=True)
         os.makedirs(POSTED_DIR, exist_ok=True)
+        setup_logging()
+        TRACER.enabled = bool(load_config().get('tracing_enabled', True))
+        POSTING_POOL.configure()
+        PREWARMER.configure()
+        TIMEOUTS.configure()
+        FAILURE_CAPTURE.configure()
+        BROWSER_POOL.configure()
+        GOVERNOR.configure()
 
         self.setWindowTitle("Social Rocket")
         self.resize(1000, 800)
@@ -1547,17 +5601,36 @@ class SocialRocket(QMainWindow):
 
         self.scheduler_running = False
         self.scheduler_thread = None
+        self.metrics_server = None
 
         # Initialize AI service
         self.ai_service = AIService()
 
+        # AI generation runs on a small pool; only the newest request per click burst counts
+        self.ai_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ai")
+        self.ai_request = None  # {'seq', 'draft_id', 'future', 'cancel'} of the request in flight
+        # Per-platform texts generated with the current caption/hashtags: {'caption', 'hashtags', 'variants'}
+        self.ai_variants = None
+        self.ai_request_seq = 0
+        self.ai_debounce_timer = QTimer(self)
+        self.ai_debounce_timer.setSingleShot(True)
+        self.ai_debounce_timer.setInterval(int(load_config().get('ai_debounce_ms', 400)))
+        self.ai_debounce_timer.timeout.connect(self.start_ai_generation)
+
         # Current media being edited
         self.current_media_path = None
 
+        # Trace correlation id for the creative being prepared; becomes the queue id
+        self.current_draft_id = None
+
         # Track if editing existing post
         self.editing_post_id = None
 
-        # Queue data (list of post dicts)
+        # Queue data (list of post dicts), shared with any posting workers
+        self.queue_store = QueueStore(QUEUE_DIR)
+        self.worker_id = default_worker_id("gui")
+        self.inflight_posts = set()
+        self.heartbeat_interval = 15.0
         self.queue_data = []
         self.load_queue_data()
 
@@ -1567,6 +5640,10 @@ class SocialRocket(QMainWindow):
 
         # Connect AI content signal
         self.ai_content_ready.connect(self.update_ai_fields)
+        self.ai_content_partial.connect(self.update_ai_partial)
+        self.posts_completed.connect(self.on_posts_completed)
+        # Queued when emitted from the scheduler thread, which has no event loop of its own
+        self.posts_due.connect(lambda posts: self.post_scheduled_items(posts))
 
         self._build_ui()
 
@@ -1873,6 +5950,13 @@ class SocialRocket(QMainWindow):
             plat_layout.addWidget(chk)
 
         plat_layout.addStretch()
+
+        plat_layout.addWidget(QLabel("Account:"))
+        self.account_combo = QComboBox()
+        self.account_combo.setToolTip("Account used on every selected platform")
+        self.account_combo.addItems(list_accounts())
+        plat_layout.addWidget(self.account_combo)
+
         main_layout.addLayout(plat_layout)
 
         # Action buttons
@@ -1987,6 +6071,13 @@ class SocialRocket(QMainWindow):
         self.log.setMaximumBlockCount(500)
         main_layout.addWidget(self.log)
 
+        # Log records are buffered and flushed to the pane in batches
+        self.log_buffer = LogRingBuffer(capacity=500)
+        log.addHandler(self.log_buffer)
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.timeout.connect(self.flush_log_pane)
+        self.log_flush_timer.start(250)
+
         # Finalize scroll area
         scroll.setWidget(scroll_content)
 
@@ -2000,18 +6091,51 @@ class SocialRocket(QMainWindow):
 
         # Timer to refresh queue
         self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.refresh_queue_display)
+        self.refresh_timer.timeout.connect(self.reload_queue)
         self.refresh_timer.start(60_000)
 
-    def append_log(self, msg: str):
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.log.appendPlainText(f"[{ts}] {msg}")
+        # Metrics export: snapshot files every minute, optional local endpoint
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.export_metrics)
+        self.metrics_timer.start(60_000)
+        self.start_metrics_endpoint()
+
+    def start_metrics_endpoint(self):
+        """Start the local /metrics endpoint if `metrics_port` is configured."""
+        port = int(load_config().get('metrics_port', 0) or 0)
+        if not port:
+            return
+        try:
+            self.metrics_server = start_metrics_server(port)
+            self.append_log(f"Metrics available at http://127.0.0.1:{port}/metrics")
+        except OSError as e:
+            self.append_log(f"Could not start metrics endpoint on port {port}: {e}")
+
+    def export_metrics(self):
+        """Write the Prometheus and JSON metric snapshots to METRICS_DIR."""
+        try:
+            METRICS.write_files()
+        except OSError as e:
+            log.warning("Could not write metrics: %s", e)
+
+    def append_log(self, msg: str, level=logging.INFO, **context):
+        """Log a message; context (post_id, platform, ...) goes into the JSON log."""
+        log.log(level, msg, extra=context)
+
+    def flush_log_pane(self):
+        """Append buffered log lines to the log pane in one batch."""
+        lines = self.log_buffer.drain()
+        if lines:
+            self.log.appendPlainText("\n".join(lines))
 
     def open_settings(self):
         dialog = SettingsDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            settings = dialog.get_settings()
-            save_config(settings)
+            # Merge so keys without a settings field (e.g. metrics_port) survive
+            config = load_config()
+            config.update(dialog.get_settings())
+            save_config(config)
+            self.refresh_account_choices()
             self.append_log("Settings saved.")
 
     def load_creative_library(self):
@@ -2156,6 +6280,8 @@ class SocialRocket(QMainWindow):
     def select_creative(self, media_path):
         """Select a creative from the gallery."""
         self.current_media_path = media_path
+        self.current_draft_id = str(uuid.uuid4())[:8]
+        TRACER.instant('select_creative', post_id=self.current_draft_id, media=os.path.basename(media_path))
         self.file_label.setText(os.path.basename(media_path))
 
         # Update preview
@@ -2180,7 +6306,8 @@ class SocialRocket(QMainWindow):
 
         # Auto-generate content
         self.append_log(f"Selected creative: {os.path.basename(media_path)}")
-        self.generate_ai_content()
+        if not self.apply_stored_content(media_path):
+            self.generate_ai_content()
 
     def remove_creative_from_library(self, media_path):
         """Remove a creative from the library."""
@@ -2209,6 +6336,8 @@ class SocialRocket(QMainWindow):
     def on_media_dropped(self, file_path):
         """Handle when a media file is selected."""
         self.current_media_path = file_path
+        self.current_draft_id = str(uuid.uuid4())[:8]
+        TRACER.instant('select_creative', post_id=self.current_draft_id, media=os.path.basename(file_path))
         self.append_log(f"Media loaded: {os.path.basename(file_path)}")
 
         # Update file label
@@ -2235,14 +6364,56 @@ class SocialRocket(QMainWindow):
         self.regenerate_btn.setEnabled(True)
 
         # Auto-generate content
-        self.generate_ai_content()
+        if not self.apply_stored_content(file_path):
+            self.generate_ai_content()
+
+    def apply_stored_content(self, media_path):
+        """Fill the editor with content a batch run generated for this creative; False if there is none."""
+        stored = CREATIVE_CONTENT.get(media_path)
+        if not stored:
+            return False
+        # A generation queued for the previous creative would overwrite the stored content
+        self.ai_debounce_timer.stop()
+        self.cancel_ai_generation()
+        caption, hashtags = stored.get('caption', ''), stored.get('hashtags', '')
+        self.caption_input.setPlainText(caption)
+        self.hashtag_input.setText(hashtags)
+        self.keyword_input.setText(stored.get('keywords', ''))
+        self.ai_variants = {'caption': caption.strip(), 'hashtags': hashtags.strip(),
+                            'variants': stored.get('variants') or {}}
+        self.append_log(f"Loaded batch-generated content ({stored.get('provider', 'Unknown')}); "
+                        f"Regenerate to ask again.", provider=stored.get('provider'))
+        METRICS.inc('ai_generations_total', outcome='stored')
+        return True
 
     def generate_ai_content(self):
-        """Generate caption, hashtags, and keywords using AI."""
-        print(f"DEBUG: generate_ai_content called, media_path={self.current_media_path}")
+        """Generate caption, hashtags, and keywords using AI.
+
+        Requests are debounced: clicking through several creatives quickly
+        only generates for the last one.
+        """
+        log.debug("generate_ai_content called", extra={'media_path': self.current_media_path})
+
+        if not self.current_media_path:
+            return
+        self.cancel_ai_generation()
+        self.ai_debounce_timer.start()
+
+    def cancel_ai_generation(self):
+        """Drop the AI request in flight: a queued one never runs, a running one stops falling back."""
+        request, self.ai_request = self.ai_request, None
+        if request is None:
+            return
+        request['cancel'].set()
+        if not request['future'].cancel():
+            METRICS.inc('ai_generations_total', outcome='superseded')
+        else:
+            METRICS.inc('ai_generations_total', outcome='cancelled')
+        TRACER.instant('ai.superseded', post_id=request['draft_id'], cat="ai")
 
+    def start_ai_generation(self):
+        """Submit AI generation for the current creative to the AI executor."""
         if not self.current_media_path:
-            print("DEBUG: No media path, returning")
             return
 
         # Check if any API key is configured
@@ -2251,8 +6422,6 @@ class SocialRocket(QMainWindow):
                    config.get('openai_key') or
                    config.get('gemini_key'))
 
-        print(f"DEBUG: API key configured: {has_key}")
-
         if not has_key:
             self.append_log("ERROR: No API keys configured. Go to Settings > AI tab to add your API key.")
             self.caption_input.setPlaceholderText("No API key - go to Settings to configure")
@@ -2263,7 +6432,6 @@ class SocialRocket(QMainWindow):
             )
             return
 
-        print("DEBUG: Starting AI generation...")
         self.append_log("Generating AI content...")
         self.status.showMessage("Analyzing media with AI...")
 
@@ -2272,51 +6440,84 @@ class SocialRocket(QMainWindow):
         self.hashtag_input.setPlaceholderText("Generating with AI...")
         self.keyword_input.setPlaceholderText("Generating with AI...")
 
-        # Run in a thread to avoid blocking UI
+        # Snapshot the inputs on the GUI thread; the result is tagged with the creative
+        draft_id = self.current_draft_id
+        media_path = self.current_media_path
+        prompts = (self.caption_prompt.text(), self.hashtag_prompt.text(), self.keyword_prompt.text())
+        # Someone waiting at the editor may want a different trade-off than bulk runs
+        objective = config.get('ai_interactive_objective')
+        platforms = self.get_selected_platforms() if config.get('ai_platform_variants', True) else None
+        cancel = threading.Event()
+        self.ai_request_seq += 1
+        seq = self.ai_request_seq
+
+        # Run on the AI executor to avoid blocking UI
         def generate():
-            print("DEBUG: Thread started, calling AI service...")
-            result = self.ai_service.analyze_media(
-                self.current_media_path,
-                self.caption_prompt.text(),
-                self.hashtag_prompt.text(),
-                self.keyword_prompt.text()
-            )
-            print(f"DEBUG: AI service returned: {result}")
+            if cancel.is_set():
+                return
+            with TRACER.span('generate_ai_content', post_id=draft_id) as span:
+                result = self.ai_service.analyze_media(
+                    media_path, *prompts, cancel=cancel, objective=objective, platforms=platforms,
+                    on_update=lambda field, text, done: self.ai_content_partial.emit(seq, field, text, done))
+                span['provider'] = result.get('provider')
+                span['error'] = result.get('error')
+            log.debug("AI service returned", extra={'provider': result.get('provider'),
+                                                     'error': result.get('error')})
+            result['draft_id'] = draft_id
+            result['request_seq'] = seq
 
             # Emit signal to update UI from main thread
-            print("DEBUG: Emitting ai_content_ready signal...")
             self.ai_content_ready.emit(result)
 
-        thread = threading.Thread(target=generate, daemon=True)
-        thread.start()
-        print("DEBUG: Thread started")
+        self.ai_request = {'seq': seq, 'draft_id': draft_id, 'cancel': cancel,
+                           'future': self.ai_executor.submit(generate)}
+
+    def update_ai_partial(self, seq, field, text, done):
+        """Show a field of a streaming AI response: the caption as it grows, the others once complete."""
+        if self.ai_request is None or self.ai_request['seq'] != seq:
+            return
+        if field == 'caption':
+            self.caption_input.setPlainText(text)
+            self.caption_input.moveCursor(QTextCursor.MoveOperation.End)
+        elif field == 'hashtags' and done:
+            self.hashtag_input.setText(text)
+        elif field == 'keywords' and done:
+            self.keyword_input.setText(text)
 
     def update_ai_fields(self, result):
         """Update the UI fields with AI-generated content."""
-        print(f"DEBUG: update_ai_fields called with result: {result}")
-
+        # Results of superseded requests (the user moved on or regenerated) are dropped
+        request = self.ai_request
+        if request is None or result.get('request_seq') != request['seq']:
+            METRICS.inc('ai_generations_total', outcome='stale')
+            return
+        self.ai_request = None
+        METRICS.inc('ai_generations_total', outcome='failed' if result.get('error') else 'applied')
         if 'error' in result and result['error']:
-            self.append_log(f"AI generation error: {result['error']}")
+            self.append_log(f"AI generation error: {result['error']}", level=logging.ERROR)
             self.status.showMessage("AI generation failed", 3000)
-            print(f"ERROR: AI generation failed - {result['error']}")
             return
 
         caption = result.get('caption', '')
         hashtags = result.get('hashtags', '')
         keywords = result.get('keywords', '')
 
-        print(f"DEBUG: Setting caption: {caption[:50]}...")
-        print(f"DEBUG: Setting hashtags: {hashtags[:50]}...")
-        print(f"DEBUG: Setting keywords: {keywords[:50]}...")
-
         self.caption_input.setPlainText(caption)
         self.hashtag_input.setText(hashtags)
         self.keyword_input.setText(keywords)
+        self.ai_variants = {'caption': caption.strip(), 'hashtags': hashtags.strip(),
+                            'variants': result.get('variants') or {}}
 
         provider = result.get('provider', 'Unknown')
-        self.append_log(f"AI content generated successfully using {provider}.")
+        self.append_log(f"AI content generated successfully using {provider}.", provider=provider)
         self.status.showMessage(f"Generated with {provider}", 3000)
-        print(f"SUCCESS: UI updated with content from {provider}")
+
+    def current_variants(self, caption, hashtags):
+        """Per-platform texts for the post being saved; none once the caption or hashtags were edited."""
+        generated = self.ai_variants
+        if not generated or (generated['caption'], generated['hashtags']) != (caption, hashtags):
+            return {}
+        return dict(generated['variants'])
 
     def regenerate_content(self):
         """Regenerate content with custom prompts."""
@@ -2325,7 +6526,11 @@ class SocialRocket(QMainWindow):
 
     def clear_current(self):
         """Clear the current post being edited."""
+        self.ai_debounce_timer.stop()
+        self.cancel_ai_generation()
+        self.ai_variants = None
         self.current_media_path = None
+        self.current_draft_id = None
         self.editing_post_id = None
         self.preview_label.clear()
         self.preview_label.setText("No media\nselected")
@@ -2365,41 +6570,57 @@ class SocialRocket(QMainWindow):
         if hashtags:
             full_text += "\n\n" + hashtags
 
+        account = self.get_selected_account()
+        accounts = {p: account for p in platforms}
+        variants = self.current_variants(caption, hashtags)
+
         # If editing an existing post, update it instead of creating new
         if self.editing_post_id and len(scheduled_times) == 1:
-            for i, post in enumerate(self.queue_data):
-                if post.get('id') == self.editing_post_id:
-                    # Update existing post
-                    self.queue_data[i]['caption'] = caption
-                    self.queue_data[i]['hashtags'] = hashtags
-                    self.queue_data[i]['keywords'] = self.keyword_input.text().strip()
-                    self.queue_data[i]['full_text'] = full_text
-                    self.queue_data[i]['platforms'] = platforms
-                    self.queue_data[i]['scheduled_time'] = scheduled_times[0].isoformat()
-                    break
-
-            # Sort by scheduled time
-            self.queue_data.sort(key=lambda x: x.get('scheduled_time', ''))
-            self.save_queue_data()
+            # Update existing post (sorted by scheduled time in the store)
+            self.queue_data = self.queue_store.update_post(self.editing_post_id, {
+                'caption': caption,
+                'hashtags': hashtags,
+                'keywords': self.keyword_input.text().strip(),
+                'full_text': full_text,
+                'platforms': platforms,
+                'accounts': accounts,
+                'variants': variants,
+                'scheduled_time': scheduled_times[0].isoformat(),
+                'failed_at': None,
+                'error': None,
+            })
+            TRACER.instant('schedule_post', post_id=self.editing_post_id,
+                           scheduled_time=scheduled_times[0].isoformat(), platforms=platforms, updated=True)
             self.refresh_queue_display()
 
             time_str = scheduled_times[0].strftime("%b %d at %I:%M %p")
-            self.append_log(f"Updated post {self.editing_post_id} - now scheduled for {time_str}")
+            self.append_log(f"Updated post {self.editing_post_id} - now scheduled for {time_str}",
+                            post_id=self.editing_post_id)
             self.clear_current()
             return
 
         # Create a post for each scheduled time
-        for scheduled_time in scheduled_times:
-            post_id = str(uuid.uuid4())[:8]
+        queued_ids = {post.get('id') for post in self.queue_store.load()}
+        new_posts = []
+        for index, scheduled_time in enumerate(scheduled_times):
+            # The first post keeps the draft's id so its trace is one continuous track.
+            # An edited post's id already belongs to the queued post, so copies get fresh ids.
+            if index == 0 and self.current_draft_id and not self.editing_post_id \
+                    and self.current_draft_id not in queued_ids:
+                post_id = self.current_draft_id
+            else:
+                post_id = str(uuid.uuid4())[:8]
 
             # Copy media to queue directory
             ext = os.path.splitext(self.current_media_path)[1]
             new_media_name = f"{post_id}{ext}"
             new_media_path = os.path.join(QUEUE_DIR, new_media_name)
 
-            with open(self.current_media_path, 'rb') as src:
-                with open(new_media_path, 'wb') as dst:
-                    dst.write(src.read())
+            # Opening the destination for writing would truncate the source if they're the same file
+            if os.path.abspath(new_media_path) != os.path.abspath(self.current_media_path):
+                with open(self.current_media_path, 'rb') as src:
+                    with open(new_media_path, 'wb') as dst:
+                        dst.write(src.read())
 
             post_data = {
                 'id': post_id,
@@ -2409,30 +6630,31 @@ class SocialRocket(QMainWindow):
                 'keywords': self.keyword_input.text().strip(),
                 'full_text': full_text,
                 'platforms': platforms,
+                'accounts': accounts,
+                'variants': variants,
                 'created_at': datetime.now().isoformat(),
-                'scheduled_time': scheduled_time.isoformat()
+                'scheduled_time': scheduled_time.isoformat(),
+                'draft_id': self.current_draft_id,
             }
 
-            self.queue_data.append(post_data)
+            new_posts.append(post_data)
+            TRACER.instant('schedule_post', post_id=post_id, draft_id=self.current_draft_id,
+                           scheduled_time=scheduled_time.isoformat(), platforms=platforms)
 
-        # Sort by scheduled time
-        self.queue_data.sort(key=lambda x: x.get('scheduled_time', ''))
-        self.save_queue_data()
+        # Add to the shared queue (sorted by scheduled time in the store)
+        self.queue_data = self.queue_store.add(new_posts)
         self.refresh_queue_display()
 
         if len(scheduled_times) == 1:
             time_str = scheduled_times[0].strftime("%b %d at %I:%M %p")
-            self.append_log(f"Scheduled post for {time_str}")
+            self.append_log(f"Scheduled post for {time_str}", post_id=post_id)
         else:
             self.append_log(f"Scheduled {len(scheduled_times)} posts across multiple days")
 
         self.clear_current()
 
-    def show_day_posts(self, date):
-        """Show dialog with posts scheduled for the selected date, or open scheduler."""
-        date_str = date.toString("yyyy-MM-dd")
-
-        # Find posts for this date
+    def posts_for_date(self, date_str):
+        """Return queued posts scheduled on date_str (YYYY-MM-DD), sorted by time."""
         day_posts = []
         for post in self.queue_data:
             scheduled_time = post.get('scheduled_time', '')
@@ -2446,6 +6668,11 @@ class SocialRocket(QMainWindow):
 
         # Sort by time
         day_posts.sort(key=lambda x: x.get('scheduled_time', ''))
+        return day_posts
+
+    def show_day_posts(self, date):
+        """Show dialog with posts scheduled for the selected date, or open scheduler."""
+        day_posts = self.posts_for_date(date.toString("yyyy-MM-dd"))
 
         if day_posts:
             # Show existing posts
@@ -2477,22 +6704,39 @@ class SocialRocket(QMainWindow):
             self.append_log("No platforms selected.")
             return
 
-        self.append_log("Posting now...")
+        draft_id = self.current_draft_id
+        media_path = self.current_media_path
+        account = self.get_selected_account()
+        variants = self.current_variants(caption, hashtags)
+        self.append_log("Posting now...", post_id=draft_id)
+
+        # Posting waits for a browser slot and drives a browser; keep that off the GUI thread
+        def run_in_thread():
+            try:
+                with TRACER.span('post_now', post_id=draft_id):
+                    self._post_now_to(platforms, full_text, account, variants, media_path=media_path)
+            except Exception as e:
+                log.exception("Posting failed: %s", e)
+
+        threading.Thread(target=run_in_thread, daemon=True).start()
+        self.clear_current()
 
+    def _post_now_to(self, platforms, full_text, account, variants=None, media_path=None):
+        media_path = media_path or self.current_media_path
         for p in platforms:
+            text = (variants or {}).get(p) or full_text
             if DRY_RUN:
                 self.append_log(
-                    f"[DRY RUN] Would post to {p}: {full_text[:80]!r} "
-                    f"(media: {os.path.basename(self.current_media_path)})"
+                    f"[DRY RUN] Would post to {p} as {account}: {text[:80]!r} "
+                    f"(media: {os.path.basename(media_path)})",
+                    platform=p
                 )
             else:
-                ok, info = self.post_to_platform(p, full_text, self.current_media_path)
+                ok, info = self.post_to_platform(p, text, media_path, account)
                 if ok:
-                    self.append_log(f"[LIVE] {info}")
+                    self.append_log(f"[LIVE] {info}", platform=p)
                 else:
-                    self.append_log(f"[LIVE] Failed to post to {p}: {info}")
-
-        self.clear_current()
+                    self.append_log(f"[LIVE] Failed to post to {p}: {info}", level=logging.WARNING, platform=p)
 
     def get_selected_platforms(self):
         """Get list of selected platform names."""
@@ -2502,23 +6746,30 @@ class SocialRocket(QMainWindow):
                 platforms.append(platform)
         return platforms
 
+    def get_selected_account(self):
+        """Get the account name selected for posting."""
+        return self.account_combo.currentText() or DEFAULT_ACCOUNT
+
+    def refresh_account_choices(self):
+        """Reload the account selector from config, keeping the current choice."""
+        current = self.account_combo.currentText()
+        self.account_combo.clear()
+        self.account_combo.addItems(list_accounts())
+        index = self.account_combo.findText(current)
+        self.account_combo.setCurrentIndex(index if index >= 0 else 0)
+
     def load_queue_data(self):
-        """Load queue data from JSON file."""
-        queue_file = os.path.join(QUEUE_DIR, "queue.json")
-        if os.path.exists(queue_file):
-            try:
-                with open(queue_file, 'r', encoding='utf-8') as f:
-                    self.queue_data = json.load(f)
-            except Exception:
-                self.queue_data = []
-        else:
-            self.queue_data = []
+        """Load queue data from the shared queue store."""
+        self.queue_data = self.queue_store.load()
 
     def save_queue_data(self):
-        """Save queue data to JSON file."""
-        queue_file = os.path.join(QUEUE_DIR, "queue.json")
-        with open(queue_file, 'w', encoding='utf-8') as f:
-            json.dump(self.queue_data, f, indent=2)
+        """Overwrite the shared queue with this window's queue data."""
+        self.queue_store.save(self.queue_data)
+
+    def reload_queue(self):
+        """Pick up changes made by posting workers and redraw."""
+        self.load_queue_data()
+        self.refresh_queue_display()
 
     def refresh_queue_display(self):
         """Refresh the visual queue display and calendar."""
@@ -2545,22 +6796,19 @@ class SocialRocket(QMainWindow):
 
     def remove_from_queue(self, post_id):
         """Remove a post from the queue."""
-        for i, post in enumerate(self.queue_data):
-            if post.get('id') == post_id:
-                # Delete media file
-                media_path = post.get('media_path')
-                if media_path and os.path.exists(media_path):
-                    try:
-                        os.remove(media_path)
-                    except Exception:
-                        pass
-
-                del self.queue_data[i]
-                break
+        post = self.queue_store.remove(post_id)
+        if post:
+            # Delete media file
+            media_path = post.get('media_path')
+            if media_path and os.path.exists(media_path):
+                try:
+                    os.remove(media_path)
+                except Exception:
+                    pass
 
-        self.save_queue_data()
+        self.load_queue_data()
         self.refresh_queue_display()
-        self.append_log(f"Removed post {post_id} from queue.")
+        self.append_log(f"Removed post {post_id} from queue.", post_id=post_id)
 
     def edit_post(self, post_data):
         """Load a scheduled post back into the creative card for editing."""
@@ -2568,12 +6816,15 @@ class SocialRocket(QMainWindow):
         media_path = post_data.get('media_path', '')
 
         if not media_path or not os.path.exists(media_path):
-            self.append_log(f"Cannot edit post {post_id}: media file not found.")
+            self.append_log(f"Cannot edit post {post_id}: media file not found.", level=logging.WARNING,
+                            post_id=post_id)
             QMessageBox.warning(self, "Edit Error", "Media file not found for this post.")
             return
 
         # Track that we're editing
         self.editing_post_id = post_id
+        self.current_draft_id = post_id
+        TRACER.instant('edit_post', post_id=post_id)
 
         # Load media into preview
         self.current_media_path = media_path
@@ -2598,12 +6849,23 @@ class SocialRocket(QMainWindow):
         self.caption_input.setPlainText(post_data.get('caption', ''))
         self.hashtag_input.setText(post_data.get('hashtags', ''))
         self.keyword_input.setText(post_data.get('keywords', ''))
+        self.ai_variants = {'caption': post_data.get('caption', '').strip(),
+                            'hashtags': post_data.get('hashtags', '').strip(),
+                            'variants': post_data.get('variants') or {}}
 
         # Set platform checkboxes
         platforms = post_data.get('platforms', [])
         for platform, chk in self.platform_checkboxes.items():
             chk.setChecked(platform in platforms)
 
+        # Select the post's account (first targeted platform's account)
+        account = post_account(post_data, platforms[0]) if platforms else DEFAULT_ACCOUNT
+        index = self.account_combo.findText(account)
+        if index < 0:
+            self.account_combo.addItem(account)
+            index = self.account_combo.findText(account)
+        self.account_combo.setCurrentIndex(index)
+
         # Enable buttons
         self.schedule_btn.setEnabled(True)
         self.post_now_btn.setEnabled(True)
@@ -2612,7 +6874,7 @@ class SocialRocket(QMainWindow):
         # Update button text to indicate editing
         self.schedule_btn.setText("Update Schedule")
 
-        self.append_log(f"Editing post {post_id}. Make changes and click 'Update Schedule'.")
+        self.append_log(f"Editing post {post_id}. Make changes and click 'Update Schedule'.", post_id=post_id)
 
     # ---- Scheduler ----
     def start_scheduler(self):
@@ -2639,99 +6901,108 @@ class SocialRocket(QMainWindow):
     def _scheduler_loop(self):
         """Check for due posts every 30 seconds."""
         while self.scheduler_running:
-            self.check_due_posts()
+            try:
+                self.send_heartbeat()
+                with METRICS.timer('scheduler_tick_seconds'):
+                    self.check_due_posts()
+                PREWARMER.schedule(self.queue_store.load())
+            except Exception as e:
+                log.exception("Scheduler tick failed: %s", e)
+            self.export_metrics()
             time.sleep(30)
 
+    def send_heartbeat(self):
+        """Report this window as a live queue worker and renew in-flight leases."""
+        inflight = set(self.inflight_posts)
+        self.queue_store.heartbeat(self.worker_id, inflight=sorted(inflight), role="gui")
+        self.queue_store.renew(self.worker_id, inflight)
+
+    def _heartbeat_until(self, done):
+        while not done.wait(self.heartbeat_interval):
+            try:
+                self.send_heartbeat()
+            except Exception as e:
+                log.warning("Heartbeat failed: %s", e)
+
     def check_due_posts(self):
-        """Check if any posts are due to be published."""
+        """Lease the posts that are due and dispatch them for publishing."""
         now = datetime.now()
+        METRICS.inc('scheduler_ticks_total')
 
-        # Find posts that are due
-        due_posts = []
-        for post in self.queue_data:
-            scheduled_time = post.get('scheduled_time', '')
-            if scheduled_time:
-                try:
-                    dt = datetime.fromisoformat(scheduled_time)
-                    if dt <= now:
-                        due_posts.append(post)
-                except Exception:
-                    pass
-
-        # Post each due post
+        # Leasing keeps a post from being picked up twice, here or by a worker
+        due_posts = self.queue_store.acquire_due(self.worker_id, now=now)
         for post in due_posts:
-            QTimer.singleShot(0, lambda p=post: self.post_scheduled_item(p))
+            self.inflight_posts.add(post.get('id'))
+            try:
+                lateness = (now - datetime.fromisoformat(post.get('scheduled_time', ''))).total_seconds()
+                TRACER.instant('due', post_id=post.get('id'), cat="scheduler", lateness_s=round(lateness, 3))
+            except ValueError:
+                pass
 
-    def post_scheduled_item(self, post):
-        """Post a scheduled item that is now due."""
-        post_id = post.get('id', 'unknown')
-        media_path = post.get('media_path')
-        full_text = post.get('full_text', '')
-        platforms = post.get('platforms', [])
+        METRICS.inc('scheduler_due_posts_total', len(due_posts))
 
-        if not platforms:
-            platforms = self.get_selected_platforms()
+        # Post the due posts together so same-account posts share a session
+        if due_posts:
+            self.posts_due.emit(due_posts)
 
-        scheduled_time = post.get('scheduled_time', '')
-        if scheduled_time:
+    def post_scheduled_items(self, posts):
+        """Post scheduled items that are now due, off the GUI thread."""
+        fallback_platforms = self.get_selected_platforms()
+        ids = [post.get('id', 'unknown') for post in posts]
+
+        def run_in_thread():
+            pending = list(ids)
+            # Leases must stay alive while publishing even if the scheduler is stopped meanwhile
+            done = threading.Event()
+            threading.Thread(target=self._heartbeat_until, args=(done,), name="gui-heartbeat",
+                             daemon=True).start()
             try:
-                dt = datetime.fromisoformat(scheduled_time)
-                time_str = dt.strftime("%I:%M %p")
-                self.append_log(f"Publishing scheduled post {post_id} (scheduled for {time_str})")
-            except Exception:
-                self.append_log(f"Publishing scheduled post {post_id}")
-        else:
-            self.append_log(f"Publishing post {post_id}")
+                publish_posts(posts, fallback_platforms, worker_id=self.worker_id)
 
-        for p in platforms:
-            if DRY_RUN:
-                self.append_log(
-                    f"[DRY RUN] Would post to {p}: {full_text[:80]!r} "
-                    f"(media: {os.path.basename(media_path) if media_path else 'none'})"
-                )
-            else:
-                ok, info = self.post_to_platform(p, full_text, media_path)
-                if ok:
-                    self.append_log(f"[LIVE] {info}")
-                else:
-                    self.append_log(f"[LIVE] Failed to post to {p}: {info}")
+                # Remove from queue
+                for post_id in ids:
+                    self.queue_store.complete(self.worker_id, post_id)
+                    pending.remove(post_id)
+            except Exception as e:
+                log.exception("Publishing failed: %s", e)
+                for post_id in pending:
+                    self.queue_store.fail(self.worker_id, post_id, e)
+            finally:
+                done.set()
+                self.inflight_posts.difference_update(ids)
+            self.posts_completed.emit(ids)
 
-        # Move to posted
-        os.makedirs(POSTED_DIR, exist_ok=True)
-        if media_path and os.path.exists(media_path):
-            new_path = os.path.join(POSTED_DIR, os.path.basename(media_path))
-            os.replace(media_path, new_path)
+        threading.Thread(target=run_in_thread, daemon=True).start()
 
-        # Remove from queue
-        self.queue_data = [p for p in self.queue_data if p.get('id') != post_id]
-        self.save_queue_data()
+    def post_scheduled_item(self, post):
+        """Post a single scheduled item that is now due."""
+        self.post_scheduled_items([post])
 
-        self.append_log(f"Completed post {post_id}.")
+    def on_posts_completed(self, post_ids):
+        self.load_queue_data()
+        for post_id in post_ids:
+            self.append_log(f"Completed post {post_id}.", post_id=post_id)
         self.refresh_queue_display()
 
-    def post_to_platform(self, platform_name, text, img_path):
+    def post_to_platform(self, platform_name, text, img_path, account=DEFAULT_ACCOUNT):
         """Dispatch to the correct per-platform function."""
-        if platform_name == "X":
-            return post_to_x(text, img_path)
-        elif platform_name == "Reddit":
-            return post_to_reddit(text, img_path)
-        elif platform_name == "Facebook":
-            return post_to_facebook(text, img_path)
-        elif platform_name == "LinkedIn":
-            return post_to_linkedin(text, img_path)
-        elif platform_name == "Threads":
-            return post_to_threads(text, img_path)
-        elif platform_name == "Instagram":
-            return post_to_instagram(text, img_path)
-        elif platform_name == "TikTok":
-            return post_to_tiktok(text, img_path)
-        elif platform_name == "Quora":
-            return post_to_quora(text, img_path)
-        else:
-            return False, f"Unknown platform: {platform_name}"
+        return post_to_platform(platform_name, text, img_path, account)
 
 
 def main():
+    if '--worker' in sys.argv[1:]:
+        run_worker(sys.argv[1:])
+        return
+    if '--ai-batch' in sys.argv[1:]:
+        run_ai_batch(sys.argv[1:])
+        return
+    if '--search-logs' in sys.argv[1:]:
+        run_search_logs(sys.argv[1:])
+        return
+    if '--trace' in sys.argv[1:]:
+        run_trace(sys.argv[1:])
+        return
+
     app = QApplication(sys.argv)
 
     # Create and show splash screen
@@ -2748,7 +7019,14 @@ def main():
 
     win = SocialRocket()
     win.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    win.cancel_ai_generation()
+    win.ai_executor.shutdown(wait=False, cancel_futures=True)
+    POSTING_POOL.close()
+    BROWSER_POOL.close()
+    SELECTORS.save()
+    TIMEOUTS.save()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import social_rocket
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Point every file social_rocket writes at a temporary directory."""
+    for name in social_rocket._PROCESS_SETTINGS:
+        original = getattr(social_rocket, name)
+        monkeypatch.setattr(social_rocket, name, str(tmp_path / os.path.basename(original)))
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+@pytest.fixture
+def window(qapp, workdir):
+    win = social_rocket.SocialRocket()
+    win.refresh_timer.stop()
+    win.metrics_timer.stop()
+    win.log_flush_timer.stop()
+    yield win
+    win.cancel_ai_generation()
+    win.ai_executor.shutdown(wait=False, cancel_futures=True)
+    win.deleteLater()
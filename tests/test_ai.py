@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+import social_rocket
+
+
+class FakeBatchClient:
+    submitted = []
+
+    def __init__(self, provider, config):
+        self.provider = provider
+
+    def submit(self, requests):
+        FakeBatchClient.submitted.append(requests)
+        return f"batch{len(FakeBatchClient.submitted)}"
+
+
+def test_interactive_requests_use_the_short_system_prompt(workdir):
+    service = social_rocket.AIService()
+    anthropic = service._anthropic_request(str(workdir / "creative.txt"), "prompt")
+    openai = service._openai_request(str(workdir / "creative.txt"), "prompt")
+
+    assert anthropic['system'][0]['text'] == social_rocket.AI_SYSTEM_PROMPT
+    assert openai['messages'][0]['content'] == social_rocket.AI_SYSTEM_PROMPT
+    assert "## Example" not in social_rocket.AI_SYSTEM_PROMPT
+
+
+def test_batches_use_the_bulk_system_prompt_only_when_enabled(workdir, monkeypatch):
+    monkeypatch.setattr(social_rocket, 'AIBatchClient', FakeBatchClient)
+    FakeBatchClient.submitted = []
+    paths = [str(workdir / "creative.txt")]
+    for enabled in (False, True):
+        social_rocket.save_config({'anthropic_key': "test-key", 'ai_bulk_system_prompt': enabled})
+        jobs = social_rocket.AIBatchRunner(store=social_rocket.CreativeContentStore()).submit(
+            paths, 'Anthropic', force=True)
+        assert jobs[0]['system_prompt'] == ('bulk' if enabled else 'standard')
+
+    standard, bulk = (next(iter(requests.values()))['system'][0]['text']
+                      for requests in FakeBatchClient.submitted)
+    assert standard == social_rocket.AI_SYSTEM_PROMPT
+    assert bulk == social_rocket.AI_BULK_SYSTEM_PROMPT
+
+
+def test_cache_savings_are_the_discount_on_cached_reads():
+    pricing = {'model': (3.0, 15.0)}
+    assert social_rocket.ai_cache_savings_usd('model', 1_000_000, pricing, (0.1, 1.25)) == pytest.approx(2.7)
+    assert social_rocket.ai_cache_savings_usd('unpriced', 1_000_000, pricing) is None
+
+
+def test_bulk_system_prompt_covers_every_platform():
+    for platform, limit in social_rocket.PLATFORM_TEXT_LIMITS.items():
+        assert f"- {platform} (max {limit} characters)" in social_rocket.AI_BULK_SYSTEM_PROMPT
+
+
+def test_bulk_system_prompt_example_parses_like_a_response():
+    service = social_rocket.AIService.__new__(social_rocket.AIService)
+    example = social_rocket.AI_BULK_SYSTEM_PROMPT.split("## Example", 1)[1]
+    start = example.index("{")
+    end = example.index("}\n\nFor the same photo") + 1
+    result = service._parse_response(example[start:end])
+    assert result['caption'].startswith("Your best ideas")
+    assert json.loads(example[start:end])['hashtags'].startswith("#MorningRoutine")
+
+
+def test_stored_content_stops_a_pending_generation(window, workdir):
+    media_path = str(workdir / "creative.png")
+    social_rocket.CREATIVE_CONTENT.update({media_path: {'caption': "Stored", 'hashtags': "#stored"}})
+    window.current_media_path = media_path
+    window.ai_debounce_timer.start()
+
+    assert window.apply_stored_content(media_path)
+    assert not window.ai_debounce_timer.isActive()
+    assert window.caption_input.toPlainText() == "Stored"
+
+
+MODELS = {'Anthropic': 'a', 'OpenAI': 'o', 'Gemini': 'g'}
+PROVIDERS = ['Anthropic', 'OpenAI', 'Gemini']
+
+
+def test_policy_tries_unmeasured_providers_before_slow_measured_ones():
+    policy = social_rocket.ProviderPolicy(explore_every=0)
+    policy.record('Anthropic', 'a', True, 8.0)
+
+    assert policy.order(PROVIDERS, MODELS, 'fastest') == ['OpenAI', 'Gemini', 'Anthropic']
+    policy.record('OpenAI', 'o', True, 2.0)
+    policy.record('Gemini', 'g', True, 4.0)
+    assert policy.order(PROVIDERS, MODELS, 'fastest') == ['OpenAI', 'Gemini', 'Anthropic']
+
+
+def test_policy_periodically_probes_the_least_used_provider():
+    policy = social_rocket.ProviderPolicy(explore_every=5)
+    for _ in range(10):
+        policy.record('OpenAI', 'o', True, 1.0)
+        policy.record('Gemini', 'g', True, 2.0)
+    policy.record('Anthropic', 'a', True, 9.0)
+
+    rankings = [policy.order(PROVIDERS, MODELS, 'fastest') for _ in range(10)]
+    assert [r[0] for r in rankings].count('Anthropic') == 2
+    assert rankings[4] == ['Anthropic', 'OpenAI', 'Gemini']
+    assert rankings[0] == ['OpenAI', 'Gemini', 'Anthropic']
+    assert policy.order(PROVIDERS, MODELS, 'primary') == PROVIDERS
+
+
+def test_fit_post_text_drops_hashtags_before_cutting_the_caption():
+    assert social_rocket.fit_post_text("Caption", "#a #b", 100) == "Caption\n\n#a #b"
+    assert social_rocket.fit_post_text("Caption", "#one #two", 16) == "Caption\n\n#one"
+    assert social_rocket.fit_post_text("Caption", "#one #two", 8) == "Caption"
+
+    cut = social_rocket.fit_post_text("word " * 100, "#tag", 50)
+    assert len(cut) <= 50 and cut.endswith("word…") and "#" not in cut
+    assert len(social_rocket.fit_post_text("x" * 400, "", 280)) == 280
+
+
+def test_parsed_variants_fit_each_platform_limit():
+    service = social_rocket.AIService.__new__(social_rocket.AIService)
+    long_caption = "An unusually long caption " * 40
+    result = service._parse_response(json.dumps({
+        'caption': "General", 'hashtags': "#general", 'keywords': "k",
+        'variants': {
+            'X': {'caption': long_caption, 'hashtags': "#one #two"},
+            'LinkedIn': {'caption': "Short enough", 'hashtags': "#work"},
+            'MySpace': {'caption': "Unknown platform"},
+            'Threads': {'hashtags': "#no caption"},
+        },
+    }))
+
+    assert set(result['variants']) == {'X', 'LinkedIn'}
+    assert len(result['variants']['X']) <= social_rocket.PLATFORM_TEXT_LIMITS['X']
+    assert result['variants']['LinkedIn'] == "Short enough\n\n#work"
+    assert result['caption'] == "General"
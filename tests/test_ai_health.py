@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+import social_rocket
+
+
+@pytest.fixture
+def health(monkeypatch):
+    health = social_rocket.ProviderHealth(failure_threshold=2, cooldown=60, max_cooldown=240)
+    monkeypatch.setattr(social_rocket, 'AI_HEALTH', health)
+    return health
+
+
+def open_and_cool_down(health, provider='Anthropic'):
+    for _ in range(health.failure_threshold):
+        assert health.allow(provider)
+        health.record(provider, False, 1.0)
+    state = health._providers[provider]
+    state['opened_at'] -= state['cooldown'] + 1
+    return state
+
+
+def test_cancelled_probe_is_released(workdir, health, monkeypatch):
+    social_rocket.save_config({'anthropic_key': "test-key", 'primary_provider': 'Anthropic'})
+    monkeypatch.setitem(social_rocket.AI_PROVIDER_KEYS, 'Anthropic', ('anthropic_key', True))
+    state = open_and_cool_down(health)
+    service = social_rocket.AIService()
+    cancel = threading.Event()
+
+    def cancelled_call(media_path, prompt, on_delta=None, extra_tokens=0):
+        assert state['state'] == health.HALF_OPEN and state['probing']
+        cancel.set()
+        return None, "cancelled", None
+
+    monkeypatch.setattr(service, '_call_anthropic', cancelled_call)
+    result = service.analyze_media(str(workdir / "creative.png"), cancel=cancel)
+
+    assert result['cancelled']
+    assert state['state'] == health.HALF_OPEN and not state['probing']
+    assert health.allow('Anthropic')
+
+
+def test_consecutive_failures_open_the_circuit_until_the_cooldown_passes(health):
+    for _ in range(health.failure_threshold - 1):
+        health.record('OpenAI', False, 1.0)
+    assert health.allow('OpenAI')
+    health.record('OpenAI', False, 1.0)
+
+    assert health.stats()['OpenAI']['state'] == health.OPEN
+    assert not health.allow('OpenAI')
+    open_and_cool_down(health, 'Gemini')
+    assert health.allow('Gemini')
+    assert not health.allow('Gemini')  # only one probe while half-open
+
+
+def test_error_rate_opens_the_circuit_without_a_streak(health):
+    health.min_requests, health.window = 4, 4
+    health.failure_threshold = 10
+    for ok in (True, False, True, False):
+        health.record('OpenAI', ok, 1.0)
+    assert health.stats()['OpenAI']['state'] == health.OPEN
+
+
+def test_probe_success_closes_and_resets_the_cooldown(health):
+    state = open_and_cool_down(health)
+    assert health.allow('Anthropic')
+    health.record('Anthropic', True, 1.0)
+
+    assert state['state'] == health.CLOSED and state['cooldown'] == health.cooldown
+    assert health.allow('Anthropic') and health.allow('Anthropic')
+
+
+def test_probe_failure_reopens_with_a_doubled_cooldown_up_to_the_maximum(health):
+    state = open_and_cool_down(health)
+    for expected in (120, 240, 240):
+        assert health.allow('Anthropic')
+        health.record('Anthropic', False, 1.0)
+        assert state['state'] == health.OPEN and state['cooldown'] == expected
+        assert not health.allow('Anthropic')
+        state['opened_at'] -= state['cooldown'] + 1
+
+
+def test_abandon_frees_the_probe_without_counting_an_outcome(health):
+    state = open_and_cool_down(health)
+    failures = state['failures']
+    assert health.allow('Anthropic')
+    health.abandon('Anthropic')
+
+    assert state['state'] == health.HALF_OPEN and state['failures'] == failures
+    assert health.allow('Anthropic')
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+import social_rocket
+
+
+RESPONSE = '```json\n' + json.dumps({
+    'caption': 'Line one\nSay "hi" \\ back é \U0001F680',
+    'hashtags': '#one #two',
+    'keywords': 'a, b',
+    'variants': {'X': {'caption': 'Short {not a brace}', 'hashtags': '#x'}},
+    'score': 3,
+}) + '\n```'
+
+
+def feed_in_chunks(text, size, fields=None):
+    parser = social_rocket.IncrementalJSONFields(fields)
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, len(RESPONSE)])
+def test_fields_parse_the_same_across_chunk_boundaries(size):
+    parser, events = feed_in_chunks(RESPONSE, size)
+    expected = json.loads(RESPONSE.strip('`json\n'))
+
+    assert parser.values == expected
+    assert [key for key, _, done in events if done] == list(expected)
+
+
+def test_string_fields_grow_before_they_are_done():
+    parser, events = feed_in_chunks(RESPONSE, 5, fields={'caption'})
+    partial = [value for key, value, done in events if not done]
+
+    assert {key for key, _, _ in events} == {'caption'}
+    assert partial and all(parser.values['caption'].startswith(value) for value in partial)
+    assert [len(value) for value in partial] == sorted(len(value) for value in partial)
+
+
+def test_escapes_split_between_chunks():
+    parser = social_rocket.IncrementalJSONFields()
+    for chunk in ('{"caption": "a\\', 'nb \\u00', 'e9 \\ud83d', '\\ude80"}'):
+        parser.feed(chunk)
+    assert parser.values == {'caption': "a\nb é \U0001F680"}
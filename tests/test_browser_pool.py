@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import social_rocket
+
+
+def test_cancelled_session_is_not_captured_as_failure(workdir, monkeypatch):
+    pool = social_rocket.BrowserPool()
+    reasons = []
+
+    async def fake_context(platform, account):
+        pool._contexts[(platform, account)] = {'context': object(), 'busy': False, 'uses': 0}
+        return pool._contexts[(platform, account)]['context']
+
+    async def noop(*args):
+        return None
+
+    async def record_finish(context, platform, account, reason):
+        reasons.append(reason)
+
+    monkeypatch.setattr(pool, '_context', fake_context)
+    monkeypatch.setattr(pool, '_save_session', noop)
+    monkeypatch.setattr(pool, '_check_memory', noop)
+    monkeypatch.setattr(social_rocket.FAILURE_CAPTURE, 'begin', noop)
+    monkeypatch.setattr(social_rocket.FAILURE_CAPTURE, 'finish', record_finish)
+
+    async def hang(context):
+        await asyncio.sleep(3600)
+
+    try:
+        future = pool.submit(pool.session('X', 'alice', hang, timeout=60))
+        time.sleep(0.2)
+        future.cancel()
+        deadline = time.monotonic() + 5
+        while not reasons and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        pool.close()
+
+    assert reasons == [None]
@@ -0,0 +1,50 @@
+import json
+import os
+
+import social_rocket
+
+
+def write_log(entries):
+    os.makedirs(social_rocket.LOG_DIR, exist_ok=True)
+    with open(os.path.join(social_rocket.LOG_DIR, "social_rocket.jsonl"), 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def test_search_logs_command_filters_entries(workdir, capsys):
+    write_log([
+        {'ts': "2026-10-19T10:00:00.000", 'level': "INFO", 'msg': "Posting now", 'post_id': "p1"},
+        {'ts': "2026-10-19T10:00:01.000", 'level': "WARNING", 'msg': "Failed to post to X",
+         'post_id': "p1", 'platform': "X"},
+        {'ts': "2026-10-19T10:00:02.000", 'level': "ERROR", 'msg': "Failed to post to X", 'post_id': "p2"},
+    ])
+
+    social_rocket.run_search_logs(['--search-logs', '--post-id', 'p1', '--level', 'warning'])
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['ts'] for line in lines] == ["2026-10-19T10:00:01.000"]
+
+    social_rocket.run_search_logs(['--search-logs', '--text', 'failed TO post'])
+    assert [json.loads(line)['post_id'] for line in capsys.readouterr().out.splitlines()] == ["p1", "p2"]
+
+
+def test_trace_command_prints_and_saves_a_posts_events(workdir, capsys):
+    os.makedirs(social_rocket.TRACE_DIR, exist_ok=True)
+    events = [
+        {'name': "select_creative", 'ph': "i", 'ts': 1_000_000, 'args': {'post_id': "d1"}},
+        {'name': "schedule_post", 'ph': "i", 'ts': 2_000_000, 'args': {'post_id': "p1", 'draft_id': "d1"}},
+        {'name': "publish_post", 'ph': "X", 'ts': 5_000_000, 'dur': 1500, 'args': {'post_id': "p1"}},
+        {'name': "publish_post", 'ph': "X", 'ts': 6_000_000, 'dur': 900, 'args': {'post_id': "other"}},
+    ]
+    with open(os.path.join(social_rocket.TRACE_DIR, "trace-2026-10-19.json"), 'w', encoding='utf-8') as f:
+        f.write("[\n" + "".join(json.dumps(e) + ",\n" for e in events))
+    out = workdir / "p1.json"
+
+    social_rocket.run_trace(['--trace', 'p1', '--out', str(out)])
+    lines = capsys.readouterr().out.splitlines()
+
+    assert [line.split()[2] for line in lines[:-1]] == ["schedule_post", "publish_post"]
+    assert lines[1].startswith("+    3.000s  publish_post 1.5 ms")
+    assert [e['name'] for e in json.loads(out.read_text())['traceEvents']] == ["schedule_post", "publish_post"]
+
+    social_rocket.run_trace(['--trace', 'missing'])
+    assert "No trace events" in capsys.readouterr().out
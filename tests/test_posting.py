@@ -0,0 +1,128 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+import social_rocket
+
+
+ITEMS = [{'text': f"Post {n}", 'image_path': None, 'post_id': f"p{n}"} for n in range(3)]
+
+
+class FakeProcess:
+    pid = 999999
+    exitcode = -9
+
+    def is_alive(self):
+        return False
+
+    def join(self, timeout=None):
+        pass
+
+
+class DyingConn:
+    """Reports the first batch item as posted, then the process dies."""
+
+    def __init__(self):
+        self.messages = [{'progress': 0, 'item': (True, "X: posted p0")}]
+
+    def send(self, job):
+        pass
+
+    def poll(self, timeout=None):
+        return True
+
+    def recv(self):
+        if self.messages:
+            return self.messages.pop(0)
+        raise EOFError
+
+    def close(self):
+        pass
+
+
+def test_posting_pool_batch_keeps_finished_items_when_process_dies(workdir, monkeypatch):
+    pool = social_rocket.PostingProcessPool(processes=1)
+    monkeypatch.setattr(pool, '_ensure', lambda index: pool._slots[index].update(
+        process=FakeProcess(), conn=DyingConn()))
+
+    results = pool.batch('X', ITEMS, 'alice')
+
+    assert results[0] == (True, "X: posted p0")
+    assert [ok for ok, _ in results[1:]] == [False, False]
+    assert "crashed" in results[1][1]
+
+
+def test_post_batch_to_x_keeps_finished_items_when_session_fails(workdir, monkeypatch):
+    async def fake_batch(items, account, spacing, on_result=None):
+        on_result(0, (True, "X: posted p0"))
+        raise TimeoutError("X task timed out after 240s")
+
+    monkeypatch.setattr(social_rocket, 'post_batch_to_x_async', fake_batch)
+    try:
+        results = social_rocket.post_batch_to_x(ITEMS, 'alice')
+    finally:
+        social_rocket.BROWSER_POOL.close()
+
+    assert results[0] == (True, "X: posted p0")
+    assert results[1] == results[2] == (False, "X: X task timed out after 240s")
+
+
+def test_worker_marks_posts_failed_when_publishing_raises(workdir, monkeypatch):
+    store = social_rocket.QueueStore(str(workdir / "queue"))
+    due = (datetime.now() - timedelta(minutes=1)).isoformat()
+    store.save([{'id': 'p1', 'platforms': ['X'], 'scheduled_time': due}])
+    worker = social_rocket.QueueWorker(store, worker_id="w1")
+
+    def broken(posts, fallback_platforms=None, worker_id=None):
+        raise RuntimeError("browser engine gone")
+
+    monkeypatch.setattr(social_rocket, 'publish_posts', broken)
+    with pytest.raises(RuntimeError):
+        worker.run_once()
+
+    post, = store.load()
+    assert post['failed_at'] and 'lease_owner' not in post
+    assert "browser engine gone" in post['error']
+    assert store.acquire_due("w1") == []
+    assert worker.inflight == set()
+
+
+class SlowConn:
+    """Takes a while to post; records how many jobs are running at once."""
+
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def send(self, job):
+        with SlowConn.lock:
+            SlowConn.running += 1
+            SlowConn.peak = max(SlowConn.peak, SlowConn.running)
+
+    def poll(self, timeout=None):
+        time.sleep(0.05)
+        return True
+
+    def recv(self):
+        with SlowConn.lock:
+            SlowConn.running -= 1
+        return {'result': (True, "posted")}
+
+    def close(self):
+        pass
+
+
+def test_posting_pool_concurrency_is_bounded_by_processes(workdir, monkeypatch):
+    pool = social_rocket.PostingProcessPool(processes=2, max_jobs=0)
+    monkeypatch.setattr(pool, '_ensure', lambda index: pool._slots[index].update(
+        process=FakeProcess(), conn=SlowConn()))
+    accounts = [f"account{n}" for n in range(6)]
+
+    with ThreadPoolExecutor(max_workers=len(accounts)) as executor:
+        results = list(executor.map(lambda account: pool.run('X', "Post", None, account), accounts))
+
+    assert results == [(True, "posted")] * len(accounts)
+    assert SlowConn.peak <= 2
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import social_rocket
+
+
+def test_publish_posts_runs_accounts_concurrently(workdir, monkeypatch):
+    monkeypatch.setattr(social_rocket, 'DRY_RUN', False)
+    monkeypatch.setattr(social_rocket, 'POSTING_POOL', social_rocket.PostingProcessPool(processes=0))
+    monkeypatch.setattr(social_rocket, 'GOVERNOR', social_rocket.ResourceGovernor({'browser': 2}))
+    spans = {}
+    lock = threading.Lock()
+
+    def fake_post(platform_name, text, img_path, account=social_rocket.DEFAULT_ACCOUNT):
+        start = time.monotonic()
+        time.sleep(0.3)
+        with lock:
+            spans[account] = (start, time.monotonic())
+        return True, f"posted as {account}"
+
+    monkeypatch.setattr(social_rocket, '_dispatch_post', fake_post)
+    posts = [
+        {'id': 'p1', 'caption': "One", 'platforms': ['X'], 'accounts': {'X': 'alice'}},
+        {'id': 'p2', 'caption': "Two", 'platforms': ['X'], 'accounts': {'X': 'bob'}},
+    ]
+
+    results = social_rocket.publish_posts(posts)
+
+    assert results == {'p1': [('X', True, "posted as alice")], 'p2': [('X', True, "posted as bob")]}
+    (a_start, a_end), (b_start, b_end) = spans['alice'], spans['bob']
+    assert a_start < b_end and b_start < a_end, "the two accounts' sessions did not overlap"
+
+
+def test_publish_posts_is_bounded_by_browser_slots(workdir, monkeypatch):
+    monkeypatch.setattr(social_rocket, 'DRY_RUN', False)
+    monkeypatch.setattr(social_rocket, 'POSTING_POOL', social_rocket.PostingProcessPool(processes=0))
+    monkeypatch.setattr(social_rocket, 'GOVERNOR', social_rocket.ResourceGovernor({'browser': 1}))
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_post(platform_name, text, img_path, account=social_rocket.DEFAULT_ACCOUNT):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.1)
+        with lock:
+            running[0] -= 1
+        return True, "ok"
+
+    monkeypatch.setattr(social_rocket, '_dispatch_post', fake_post)
+    posts = [{'id': f"p{n}", 'caption': "x", 'platforms': ['X'], 'accounts': {'X': f"acct{n}"}}
+             for n in range(3)]
+
+    social_rocket.publish_posts(posts)
+
+    assert peak[0] == 1
+
+
+def test_post_now_posts_off_the_gui_thread(window, workdir, monkeypatch):
+    monkeypatch.setattr(social_rocket, 'DRY_RUN', False)
+    media_path = workdir / "creative.png"
+    media_path.write_bytes(b"creative bytes")
+    window.current_media_path = str(media_path)
+    window.caption_input.setPlainText("Caption")
+    platform, checkbox = next(iter(window.platform_checkboxes.items()))
+    checkbox.setChecked(True)
+
+    release = threading.Event()
+    calls = []
+
+    def blocking_post(platform_name, text, img_path, account=social_rocket.DEFAULT_ACCOUNT):
+        calls.append((threading.current_thread(), platform_name, img_path))
+        release.wait(5)
+        return True, "posted"
+
+    window.post_to_platform = blocking_post
+    started = time.monotonic()
+    window.post_now()
+    assert time.monotonic() - started < 1
+    assert window.current_media_path is None
+
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    assert calls == [(calls[0][0], platform, str(media_path))]
+    assert calls[0][0] is not threading.main_thread()
+    # Let the trace span close while TRACE_DIR still points at the temporary directory
+    calls[0][0].join(5)
@@ -0,0 +1,42 @@
+import os
+from datetime import datetime, timedelta
+
+import social_rocket
+
+
+class FakeScheduleDialog:
+    def __init__(self, times):
+        self.times = times
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def exec(self):
+        return social_rocket.QDialog.DialogCode.Accepted
+
+    def get_scheduled_times(self):
+        return self.times
+
+
+def test_editing_a_queued_post_into_several_times_keeps_ids_and_media(window, monkeypatch):
+    os.makedirs(social_rocket.QUEUE_DIR, exist_ok=True)
+    media_path = os.path.join(social_rocket.QUEUE_DIR, "p1.png")
+    with open(media_path, 'wb') as f:
+        f.write(b"creative bytes")
+    window.queue_data = window.queue_store.add([{
+        'id': 'p1', 'media_path': media_path, 'caption': "Caption", 'hashtags': "",
+        'platforms': ['X'], 'scheduled_time': (datetime.now() + timedelta(days=1)).isoformat(),
+    }])
+    window.edit_post(window.queue_data[0])
+
+    tomorrow = datetime.now() + timedelta(days=1)
+    monkeypatch.setattr(social_rocket, 'ScheduleDialog',
+                        FakeScheduleDialog([tomorrow, tomorrow + timedelta(days=1)]))
+    window.schedule_post()
+
+    posts = window.queue_store.load()
+    ids = [post['id'] for post in posts]
+    assert len(ids) == len(set(ids)) == 3
+    for post in posts:
+        with open(post['media_path'], 'rb') as f:
+            assert f.read() == b"creative bytes"
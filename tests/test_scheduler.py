@@ -0,0 +1,62 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import social_rocket
+
+
+def due_post(post_id, minutes_ago=5):
+    return {
+        'id': post_id,
+        'caption': f"Caption {post_id}",
+        'hashtags': "#test",
+        'platforms': ['X'],
+        'scheduled_time': (datetime.now() - timedelta(minutes=minutes_ago)).isoformat(),
+    }
+
+
+def test_check_due_posts_from_scheduler_thread_dispatches_on_gui_thread(qapp, window):
+    window.queue_data = [due_post('a1'), due_post('b2')]
+    window.save_queue_data()
+    dispatched = []
+    window.post_scheduled_items = lambda posts: dispatched.append((threading.current_thread(), posts))
+
+    scheduler = threading.Thread(target=window.check_due_posts)
+    scheduler.start()
+    scheduler.join(5)
+
+    deadline = time.monotonic() + 5
+    while not dispatched and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+
+    assert len(dispatched) == 1
+    thread, posts = dispatched[0]
+    assert thread is threading.main_thread()
+    assert sorted(p['id'] for p in posts) == ['a1', 'b2']
+    assert window.inflight_posts == {'a1', 'b2'}
+
+
+def test_publishing_keeps_sending_heartbeats_with_the_scheduler_stopped(window, monkeypatch):
+    assert not window.scheduler_running
+    window.heartbeat_interval = 0.02
+    release = threading.Event()
+    beats = []
+    monkeypatch.setattr(social_rocket, 'publish_posts', lambda *args, **kwargs: release.wait(5))
+    window.send_heartbeat = lambda: beats.append(set(window.inflight_posts))
+
+    window.inflight_posts.add('a1')
+    window.post_scheduled_items([due_post('a1')])
+    deadline = time.monotonic() + 5
+    while len(beats) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+
+    assert len(beats) >= 3 and beats[0] == {'a1'}
+    deadline = time.monotonic() + 5
+    while window.inflight_posts and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    count = len(beats)
+    time.sleep(0.1)
+    assert len(beats) == count
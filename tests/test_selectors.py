@@ -0,0 +1,14 @@
+import os
+
+import social_rocket
+
+
+def test_record_does_not_write_until_flushed(workdir):
+    registry = social_rocket.SelectorRegistry(save_interval=0)
+    registry.record('X', 'post_button', '[data-testid="tweetButton"]', True)
+    assert not os.path.exists(social_rocket.SELECTOR_CACHE_FILE)
+
+    registry.save_if_due()
+
+    reloaded = social_rocket.SelectorRegistry()
+    assert reloaded.stats()['X']['post_button']['[data-testid="tweetButton"]']['hits'] == 1
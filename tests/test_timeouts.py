@@ -0,0 +1,54 @@
+import asyncio
+import os
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+import social_rocket
+
+
+def slow_step(seconds):
+    """A step taking `seconds`, failing like Playwright when its timeout is shorter."""
+    async def action(timeout_ms):
+        if seconds * 1000 > timeout_ms:
+            await asyncio.sleep(timeout_ms / 1000)
+            raise PlaywrightTimeoutError(f"Timeout {timeout_ms}ms exceeded.")
+        await asyncio.sleep(seconds)
+        return "done"
+    return action
+
+
+def test_timed_out_runs_raise_the_timeout(workdir):
+    timeouts = social_rocket.AdaptiveTimeouts(floor=0.01, min_samples=5)
+    for _ in range(20):
+        timeouts.observe('X', 'login', 0.01)
+    learned = timeouts.timeout_ms('X', 'login', 60000)
+    assert learned == 30
+
+    # The site slows down past the learned value: the first attempt times out...
+    with pytest.raises(PlaywrightTimeoutError):
+        asyncio.run(timeouts.run('X', 'login', 60000, slow_step(0.06)))
+    assert timeouts.timeout_ms('X', 'login', 60000) > learned
+
+    # ...and the longer timeout lets the next one through
+    assert asyncio.run(timeouts.run('X', 'login', 60000, slow_step(0.06))) == "done"
+
+
+def test_timeouts_stay_below_the_ceiling(workdir):
+    timeouts = social_rocket.AdaptiveTimeouts(floor=0.01, min_samples=5, ceiling_factor=2.0)
+    for _ in range(20):
+        timeouts.observe('X', 'login', 0.01)
+    for _ in range(5):
+        with pytest.raises(PlaywrightTimeoutError):
+            asyncio.run(timeouts.run('X', 'login', 100, slow_step(10)))
+    assert timeouts.timeout_ms('X', 'login', 100) == 200
+
+
+def test_observe_does_not_write_until_flushed(workdir):
+    timeouts = social_rocket.AdaptiveTimeouts(save_interval=0)
+    timeouts.observe('X', 'login', 0.5)
+    assert not os.path.exists(social_rocket.LATENCY_FILE)
+
+    timeouts.save_if_due()
+
+    assert social_rocket.AdaptiveTimeouts().stats()['X/login']['samples'] == 1